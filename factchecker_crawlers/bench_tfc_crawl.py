@@ -0,0 +1,142 @@
+"""
+爬取效能測試入口
+
+啟動本機 TFC 模擬網站（benchmarks/mock_tfc_site.py），以專案設定完整爬取一次，
+回報 pages/s、items/s、p95 下載延遲與 pipeline 時間，方便比較不同設定、
+middleware 與 pipeline 的效能差異。爬取輸出寫到暫存目錄，不會影響 output/。
+
+用法：
+    python bench_tfc_crawl.py                                    # 預設 20 頁 x 12 篇
+    python bench_tfc_crawl.py --pages 50 --latency 0.05 --error-rate 0.02
+    python bench_tfc_crawl.py -s CONCURRENT_REQUESTS=16 -s AUTOTHROTTLE_ENABLED=False
+    python bench_tfc_crawl.py --json bench_result.json           # 另存結果供比較
+    python bench_tfc_crawl.py --workdir /tmp/tfc_bench --port 8765   # 重複執行以測量重新爬取
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, script_dir)
+sys.path.insert(0, os.path.join(script_dir, 'benchmarks'))
+os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'factchecker_crawlers.settings')
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from factchecker_crawlers.spiders.tfc_spider import TfcSpiderSpider
+from mock_tfc_site import MockTFCSite
+
+
+def percentile(values, percent):
+    """計算百分位數（最近排名法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TFC 爬取效能測試')
+    parser.add_argument('--pages', type=int, default=20, help='列表頁數 (預設: 20)')
+    parser.add_argument('--per-page', type=int, default=12, help='每頁文章數 (預設: 12)')
+    parser.add_argument('--latency', type=float, default=0.0, help='模擬網站的固定回應延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.0, help='模擬網站的額外隨機延遲上限秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='模擬網站回傳 503 的機率')
+    parser.add_argument('--corpus', help='錄製的文章 HTML 目錄（預設使用合成文章）')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='NAME=VALUE',
+                        help='覆寫 Scrapy 設定，可重複指定')
+    parser.add_argument('--port', type=int, default=0, help='模擬網站埠號（預設隨機；重新爬取測試需固定）')
+    parser.add_argument('--workdir', help='輸出目錄（預設為新的暫存目錄；重複使用可測量重新爬取）')
+    parser.add_argument('--json', help='將結果另存為 JSON 檔')
+    args = parser.parse_args()
+
+    site = MockTFCSite(
+        port=args.port, pages=args.pages, per_page=args.per_page, latency=args.latency,
+        jitter=args.jitter, error_rate=args.error_rate,
+        corpus_dir=os.path.abspath(args.corpus) if args.corpus else None
+    ).start()
+
+    settings = get_project_settings()
+    settings.set('LOG_FILE', None)
+    settings.set('LOG_STDOUT', False)
+    settings.set('LOG_LEVEL', 'WARNING')
+    pipelines = dict(settings.getdict('ITEM_PIPELINES'))
+    pipelines['crawl_timing.BenchmarkPipelineStart'] = 0
+    pipelines['crawl_timing.BenchmarkPipelineEnd'] = 10000
+    settings.set('ITEM_PIPELINES', pipelines)
+    for override in args.set:
+        name, _, value = override.partition('=')
+        settings.set(name, value)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    # 輸出寫到暫存目錄
+    if args.workdir:
+        workdir = os.path.abspath(args.workdir)
+        os.makedirs(workdir, exist_ok=True)
+    else:
+        workdir = tempfile.mkdtemp(prefix='tfc_bench_')
+    os.chdir(workdir)
+
+    # 在 downloader middleware 處理前計數：重新驗證略過的 304 與未變更的文章不會觸發 response_received
+    download_latencies = []
+    downloaded = []
+
+    def on_response(response, request, spider):
+        downloaded.append(response.status)
+        if 'download_latency' in request.meta:
+            download_latencies.append(request.meta['download_latency'])
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(TfcSpiderSpider)
+    crawler.signals.connect(on_response, signal=signals.response_downloaded)
+    process.crawl(crawler, base_url=site.base_url)
+    process.start()
+    site.stop()
+
+    stats = crawler.stats.get_stats()
+    elapsed = stats.get('elapsed_time_seconds') or 0.0
+    responses = len(downloaded)
+    items = stats.get('item_scraped_count', 0)
+    pipeline_seconds = stats.get('benchmark/pipeline_seconds', 0.0)
+
+    result = {
+        'pages': args.pages,
+        'per_page': args.per_page,
+        'latency': args.latency,
+        'error_rate': args.error_rate,
+        'settings': args.set,
+        'elapsed_seconds': round(elapsed, 3),
+        'responses': responses,
+        'items': items,
+        'pages_per_second': round(responses / elapsed, 2) if elapsed else 0.0,
+        'items_per_second': round(items / elapsed, 2) if elapsed else 0.0,
+        'download_latency_p50': round(percentile(download_latencies, 50), 4),
+        'download_latency_p95': round(percentile(download_latencies, 95), 4),
+        'pipeline_seconds': round(pipeline_seconds, 4),
+        'pipeline_ms_per_item': round(pipeline_seconds / items * 1000, 3) if items else 0.0,
+        'retries': stats.get('retry/count', 0),
+        'output_dir': workdir
+    }
+
+    print("=== 爬取效能測試結果 ===")
+    print(f"耗時: {result['elapsed_seconds']} 秒")
+    print(f"頁面: {responses}（{result['pages_per_second']} pages/s）")
+    print(f"資料: {items}（{result['items_per_second']} items/s）")
+    print(f"下載延遲: p50 {result['download_latency_p50']} 秒，p95 {result['download_latency_p95']} 秒")
+    print(f"Pipeline: 共 {result['pipeline_seconds']} 秒，平均 {result['pipeline_ms_per_item']} ms/筆")
+    print(f"重試次數: {result['retries']}")
+    print(f"輸出目錄: {workdir}")
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
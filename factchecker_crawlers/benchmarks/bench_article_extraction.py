@@ -0,0 +1,86 @@
+"""
+文章內文提取效能測試
+
+比較 CSS selector 版本（extract_content / extract_classification）與 lxml 快速路徑
+（extract_content_fast / extract_classification_fast），確認輸出完全相同並回報每篇文章的 CPU 時間。
+HTML 解析（建立 lxml 樹）在計時前完成，兩者只比較提取本身。
+
+用法（於 factchecker_crawlers/ 目錄下執行）：
+    python benchmarks/bench_article_extraction.py --corpus <存放文章 HTML 的目錄> [--repeat 5]
+
+沒有錄製的文章時，可用 python benchmarks/mock_tfc_site.py --dump corpus/ 產生合成文章。
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy.http import HtmlResponse
+
+from factchecker_crawlers.article_parser import (
+    extract_classification,
+    extract_classification_fast,
+    extract_content,
+    extract_content_fast,
+)
+
+
+def load_corpus(corpus_dir):
+    """載入文章 HTML 並預先建立 lxml 樹"""
+    responses = []
+    for path in sorted(Path(corpus_dir).rglob('*.html')):
+        response = HtmlResponse(
+            url=f"https://tfc-taiwan.org.tw/fact-check-reports/{path.stem}/",
+            body=path.read_bytes(),
+            encoding='utf-8'
+        )
+        response.selector  # 預先解析
+        responses.append(response)
+    return responses
+
+
+def run(extract_text, classify, responses, repeat):
+    """執行 repeat 輪提取，回傳每篇文章平均 CPU 微秒數"""
+    start = time.process_time()
+    for _ in range(repeat):
+        for response in responses:
+            extract_text(response)
+            classify(response)
+    elapsed = time.process_time() - start
+    return elapsed / (len(responses) * repeat) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文章內文提取效能測試')
+    parser.add_argument('--corpus', required=True, help='存放文章 HTML 的目錄')
+    parser.add_argument('--repeat', type=int, default=5, help='重複執行次數 (預設: 5)')
+    args = parser.parse_args()
+
+    responses = load_corpus(args.corpus)
+    if not responses:
+        print(f"錯誤：{args.corpus} 中沒有 HTML 檔案")
+        sys.exit(1)
+
+    # 確認輸出完全相同
+    mismatches = 0
+    for response in responses:
+        if (extract_content(response) != extract_content_fast(response)
+                or extract_classification(response) != extract_classification_fast(response)):
+            mismatches += 1
+    print(f"文章數: {len(responses)}，輸出不一致: {mismatches}")
+
+    selector_us = run(extract_content, extract_classification, responses, args.repeat)
+    fast_us = run(extract_content_fast, extract_classification_fast, responses, args.repeat)
+
+    print(f"CSS selector 版本: {selector_us:10.1f} µs/篇")
+    print(f"lxml 快速路徑:     {fast_us:10.1f} µs/篇（節省 {(1 - fast_us / selector_us) * 100:.1f}%）")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
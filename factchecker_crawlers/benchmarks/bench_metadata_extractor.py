@@ -0,0 +1,296 @@
+"""
+metadata 解析效能測試
+
+比較原本逐一 re.search / re.sub 的解析方式（LegacyMetadataParser，保留原始實作供對照）
+與 factchecker_crawlers.tfc_metadata 的預編譯版本，確認兩者輸出完全相同並回報每秒處理文章數。
+
+用法（於 factchecker_crawlers/ 目錄下執行）：
+    python benchmarks/bench_metadata_extractor.py --corpus <存放文章 HTML 的目錄> [--repeat 5]
+
+沒有錄製的文章時，可用 python benchmarks/mock_tfc_site.py --dump corpus/ 產生合成文章。
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy.http import HtmlResponse
+
+from factchecker_crawlers.article_parser import extract_content, extract_title
+from factchecker_crawlers.tfc_metadata import parse_content_metadata
+
+
+class LegacyMetadataParser:
+    """原本 TfcSpiderSpider 內的 metadata 解析實作"""
+
+    logger = logging.getLogger('legacy_metadata')
+
+    def parse(self, content, title):
+        self._current_title = title
+        return self._parse_content_metadata(content)
+
+    def _parse_content_metadata(self, content):
+        """從content中解析metadata並提取純內容"""
+        
+        result = {
+            'check_result': '',
+            'publish_date': '',
+            'update_date': '',
+            'categories': [],
+            'report_number': '',
+            'reporter': '',
+            'editor': '',
+            'processed_content': content
+        }
+        
+        if not content:
+            return result
+        
+        # 預處理：找到文章正文起始位置
+        result['processed_content'] = self._extract_article_content(content)
+        
+        # 嘗試不同的 metadata 模式匹配，按優先順序
+        patterns = [
+            # 模式1: 完整的舊版格式
+            {
+                'name': 'legacy_complete',
+                'pattern': r'(錯誤|部分錯誤|事實釐清|正確)\s+(.*?)\s+發佈：?\s*(\d{4}-\d{2}-\d{2})\s*(?:更新：?\s*(\d{4}-\d{2}-\d{2}))?\s*報告編號\s*：?\s*(\d+)\s*(?:查核)?記者：?\s*([^責]+?)\s*責任編輯：?\s*([^\s內容背景查核]+)',
+                'groups': {
+                    'check_result': 1, 'categories': 2, 'publish_date': 3, 
+                    'update_date': 4, 'report_number': 5, 'reporter': 6, 'editor': 7
+                }
+            },
+            # 模式2: 新版格式（含更新版本）
+            {
+                'name': 'new_format_with_update',
+                'pattern': r'事實查核報告#(\d+)\s+【([^】]+)】.*?發布日期／(\d{4}-\d{2}-\d{2})\s+\d{2}:\d{2}:\d{2}\s+【報告將隨時更新\s+(\d{4}/\d{2}/\d{2})版】',
+                'groups': {
+                    'report_number': 1, 'check_result': 2, 'publish_date': 3, 'update_date': 4
+                }
+            },
+            # 模式3: 舊版事實查核報告格式
+            {
+                'name': 'old_fact_check_format',
+                'pattern': r'事實查核報告#(\d+)\s+【([^】]+)】[^發]*?發布日期／(\d{4}-\d{2}-\d{2})\s+\d{2}:\d{2}:\d{2}',
+                'groups': {
+                    'report_number': 1, 'check_result': 2, 'publish_date': 3
+                }
+            }
+        ]
+        
+        # 嘗試匹配完整格式
+        matched = False
+        for pattern_info in patterns:
+            match = re.search(pattern_info['pattern'], content)
+            if match:
+                self._extract_from_match(result, match, pattern_info['groups'])
+                matched = True
+                
+                # 特殊處理：更新日期格式轉換
+                if pattern_info['name'] == 'new_format_with_update' and result['update_date']:
+                    result['update_date'] = result['update_date'].replace('/', '-')
+                
+                # 如果沒有更新日期，使用發布日期
+                if not result['update_date'] and result['publish_date']:
+                    result['update_date'] = result['publish_date']
+                
+                break
+        
+        # 如果沒有匹配到完整格式，逐個提取字段
+        if not matched:
+            self._extract_individual_fields(result, content)
+        
+        # 如果仍然沒有分類結果，從標題中提取（針對 migration 文章）
+        if not result['check_result']:
+            result['check_result'] = self._extract_from_title()
+        
+        # 統一處理分類重新歸類
+        result['check_result'] = self._normalize_classification(result['check_result'])
+        
+        # 清理處理後的內容
+        result['processed_content'] = self._clean_processed_content(result['processed_content'])
+        
+        return result
+    
+    def _extract_article_content(self, content):
+        """提取文章正文內容"""
+        # 尋找分享按鈕位置作為文章起始點
+        share_pattern = r'Share on Facebook Share on Threads Share on Pinterest Share on LINE Email this Page Print this Page\s*'
+        share_match = re.search(share_pattern, content)
+        
+        if share_match:
+            return content[share_match.end():].strip()
+        return content
+    
+    def _extract_from_match(self, result, match, groups):
+        """從正則匹配結果中提取數據"""
+        for field, group_index in groups.items():
+            if group_index <= len(match.groups()) and match.group(group_index):
+                value = match.group(group_index).strip()
+                
+                if field == 'categories':
+                    result[field] = [value]
+                elif field == 'reporter':
+                    result[field] = value.rstrip('、')
+                else:
+                    result[field] = value
+    
+    def _extract_individual_fields(self, result, content):
+        """逐個提取各個字段"""
+        # 提取分類
+        class_patterns = [
+            r'【(錯誤|部分錯誤|事實釐清|正確|易生誤解|證據不足)】',  # 從標題格式
+            r'(?:^|\s)(錯誤|部分錯誤|事實釐清|正確|易生誤解|證據不足)(?:\s|$)'  # 從內容前1000字符
+        ]
+        
+        for pattern in class_patterns:
+            search_content = content[:1000] if '(?:^|\\s)' in pattern else content
+            match = re.search(pattern, search_content)
+            if match:
+                result['check_result'] = match.group(1)
+                break
+        
+        # 提取日期
+        date_patterns = [
+            r'發佈：?\s*(\d{4}-\d{2}-\d{2})',
+            r'發布日期／(\d{4}-\d{2}-\d{2})'
+        ]
+        
+        for pattern in date_patterns:
+            match = re.search(pattern, content)
+            if match:
+                result['publish_date'] = match.group(1)
+                break
+        
+        # 提取更新日期
+        update_match = re.search(r'更新：?\s*(\d{4}-\d{2}-\d{2})', content)
+        if update_match:
+            result['update_date'] = update_match.group(1)
+        elif result['publish_date']:
+            result['update_date'] = result['publish_date']
+        
+        # 提取報告編號
+        report_patterns = [
+            r'事實查核報告#(\d+)',
+            r'報告編號\s*：?\s*(\d+)'
+        ]
+        
+        for pattern in report_patterns:
+            match = re.search(pattern, content)
+            if match:
+                result['report_number'] = match.group(1)
+                break
+        
+        # 提取記者和編輯信息
+        # 嘗試括號格式
+        reporter_editor_match = re.search(r'（記者：([^；]+)；責任編輯：([^）]+)）', content)
+        if reporter_editor_match:
+            result['reporter'] = reporter_editor_match.group(1).strip()
+            result['editor'] = reporter_editor_match.group(2).strip()
+        else:
+            # 分別提取
+            reporter_match = re.search(r'(?:查核)?記者：?\s*([^責任編輯]+?)(?:\s*責任編輯|$)', content)
+            if reporter_match:
+                result['reporter'] = reporter_match.group(1).strip().rstrip('、')
+            
+            editor_match = re.search(r'責任編輯：?\s*([^\s內容背景查核]+)', content)
+            if editor_match:
+                result['editor'] = editor_match.group(1).strip()
+    
+    def _extract_from_title(self):
+        """從標題中提取分類（針對 migration 文章）"""
+        if hasattr(self, '_current_title') and self._current_title:
+            title_match = re.search(r'【(錯誤|部分錯誤|事實釐清|正確|易生誤解|證據不足)】', self._current_title)
+            if title_match:
+                self.logger.info(f"從標題中提取到分類: {title_match.group(1)}")
+                return title_match.group(1)
+        return ''
+    
+    def _normalize_classification(self, classification):
+        """統一處理分類標準化"""
+        if classification == '易生誤解':
+            return '錯誤'
+        return classification
+    
+    def _clean_processed_content(self, content):
+        """清理處理後的內容，移除 metadata"""
+        # 移除各種 metadata 格式
+        cleanup_patterns = [
+            r'【報告將隨時更新[^】]*】\s*',
+            r'^事實查核報告#\d+\s+.*?發布日期／\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*',
+            r'^【[^】]+】.*?發布日期／\d{4}-\d{2}-\d{2}.*$',
+            r'事實查核報告#\d+\s+【[^】]+】[^【]*【報告將隨時更新[^】]*】\s*',
+            r'事實查核報告#\d+\s+【[^】]+】[^一二三四五六七八九十]*?發布日期／\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*'
+        ]
+        
+        for pattern in cleanup_patterns:
+            if '^' in pattern:
+                content = re.sub(pattern, '', content, flags=re.MULTILINE)
+            else:
+                content = re.sub(pattern, '', content, flags=re.MULTILINE | re.DOTALL)
+        
+        return content.strip()
+
+
+def load_corpus(corpus_dir):
+    """載入文章 HTML，並以爬蟲相同的方式取出標題與內文"""
+    articles = []
+    for path in sorted(Path(corpus_dir).rglob('*.html')):
+        response = HtmlResponse(
+            url=f"https://tfc-taiwan.org.tw/fact-check-reports/{path.stem}/",
+            body=path.read_bytes(),
+            encoding='utf-8'
+        )
+        articles.append((extract_content(response), extract_title(response)))
+    return articles
+
+
+def run(parse, articles, repeat):
+    """執行 repeat 輪解析，回傳每秒處理文章數"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for content, title in articles:
+            parse(content, title)
+    elapsed = time.perf_counter() - start
+    return len(articles) * repeat / elapsed if elapsed > 0 else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='metadata 解析效能測試')
+    parser.add_argument('--corpus', required=True, help='存放文章 HTML 的目錄')
+    parser.add_argument('--repeat', type=int, default=5, help='重複執行次數 (預設: 5)')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    articles = load_corpus(args.corpus)
+    if not articles:
+        print(f"錯誤：{args.corpus} 中沒有 HTML 檔案")
+        sys.exit(1)
+
+    legacy = LegacyMetadataParser()
+
+    # 確認輸出完全相同
+    mismatches = 0
+    for content, title in articles:
+        if legacy.parse(content, title) != parse_content_metadata(content, title):
+            mismatches += 1
+    print(f"文章數: {len(articles)}，輸出不一致: {mismatches}")
+
+    legacy_rate = run(legacy.parse, articles, args.repeat)
+    compiled_rate = run(parse_content_metadata, articles, args.repeat)
+
+    print(f"原始版本:   {legacy_rate:10.1f} 篇/秒")
+    print(f"預編譯版本: {compiled_rate:10.1f} 篇/秒 ({compiled_rate / legacy_rate:.2f}x)")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+效能測試用的計時 pipeline
+
+BenchmarkPipelineStart 與 BenchmarkPipelineEnd 分別排在所有 pipeline 的最前與最後，
+兩者之間的時間即為專案 pipeline 處理每筆資料的時間，累計到 stats 的
+benchmark/pipeline_seconds。
+"""
+import time
+
+
+class BenchmarkPipelineStart:
+    started = {}
+
+    def process_item(self, item, spider):
+        self.started[id(item)] = time.perf_counter()
+        return item
+
+
+class BenchmarkPipelineEnd:
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_item(self, item, spider):
+        started = BenchmarkPipelineStart.started.pop(id(item), None)
+        if started is not None:
+            self.stats.inc_value('benchmark/pipeline_seconds', time.perf_counter() - started)
+            self.stats.inc_value('benchmark/pipeline_items')
+        return item
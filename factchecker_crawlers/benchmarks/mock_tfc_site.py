@@ -0,0 +1,195 @@
+"""
+本機 TFC 模擬網站
+
+提供與 tfc-taiwan.org.tw 相同結構的列表頁（li.kb-query-item、data-max-num-pages）
+與文章頁（附 ETag 並支援 If-None-Match），可設定回應延遲與錯誤率，
+用來在不連線到正式網站的情況下測量爬取效能。
+
+文章頁優先使用錄製下來的 HTML（--corpus 目錄下的 *.html，依序輪流提供），
+沒有錄製資料時則產生格式相同的合成文章。
+
+用法（於 factchecker_crawlers/ 目錄下執行）：
+    python benchmarks/mock_tfc_site.py --port 8765 --pages 20 --latency 0.05 --error-rate 0.01
+    python benchmarks/mock_tfc_site.py --dump corpus/ --articles 300   # 輸出合成文章供其他效能測試使用
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+SHARE_TEXT = 'Share on Facebook Share on Threads Share on Pinterest Share on LINE Email this Page Print this Page'
+CHECK_RESULTS = ['錯誤', '部分錯誤', '事實釐清', '正確']
+
+
+def render_listing(page, max_pages, per_page):
+    """產生列表頁 HTML"""
+    items = []
+    for index in range(per_page):
+        article_id = (page - 1) * per_page + index
+        items.append(
+            f'<li class="kb-query-item"><a class="kb-section-link-overlay" '
+            f'href="/fact-check-reports/report-{article_id}/">報告 {article_id}</a></li>'
+        )
+    return (
+        '<html><head><title>事實查核報告 - 看見真實，才能打造美好台灣</title></head><body>'
+        f'<div class="kb-query" data-max-num-pages="{max_pages}"><ul>{"".join(items)}</ul></div>'
+        '</body></html>'
+    )
+
+
+def render_article(article_id):
+    """產生格式與新版 TFC 文章相同的合成文章 HTML"""
+    rng = random.Random(article_id)
+    check_result = CHECK_RESULTS[article_id % len(CHECK_RESULTS)]
+    report_number = 10000 + article_id
+    paragraphs = ''.join(
+        f'<p>{"網傳訊息指出相關說法，經查證後發現與事實不符。" * rng.randint(3, 12)}</p>'
+        for _ in range(rng.randint(8, 20))
+    )
+    return (
+        f'<html><head><title>【{check_result}】合成報告 {article_id} - 看見真實，才能打造美好台灣</title></head>'
+        f'<body class="single single-post {check_result}">'
+        '<div class="post-content">'
+        f'<p>{SHARE_TEXT}</p>'
+        f'<p>事實查核報告#{report_number} 【{check_result}】 網傳訊息 '
+        f'發布日期／2024-{article_id % 12 + 1:02d}-{article_id % 28 + 1:02d} 10:00:00 '
+        f'【報告將隨時更新 2024/{article_id % 12 + 1:02d}/{article_id % 28 + 1:02d}版】</p>'
+        '<script>window.dataLayer = [];</script><style>.post-content { color: #333; }</style>'
+        f'<h2>一、背景</h2>{paragraphs}'
+        '<p>（記者：王小明；責任編輯：陳大華）</p>'
+        '</div>'
+        '<div class="entry-taxonomies"><span class="category-links"><a>國際</a></span></div>'
+        '</body></html>'
+    )
+
+
+class MockTFCSite:
+    """以背景執行緒提供模擬網站"""
+
+    def __init__(self, host='127.0.0.1', port=0, pages=20, per_page=12,
+                 latency=0.0, jitter=0.0, error_rate=0.0, corpus_dir=None, seed=0):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.corpus = [path.read_bytes() for path in sorted(Path(corpus_dir).rglob('*.html'))] if corpus_dir else []
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                # 模擬網路與伺服器延遲
+                delay = site.latency + site.jitter * site._random()
+                if delay > 0:
+                    time.sleep(delay)
+
+                parsed = urlparse(self.path)
+                if parsed.path == '/robots.txt':
+                    return self._send(200, b'User-agent: *\nAllow: /\n', 'text/plain')
+
+                if site.error_rate and site._random() < site.error_rate:
+                    return self._send(503, b'Service Unavailable', 'text/plain')
+
+                if parsed.path.rstrip('/') == '/fact-check-reports-all':
+                    page = int(parse_qs(parsed.query).get('pg', ['1'])[0])
+                    if page > site.pages:
+                        return self._send(404, b'Not Found', 'text/plain')
+                    return self._send(200, render_listing(page, site.pages, site.per_page).encode('utf-8'))
+
+                if parsed.path.startswith('/fact-check-reports/report-'):
+                    article_id = int(parsed.path.rstrip('/').rsplit('-', 1)[1])
+                    if site.corpus:
+                        body = site.corpus[article_id % len(site.corpus)]
+                    else:
+                        body = render_article(article_id).encode('utf-8')
+                    # 支援條件式請求
+                    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        return self._send(304, b'', etag=etag)
+                    return self._send(200, body, etag=etag)
+
+                return self._send(404, b'Not Found', 'text/plain')
+
+            def _send(self, status, body, content_type='text/html; charset=utf-8', etag=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def dump_corpus(output_dir, articles):
+    """將合成文章寫成 HTML 檔"""
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    for article_id in range(articles):
+        Path(output_dir, f"report-{article_id}.html").write_text(render_article(article_id), encoding='utf-8')
+    print(f"已輸出 {articles} 篇合成文章到 {output_dir}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本機 TFC 模擬網站')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--pages', type=int, default=20, help='列表頁數 (預設: 20)')
+    parser.add_argument('--per-page', type=int, default=12, help='每頁文章數 (預設: 12)')
+    parser.add_argument('--latency', type=float, default=0.0, help='固定回應延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.0, help='額外隨機延遲上限秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='回傳 503 的機率')
+    parser.add_argument('--corpus', help='錄製的文章 HTML 目錄')
+    parser.add_argument('--dump', help='輸出合成文章到此目錄後結束')
+    parser.add_argument('--articles', type=int, default=300, help='--dump 輸出的文章數 (預設: 300)')
+    args = parser.parse_args()
+
+    if args.dump:
+        dump_corpus(args.dump, args.articles)
+        return
+
+    site = MockTFCSite(
+        host=args.host, port=args.port, pages=args.pages, per_page=args.per_page,
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, corpus_dir=args.corpus
+    )
+    print(f"模擬網站已啟動: {site.base_url}（Ctrl+C 結束）")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
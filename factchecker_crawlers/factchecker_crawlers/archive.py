@@ -0,0 +1,170 @@
+# 原始回應封存（WARC）
+#
+# 文章頁的原始 HTTP 回應以 WARC/1.0 格式封存，每筆紀錄各自壓縮成一個 gzip member
+# （與一般 .warc.gz 相同），可以直接串接，也能用現有的 WARC 工具讀取。
+# 中斷時最多只損失最後一筆寫到一半的紀錄。
+#
+# 修改解析邏輯後，用 reparse.py 對封存重新解析即可產生新的語料，不必重新爬取。
+
+import gzip
+import os
+import uuid
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+
+WARC_VERSION = b'WARC/1.0'
+
+# 回應內容已由 Scrapy 解壓縮，這些標頭不再符合封存的內容
+SKIPPED_HTTP_HEADERS = {b'content-encoding', b'transfer-encoding', b'content-length'}
+
+
+def _warc_date():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _warc_record(warc_type, headers, block):
+    """組合一筆 WARC 紀錄（未壓縮）"""
+    lines = [WARC_VERSION, f'WARC-Type: {warc_type}'.encode()]
+    lines += [f'{name}: {value}'.encode('utf-8') for name, value in headers]
+    lines.append(f'Content-Length: {len(block)}'.encode())
+    return b'\r\n'.join(lines) + b'\r\n\r\n' + block + b'\r\n\r\n'
+
+
+def http_response_block(status, headers, body):
+    """
+    由狀態碼、標頭與內容重建 HTTP 回應區塊
+
+    Args:
+        status: HTTP 狀態碼
+        headers: (名稱, 值) 的列表，名稱與值皆為 bytes
+        body: 回應內容（已解壓縮）
+    """
+    lines = [f'HTTP/1.1 {status} {HTTP_REASONS.get(status, "")}'.strip().encode()]
+    for name, value in headers:
+        if name.lower() not in SKIPPED_HTTP_HEADERS:
+            lines.append(name + b': ' + value)
+    lines.append(f'Content-Length: {len(body)}'.encode())
+    return b'\r\n'.join(lines) + b'\r\n\r\n' + body
+
+
+class WarcWriter:
+    """寫入 .warc.gz 封存檔，超過 max_size 時輪替新檔"""
+
+    def __init__(self, directory, prefix='tfc', max_size=1 << 30, compresslevel=6):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_size = max_size
+        self.compresslevel = compresslevel
+        self.count = 0
+        self.filename = None
+        self._file = None
+        self._file_index = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self):
+        self.close()
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        self.filename = os.path.join(self.directory, f"{self.prefix}-{timestamp}-{self._file_index:05d}.warc.gz")
+        self._file_index += 1
+        self._file = open(self.filename, 'ab')
+
+        info = b'software: factchecker_crawlers\r\nformat: WARC File Format 1.0\r\n'
+        self._write_member(_warc_record('warcinfo', [
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('WARC-Date', _warc_date()),
+            ('WARC-Filename', os.path.basename(self.filename)),
+            ('Content-Type', 'application/warc-fields'),
+        ], info))
+
+    def _write_member(self, record):
+        self._file.write(gzip.compress(record, compresslevel=self.compresslevel, mtime=0))
+
+    def write_response(self, url, status, headers, body):
+        """封存一筆 HTTP 回應"""
+        if self._file is None or self._file.tell() >= self.max_size:
+            self._open()
+
+        self._write_member(_warc_record('response', [
+            ('WARC-Record-ID', f'<urn:uuid:{uuid.uuid4()}>'),
+            ('WARC-Date', _warc_date()),
+            ('WARC-Target-URI', url),
+            ('Content-Type', 'application/http; msgtype=response'),
+        ], http_response_block(status, headers, body)))
+        self.count += 1
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _parse_http_block(block):
+    """拆解 HTTP 回應區塊為 (狀態碼, 標頭列表, 內容)"""
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.split(b'\r\n')
+    status = int(lines[0].split()[1])
+    headers = []
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers.append((name.strip(), value.strip()))
+    return status, headers, body
+
+
+def iter_warc_responses(filename):
+    """
+    依序讀取封存檔中的 response 紀錄
+
+    Yields:
+        dict: url、date、status、headers（(bytes, bytes) 列表）、body
+    """
+    with gzip.open(filename, 'rb') as f:
+        while True:
+            try:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                if line.rstrip() != WARC_VERSION:
+                    raise ValueError(f"{filename} 不是有效的 WARC 檔案")
+
+                warc_headers = {}
+                for header_line in iter(f.readline, b'\r\n'):
+                    if not header_line:
+                        raise EOFError
+                    name, _, value = header_line.decode('utf-8').partition(':')
+                    warc_headers[name.strip().lower()] = value.strip()
+
+                length = int(warc_headers['content-length'])
+                block = f.read(length)
+                if len(block) < length:
+                    raise EOFError
+            except EOFError:
+                # 爬蟲中斷時最後一筆紀錄可能不完整
+                return
+
+            if warc_headers.get('warc-type') != 'response':
+                continue
+
+            status, headers, body = _parse_http_block(block)
+            yield {
+                'url': warc_headers.get('warc-target-uri', ''),
+                'date': warc_headers.get('warc-date', ''),
+                'status': status,
+                'headers': headers,
+                'body': body,
+            }
+
+
+def list_archives(directory):
+    """依檔名（即寫入時間）排序列出封存檔"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith('.warc.gz')
+    )
@@ -0,0 +1,165 @@
+# TFC 文章頁解析
+#
+# 解析邏輯以模組層級函式實作、不依賴 spider 狀態，因此可以在 reactor 執行緒上
+# 直接呼叫，也可以交給 worker process / thread pool 執行（sources.parse_source_article），
+# 讓下載並行度與解析吞吐量分開擴展。
+#
+# 內文與查核結果預設走 lxml 快速路徑（extract_content_fast / extract_classification_fast），
+# 輸出與 CSS selector 版本（extract_content / extract_classification）完全相同，
+# 後者保留作為對照基準（benchmarks/bench_article_extraction.py）。
+
+from lxml import etree
+
+from .tfc_metadata import parse_content_metadata
+
+TITLE_SUFFIX = ' - 看見真實，才能打造美好台灣'
+
+CONTENT_SELECTORS = [
+    '.post-content',
+    '.single-content',
+]
+
+# 與 CSS selector 轉換後相同的預編譯 XPath
+CONTENT_XPATHS = [
+    etree.XPath(
+        f"descendant-or-self::*[@class and contains(concat(' ', normalize-space(@class), ' '), ' {selector[1:]} ')]"
+    )
+    for selector in CONTENT_SELECTORS
+]
+
+SKIPPED_TAGS = ('script', 'style')
+
+# 依優先順序判斷 body 內任一 class 屬性是否包含關鍵字
+CLASSIFICATION_XPATHS = [
+    (etree.XPath(f"boolean(descendant-or-self::body/descendant-or-self::*/@class[{condition}])"), label)
+    for condition, label in [
+        ("contains(., 'incorrect') or contains(., 'error')", '錯誤'),
+        ("contains(., 'partial')", '部分錯誤'),
+        ("contains(., 'clarification')", '事實釐清'),
+        ("contains(., 'correct')", '正確'),
+    ]
+]
+
+
+def extract_title(response):
+    """提取標題（移除網站名稱後綴）"""
+    title = response.css('title::text').get()
+    if title:
+        title = title.replace(TITLE_SUFFIX, '').strip()
+    return title.strip() if title else ''
+
+
+def extract_content(response):
+    """提取文章內文文字"""
+    content = ""
+    for selector in CONTENT_SELECTORS:
+        content_elem = response.css(selector)
+        if content_elem:
+            # 提取所有文字，移除script和style標籤
+            content = content_elem.css('*:not(script):not(style)::text').getall()
+            content = ' '.join([text.strip() for text in content if text.strip()])
+            break
+
+    return content
+
+
+def _collect_text(element, parts):
+    """
+    依文件順序收集 element 與其子孫元素的直接文字節點（略過 script / style），
+    等同 '*:not(script):not(style)::text'。註解節點本身略過，但其 tail 屬於父元素文字。
+    """
+    collect = element.tag not in SKIPPED_TAGS
+    if collect and element.text:
+        parts.append(element.text)
+    for child in element:
+        if isinstance(child.tag, str):
+            _collect_text(child, parts)
+        if collect and child.tail:
+            parts.append(child.tail)
+
+
+def extract_content_fast(response):
+    """提取文章內文文字：以 lxml 單次走訪內容節點，輸出與 extract_content 相同"""
+    root = response.selector.root
+    for xpath in CONTENT_XPATHS:
+        elements = xpath(root)
+        if elements:
+            parts = []
+            for element in elements:
+                _collect_text(element, parts)
+            return ' '.join([text.strip() for text in parts if text.strip()])
+
+    return ""
+
+
+def extract_classification(response):
+    """從頁面的 class 屬性推斷查核結果"""
+    classes = response.css('body ::attr(class)').getall()
+    all_classes = ' '.join(classes)
+
+    if 'incorrect' in all_classes or 'error' in all_classes:
+        return '錯誤'
+    elif 'partial' in all_classes:
+        return '部分錯誤'
+    elif 'clarification' in all_classes:
+        return '事實釐清'
+    elif 'correct' in all_classes:
+        return '正確'
+
+    return ''
+
+
+def extract_classification_fast(response):
+    """從頁面的 class 屬性推斷查核結果：直接在 lxml 中比對，不組合字串"""
+    root = response.selector.root
+    for xpath, label in CLASSIFICATION_XPATHS:
+        if xpath(root):
+            return label
+
+    return ''
+
+
+def parse_article_fields(response):
+    """解析文章頁，回傳 FactCheckReportItem 的所有欄位"""
+    fields = {
+        'content_url': response.url,
+        'source': 'TFC',
+        'title': extract_title(response),
+    }
+
+    # 內容
+    content = extract_content_fast(response)
+
+    # 從content中解析metadata並提取內容
+    parsed_data = parse_content_metadata(content, fields['title'])
+
+    fields['content'] = content  # 保留原始內容
+    fields['processed_content'] = parsed_data['processed_content']  # 純內容
+
+    # 查核結果
+    fields['check_result'] = parsed_data['check_result'] or extract_classification_fast(response)
+
+    # 發布日期和更新日期
+    fields['publish_date'] = parsed_data['publish_date']
+    fields['update_date'] = parsed_data['update_date']
+
+    # 分類標籤
+    categories = parsed_data['categories']
+    if not categories:
+        category_links = response.css('.entry-taxonomies .category-links a::text').getall()
+        categories = [cat.strip() for cat in category_links if cat.strip()]
+
+    # 如果分類是"未勾選屬性"，設置為空
+    if categories and len(categories) == 1 and categories[0] == "未勾選屬性":
+        categories = []
+
+    fields['categories'] = categories
+
+    # 報告編號
+    fields['report_number'] = parsed_data['report_number']
+
+    # 記者和編輯信息
+    fields['reporter'] = parsed_data['reporter']
+    fields['editor'] = parsed_data['editor']
+
+    return fields
@@ -0,0 +1,232 @@
+# 壓縮分片語料格式
+#
+# 報告以壓縮 JSONL 分片輸出（預設 gzip，安裝 zstandard 時可選 zstd），每行一筆、依報告編號
+# 由新到舊排列。與 processed_content 幾乎相同的原始 content 另存於選用的 sidecar 分片，
+# 與報告分片一一對應、逐行對齊，並以報告鍵（report_number，沒有編號時為網址）標示。
+#
+# corpus/
+#     manifest.json
+#     reports-00000.jsonl.gz      # 不含 content 的報告
+#     content-00000.jsonl.gz      # {"report_key": ..., "content": ...}
+#
+# 也可當作命令列工具轉換既有的輸出檔：
+#     python -m factchecker_crawlers.corpus output/tfc_reports_sorted.json output/corpus
+
+import argparse
+import gzip
+import io
+import json
+import os
+import shutil
+
+from .exporters import iter_report_records
+from .storage import report_key
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CORPUS_FORMAT = 'tfc-corpus'
+CORPUS_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+
+COMPRESSION_SUFFIXES = {
+    'gzip': '.jsonl.gz',
+    'zstd': '.jsonl.zst',
+}
+
+
+def open_compressed(filename, mode, compression, level=None):
+    """以文字模式開啟壓縮檔（mode 為 'r' 或 'w'）"""
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstd 壓縮需要安裝 zstandard 套件")
+        if mode == 'w':
+            compressor = zstandard.ZstdCompressor(level=level or 10)
+            return zstandard.open(filename, 'wt', cctx=compressor, encoding='utf-8')
+        return zstandard.open(filename, 'rt', encoding='utf-8')
+
+    if mode == 'w':
+        # mtime=0 讓相同內容產生相同的壓縮檔
+        raw = gzip.GzipFile(filename, 'wb', compresslevel=level or 6, mtime=0)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    return io.TextIOWrapper(gzip.GzipFile(filename, 'rb'), encoding='utf-8')
+
+
+class CorpusWriter:
+    """依分片大小輪替寫入報告分片與 content sidecar"""
+
+    def __init__(self, corpus_dir, shard_size=5000, compression='gzip', content_sidecar=True, level=None):
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"不支援的壓縮格式: {compression}")
+        self.corpus_dir = corpus_dir
+        self.shard_size = max(1, shard_size)
+        self.compression = compression
+        self.content_sidecar = content_sidecar
+        self.level = level
+        self.shards = []
+        self.content_shards = []
+        self.count = 0
+        self._reports_file = None
+        self._content_file = None
+        self._shard_count = 0
+        os.makedirs(corpus_dir, exist_ok=True)
+
+    def _open_shard(self):
+        self._close_shard()
+        index = len(self.shards)
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+
+        filename = f"reports-{index:05d}{suffix}"
+        self._reports_file = open_compressed(os.path.join(self.corpus_dir, filename), 'w', self.compression, self.level)
+        self.shards.append({'file': filename, 'count': 0})
+
+        if self.content_sidecar:
+            filename = f"content-{index:05d}{suffix}"
+            self._content_file = open_compressed(os.path.join(self.corpus_dir, filename), 'w', self.compression, self.level)
+            self.content_shards.append({'file': filename, 'count': 0})
+        self._shard_count = 0
+
+    def _close_shard(self):
+        for f in (self._reports_file, self._content_file):
+            if f is not None:
+                f.close()
+        self._reports_file = None
+        self._content_file = None
+
+    def write(self, record):
+        if self._reports_file is None or self._shard_count >= self.shard_size:
+            self._open_shard()
+
+        record = dict(record)
+        content = record.pop('content', '')
+        self._reports_file.write(json.dumps(record, ensure_ascii=False))
+        self._reports_file.write('\n')
+        self.shards[-1]['count'] += 1
+
+        if self.content_sidecar:
+            self._content_file.write(json.dumps({'report_key': report_key(record), 'content': content}, ensure_ascii=False))
+            self._content_file.write('\n')
+            self.content_shards[-1]['count'] += 1
+
+        self._shard_count += 1
+        self.count += 1
+
+    def close(self):
+        """關閉分片並寫出 manifest"""
+        self._close_shard()
+        manifest = {
+            'format': CORPUS_FORMAT,
+            'version': CORPUS_VERSION,
+            'compression': self.compression,
+            'count': self.count,
+            'shards': self.shards,
+            'content_shards': self.content_shards if self.content_sidecar else None,
+        }
+        with open(os.path.join(self.corpus_dir, MANIFEST_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+def write_corpus(records, corpus_dir, shard_size=5000, compression='gzip', content_sidecar=True, level=None):
+    """
+    將報告寫成壓縮分片語料
+
+    先寫到暫存目錄，完成後將舊語料改名移開、暫存目錄改名為語料目錄，最後才刪除舊語料。
+    讀取端不會看到寫到一半的分片；兩次改名之間語料目錄短暫不存在，
+    若在此時中斷，下次寫入前會先把移開的舊語料放回原位。
+
+    Returns:
+        寫入的資料筆數
+    """
+    base_dir = corpus_dir.rstrip('/\\')
+    tmp_dir = base_dir + '.tmp'
+    old_dir = base_dir + '.old'
+    if os.path.exists(old_dir):
+        if os.path.exists(corpus_dir):
+            shutil.rmtree(old_dir)
+        else:
+            os.replace(old_dir, corpus_dir)
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    writer = CorpusWriter(tmp_dir, shard_size=shard_size, compression=compression,
+                          content_sidecar=content_sidecar, level=level)
+    try:
+        for record in records:
+            writer.write(record)
+        manifest = writer.close()
+    except Exception:
+        writer._close_shard()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if os.path.exists(corpus_dir):
+        os.replace(corpus_dir, old_dir)
+    os.replace(tmp_dir, corpus_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest['count']
+
+
+def load_manifest(corpus_dir):
+    with open(os.path.join(corpus_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != CORPUS_FORMAT:
+        raise ValueError(f"{corpus_dir} 不是 TFC 語料目錄")
+    return manifest
+
+
+def iter_corpus(corpus_dir, include_content=False):
+    """依序讀取語料中的報告；include_content 時由 sidecar 補回 content"""
+    manifest = load_manifest(corpus_dir)
+    compression = manifest['compression']
+    content_shards = manifest.get('content_shards') or []
+    if include_content and not content_shards:
+        raise ValueError(f"{corpus_dir} 沒有 content sidecar")
+
+    for index, shard in enumerate(manifest['shards']):
+        with open_compressed(os.path.join(corpus_dir, shard['file']), 'r', compression) as reports:
+            if not include_content:
+                for line in reports:
+                    yield json.loads(line)
+                continue
+
+            with open_compressed(os.path.join(corpus_dir, content_shards[index]['file']), 'r', compression) as contents:
+                for line, content_line in zip(reports, contents):
+                    record = json.loads(line)
+                    content = json.loads(content_line)
+                    if content['report_key'] != report_key(record):
+                        raise ValueError(f"content sidecar 與報告分片未對齊: {shard['file']}")
+                    record['content'] = content['content']
+                    yield record
+
+
+def _directory_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='將報告輸出檔轉換為壓縮分片語料')
+    parser.add_argument('source', help='來源檔案（JSON 陣列或 JSONL）')
+    parser.add_argument('corpus_dir', help='輸出語料目錄')
+    parser.add_argument('--shard-size', type=int, default=5000, help='每個分片的筆數 (預設: 5000)')
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_SUFFIXES), default='gzip', help='壓縮格式 (預設: gzip)')
+    parser.add_argument('--no-content', action='store_true', help='不輸出原始 content sidecar')
+    args = parser.parse_args()
+
+    count = write_corpus(
+        iter_report_records(args.source),
+        args.corpus_dir,
+        shard_size=args.shard_size,
+        compression=args.compression,
+        content_sidecar=not args.no_content
+    )
+    source_size = os.path.getsize(args.source)
+    corpus_size = _directory_size(args.corpus_dir)
+    print(f"已輸出 {count} 筆資料到 {args.corpus_dir}")
+    print(f"大小: {source_size / 1e6:.2f} MB -> {corpus_size / 1e6:.2f} MB（{source_size / max(corpus_size, 1):.1f}x）")
+
+
+if __name__ == '__main__':
+    main()
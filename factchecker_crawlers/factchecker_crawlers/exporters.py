@@ -0,0 +1,185 @@
+# 串流輸出與外部排序工具
+#
+# 爬蟲輸出以 JSONL 串流寫入，結束時再以外部合併排序（external merge sort）
+# 依 report_number 產生排序檔，記憶體用量只跟分塊大小有關，與資料總量無關。
+
+import heapq
+import json
+import os
+import tempfile
+
+# 可續爬模式下，未排序輸出放在 JOBDIR 內，跟著 job 一起保留（依來源代號命名，例如 tfc、mygopen）
+JOB_OUTPUT_FILENAME = '{source_key}_reports_unsorted.jsonl'
+
+
+def report_sort_key(item):
+    """排序鍵：報告編號（數字越大越新），空的 report_number 排在最後"""
+    report_num = str(item.get('report_number', '')).strip()
+    if report_num and report_num.isdigit():
+        return int(report_num)
+    return -1
+
+
+class JsonLinesWriter:
+    """保持單一緩衝檔案把手的 JSONL 寫入器，每 flush_interval 筆才 flush 一次"""
+
+    def __init__(self, filename, flush_interval=50, mode='w'):
+        self.filename = filename
+        self.flush_interval = max(1, flush_interval)
+        self.count = 0
+        self._file = open(filename, mode, encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+        if self.count % self.flush_interval == 0:
+            self._file.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def job_output_path(jobdir, source_key):
+    """可續爬 job 的未排序輸出檔路徑"""
+    return os.path.join(jobdir, JOB_OUTPUT_FILENAME.format(source_key=source_key))
+
+
+def recover_jsonl(filename, block_size=1 << 20):
+    """
+    移除爬蟲中斷時寫到一半的最後一行，回傳檔案中完整的資料筆數。
+    檔案不存在時回傳 0。
+    """
+    if not os.path.exists(filename):
+        return 0
+
+    count = 0
+    last_newline = 0
+    with open(filename, 'rb+') as f:
+        offset = 0
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines = block.count(b'\n')
+            if newlines:
+                count += newlines
+                last_newline = offset + block.rindex(b'\n') + 1
+            offset += len(block)
+
+        if last_newline < offset:
+            f.truncate(last_newline)
+
+    return count
+
+
+def iter_report_records(filename):
+    """
+    逐筆讀取報告資料，支援 JSONL 以及「每行一筆」的 JSON 陣列。
+    舊版以 indent=4 輸出的 JSON 陣列無法逐行解析，會退回整檔載入。
+    """
+    with open(filename, 'r', encoding='utf-8') as f:
+        yielded = False
+        for line in f:
+            line = line.strip()
+            if line in ('', '[', ']'):
+                continue
+            try:
+                record = json.loads(line.rstrip(','))
+            except ValueError:
+                if yielded:
+                    raise
+                break
+            yielded = True
+            if isinstance(record, list):
+                yield from record
+            else:
+                yield record
+        else:
+            return
+
+    # 舊版格式（整份 pretty-printed JSON）
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from json.load(f)
+
+
+def _write_sorted_run(records, tmp_dir):
+    """將一個分塊排序後寫成暫存 JSONL 檔"""
+    records.sort(key=lambda item: -report_sort_key(item))
+    fd, run_filename = tempfile.mkstemp(suffix='.jsonl', dir=tmp_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+    return run_filename
+
+
+def _iter_run(run_filename):
+    with open(run_filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def external_sort_reports(source_filenames, output_filename, chunk_size=2000):
+    """
+    外部合併排序：依 report_number 由新到舊輸出 JSON 陣列（每行一筆）
+
+    Args:
+        source_filenames: 來源檔案列表，排在前面的來源優先（同編號時保留前者）
+        output_filename: 輸出檔案
+        chunk_size: 每個排序分塊的筆數（決定記憶體上限）
+
+    Returns:
+        輸出的資料筆數
+    """
+    output_dir = os.path.dirname(output_filename) or '.'
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        # 第一階段：分塊排序，寫出多個已排序的暫存檔
+        run_filenames = []
+        for source_filename in source_filenames:
+            chunk = []
+            for record in iter_report_records(source_filename):
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    run_filenames.append(_write_sorted_run(chunk, tmp_dir))
+                    chunk = []
+            if chunk:
+                run_filenames.append(_write_sorted_run(chunk, tmp_dir))
+
+        # 第二階段：多路合併（heapq.merge 為穩定合併，同鍵值時前面的來源優先）
+        runs = [_iter_run(run_filename) for run_filename in run_filenames]
+        merged = heapq.merge(*runs, key=lambda item: -report_sort_key(item))
+
+        # 先寫到暫存檔再取代，來源檔與輸出檔可以是同一個檔案
+        tmp_output = output_filename + '.tmp'
+        count = 0
+        last_report_number = None
+        seen_urls = set()
+        with open(tmp_output, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for record in merged:
+                # 去除重複報告：有編號者相鄰比較，無編號者以網址判斷
+                report_number = report_sort_key(record)
+                if report_number >= 0:
+                    if report_number == last_report_number:
+                        continue
+                    last_report_number = report_number
+                else:
+                    content_url = record.get('content_url', '')
+                    if content_url in seen_urls:
+                        continue
+                    seen_urls.add(content_url)
+
+                if count > 0:
+                    f.write(',\n')
+                f.write(json.dumps(record, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n')
+
+        os.replace(tmp_output, output_filename)
+
+    return count
@@ -0,0 +1,229 @@
+# 爬取各階段指標
+#
+# 收集每個請求的下載延遲、callback（parse / parse_article）CPU 時間、
+# pipeline 寫入時間、items/s、重試次數與 HTTP 狀態碼，定期輸出成 JSON 檔
+# 與 Prometheus textfile（供 node_exporter 的 textfile collector 讀取），
+# 作為調整 CONCURRENT_REQUESTS、DOWNLOAD_DELAY 與 AutoThrottle 的依據。
+#
+# 下載延遲在 response_downloaded 時取樣（早於 downloader middleware），重新驗證時被
+# IgnoreRequest 略過的 304 與未變更的文章、之後會被重試的回應也都會計入。
+# callback CPU 時間由 middlewares.CallbackTimingSpiderMiddleware 寫入 stats，
+# pipeline 寫入時間由 FactcheckerCrawlersPipeline 寫入 stats，本擴充功能負責彙整與輸出。
+
+import json
+import os
+import time
+from collections import deque
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+CALLBACK_CPU_PREFIX = 'metrics/callback_cpu_seconds/'
+CALLBACK_CALLS_PREFIX = 'metrics/callback_calls/'
+STATUS_PREFIX = 'downloader/response_status_count/'
+
+
+def percentile(values, percent):
+    """計算百分位數（最近排名法）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+class CrawlMetricsExtension:
+    """定期輸出爬取指標（JSON 與 Prometheus textfile）"""
+
+    def __init__(self, stats, interval, json_path, prom_path, latency_window):
+        self.stats = stats
+        self.interval = interval
+        self.json_path = json_path
+        self.prom_path = prom_path
+        # 只保留最近的延遲樣本計算百分位數，總和與次數另外累計
+        self.latencies = deque(maxlen=latency_window)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TFC_METRICS_ENABLED', True):
+            raise NotConfigured
+        ext = cls(
+            crawler.stats,
+            interval=crawler.settings.getfloat('TFC_METRICS_INTERVAL', 30.0),
+            json_path=crawler.settings.get('TFC_METRICS_JSON', 'output/crawl_metrics.json'),
+            prom_path=crawler.settings.get('TFC_METRICS_PROM', 'output/crawl_metrics.prom'),
+            latency_window=crawler.settings.getint('TFC_METRICS_LATENCY_WINDOW', 10000)
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_downloaded, signal=signals.response_downloaded)
+        return ext
+
+    def spider_opened(self, spider):
+        self.spider_name = spider.name
+        self.started = time.monotonic()
+        self.last_export = self.started
+        self.last_item_count = 0
+        self.task = task.LoopingCall(self.export)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task and self.task.running:
+            self.task.stop()
+        self.export()
+        spider.logger.info(f"爬取指標已輸出到 {self.json_path} 與 {self.prom_path}")
+
+    def response_downloaded(self, response, request, spider):
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            self.latencies.append(latency)
+            self.latency_sum += latency
+            self.latency_count += 1
+
+    def snapshot(self):
+        """彙整目前的指標"""
+        stats = self.stats.get_stats()
+        now = time.monotonic()
+        elapsed = now - self.started
+        item_count = stats.get('item_scraped_count', 0)
+
+        # items/s：整體平均與最近一個輸出週期
+        window = now - self.last_export
+        recent_rate = (item_count - self.last_item_count) / window if window > 0 else 0.0
+        self.last_export = now
+        self.last_item_count = item_count
+
+        callbacks = {}
+        for key, value in stats.items():
+            if key.startswith(CALLBACK_CPU_PREFIX):
+                name = key[len(CALLBACK_CPU_PREFIX):]
+                callbacks.setdefault(name, {})['cpu_seconds'] = round(value, 6)
+            elif key.startswith(CALLBACK_CALLS_PREFIX):
+                name = key[len(CALLBACK_CALLS_PREFIX):]
+                callbacks.setdefault(name, {})['calls'] = value
+
+        latencies = list(self.latencies)
+        return {
+            'spider': self.spider_name,
+            'timestamp': time.time(),
+            'elapsed_seconds': round(elapsed, 3),
+            'requests': stats.get('downloader/request_count', 0),
+            'responses': stats.get('downloader/response_count', 0),
+            'items': item_count,
+            'items_per_second': round(item_count / elapsed, 3) if elapsed > 0 else 0.0,
+            'items_per_second_recent': round(recent_rate, 3),
+            'retries': stats.get('retry/count', 0),
+            'status_counts': {
+                key[len(STATUS_PREFIX):]: value
+                for key, value in stats.items() if key.startswith(STATUS_PREFIX)
+            },
+            'download_latency': {
+                'count': self.latency_count,
+                'sum': round(self.latency_sum, 6),
+                'p50': round(percentile(latencies, 50), 6),
+                'p95': round(percentile(latencies, 95), 6),
+                'p99': round(percentile(latencies, 99), 6),
+            },
+            'callbacks': callbacks,
+            'pipeline_write_seconds': round(stats.get('metrics/pipeline_write_seconds', 0.0), 6),
+            'pipeline_writes': stats.get('metrics/pipeline_writes', 0),
+            'adaptive': {
+                key[len('adaptive/'):]: value
+                for key, value in stats.items()
+                if key.startswith('adaptive/') and not key.startswith('adaptive/decisions/')
+            },
+            'adaptive_decisions': {
+                key[len('adaptive/decisions/'):]: value
+                for key, value in stats.items() if key.startswith('adaptive/decisions/')
+            },
+        }
+
+    def export(self):
+        metrics = self.snapshot()
+        self._write_atomic(self.json_path, json.dumps(metrics, ensure_ascii=False, indent=2))
+        self._write_atomic(self.prom_path, self._to_prometheus(metrics))
+
+    def _to_prometheus(self, metrics):
+        """轉換為 Prometheus text exposition format"""
+        spider = metrics['spider']
+        latency = metrics['download_latency']
+        lines = [
+            '# HELP tfc_crawl_elapsed_seconds Seconds since the spider opened.',
+            '# TYPE tfc_crawl_elapsed_seconds gauge',
+            f'tfc_crawl_elapsed_seconds{{spider="{spider}"}} {metrics["elapsed_seconds"]}',
+            '# HELP tfc_crawl_requests_total Requests sent by the downloader.',
+            '# TYPE tfc_crawl_requests_total counter',
+            f'tfc_crawl_requests_total{{spider="{spider}"}} {metrics["requests"]}',
+            '# HELP tfc_crawl_items_total Items scraped.',
+            '# TYPE tfc_crawl_items_total counter',
+            f'tfc_crawl_items_total{{spider="{spider}"}} {metrics["items"]}',
+            '# HELP tfc_crawl_items_per_second Items scraped per second over the last export interval.',
+            '# TYPE tfc_crawl_items_per_second gauge',
+            f'tfc_crawl_items_per_second{{spider="{spider}"}} {metrics["items_per_second_recent"]}',
+            '# HELP tfc_crawl_retries_total Retried requests.',
+            '# TYPE tfc_crawl_retries_total counter',
+            f'tfc_crawl_retries_total{{spider="{spider}"}} {metrics["retries"]}',
+            '# HELP tfc_crawl_responses_total Responses by HTTP status.',
+            '# TYPE tfc_crawl_responses_total counter',
+        ]
+        for status, count in sorted(metrics['status_counts'].items()):
+            lines.append(f'tfc_crawl_responses_total{{spider="{spider}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP tfc_crawl_download_latency_seconds Download latency per request.',
+            '# TYPE tfc_crawl_download_latency_seconds summary',
+        ]
+        for quantile in ('p50', 'p95', 'p99'):
+            lines.append(
+                f'tfc_crawl_download_latency_seconds{{spider="{spider}",quantile="0.{quantile[1:]}"}} {latency[quantile]}'
+            )
+        lines += [
+            f'tfc_crawl_download_latency_seconds_sum{{spider="{spider}"}} {latency["sum"]}',
+            f'tfc_crawl_download_latency_seconds_count{{spider="{spider}"}} {latency["count"]}',
+            '# HELP tfc_crawl_callback_cpu_seconds_total CPU time spent in spider callbacks on the reactor thread.',
+            '# TYPE tfc_crawl_callback_cpu_seconds_total counter',
+        ]
+        for name, values in sorted(metrics['callbacks'].items()):
+            lines.append(
+                f'tfc_crawl_callback_cpu_seconds_total{{spider="{spider}",callback="{name}"}} {values.get("cpu_seconds", 0.0)}'
+            )
+        lines += [
+            '# HELP tfc_crawl_callback_calls_total Spider callback invocations.',
+            '# TYPE tfc_crawl_callback_calls_total counter',
+        ]
+        for name, values in sorted(metrics['callbacks'].items()):
+            lines.append(
+                f'tfc_crawl_callback_calls_total{{spider="{spider}",callback="{name}"}} {values.get("calls", 0)}'
+            )
+        lines += [
+            '# HELP tfc_crawl_pipeline_write_seconds_total Time spent writing items in the output pipeline.',
+            '# TYPE tfc_crawl_pipeline_write_seconds_total counter',
+            f'tfc_crawl_pipeline_write_seconds_total{{spider="{spider}"}} {metrics["pipeline_write_seconds"]}',
+        ]
+        adaptive = metrics['adaptive']
+        if 'concurrency' in adaptive:
+            lines += [
+                '# HELP tfc_crawl_adaptive_concurrency Per-domain concurrency chosen by the adaptive controller.',
+                '# TYPE tfc_crawl_adaptive_concurrency gauge',
+                f'tfc_crawl_adaptive_concurrency{{spider="{spider}"}} {adaptive["concurrency"]}',
+                '# HELP tfc_crawl_adaptive_delay_seconds Download delay chosen by the adaptive controller.',
+                '# TYPE tfc_crawl_adaptive_delay_seconds gauge',
+                f'tfc_crawl_adaptive_delay_seconds{{spider="{spider}"}} {adaptive.get("delay", 0.0)}',
+                '# HELP tfc_crawl_adaptive_decisions_total Adaptive controller decisions by kind.',
+                '# TYPE tfc_crawl_adaptive_decisions_total counter',
+            ]
+            for decision, count in sorted(metrics['adaptive_decisions'].items()):
+                lines.append(f'tfc_crawl_adaptive_decisions_total{{spider="{spider}",decision="{decision}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def _write_atomic(self, path, content):
+        """先寫入暫存檔再改名，避免 node_exporter 讀到寫到一半的檔案"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
@@ -5,7 +5,8 @@
 
 import scrapy
 
-class TFCReportItem(scrapy.Item):
+class FactCheckReportItem(scrapy.Item):
+    """所有事實查核來源共用的報告結構（各來源的轉接器見 sources.py）"""
     content_url = scrapy.Field()
     source = scrapy.Field()
     title = scrapy.Field()
@@ -18,3 +19,7 @@ class TFCReportItem(scrapy.Item):
     report_number = scrapy.Field()
     reporter = scrapy.Field()
     editor = scrapy.Field()
+
+
+# 舊名稱
+TFCReportItem = FactCheckReportItem
@@ -3,11 +3,21 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import hashlib
+import inspect
+import os
+import time
+from collections import deque
+
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
 
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+from .archive import WarcWriter
+from .storage import ValidatorStore
+
 
 class FactcheckerCrawlersSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -53,37 +63,148 @@ class FactcheckerCrawlersSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class CallbackTimingSpiderMiddleware:
+    """
+    記錄每個 callback（parse、parse_article）在 reactor 執行緒上的 CPU 時間，
+    寫入 stats 的 metrics/callback_cpu_seconds/<callback>，由 CrawlMetricsExtension 輸出。
+    應排在最靠近 spider 的位置，才能只計入 callback 本身的時間。
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TFC_METRICS_ENABLED', True):
+            raise NotConfigured
+        return cls(crawler.stats)
+
+    def process_spider_output(self, response, result, spider):
+        callback = self._callback_name(response)
+        cpu_seconds = 0.0
+        iterator = iter(result)
+        while True:
+            # 只計算產生下一個結果的時間，不含下游處理
+            started = time.thread_time()
+            try:
+                item_or_request = next(iterator)
+            except StopIteration:
+                cpu_seconds += time.thread_time() - started
+                break
+            cpu_seconds += time.thread_time() - started
+            yield item_or_request
+
+        self._record(callback, cpu_seconds)
+
+    async def process_spider_output_async(self, response, result, spider):
+        # 非同步 callback（交給 worker pool 解析）在 await 期間會執行其他工作，且 CPU 不在
+        # reactor 執行緒上，只計次不計時
+        callback = self._callback_name(response)
+        if self._is_async_callback(response):
+            async for item_or_request in result:
+                yield item_or_request
+            self._record(callback, 0.0)
+            return
+
+        # 同步 callback 被包成 async iterator 時，每一步之間不會讓出執行緒
+        cpu_seconds = 0.0
+        iterator = result.__aiter__()
+        while True:
+            started = time.thread_time()
+            try:
+                item_or_request = await iterator.__anext__()
+            except StopAsyncIteration:
+                cpu_seconds += time.thread_time() - started
+                break
+            cpu_seconds += time.thread_time() - started
+            yield item_or_request
+
+        self._record(callback, cpu_seconds)
+
+    def _callback_name(self, response):
+        callback = response.request.callback if response.request else None
+        return getattr(callback, '__name__', 'parse')
+
+    def _is_async_callback(self, response):
+        callback = response.request.callback if response.request else None
+        return inspect.iscoroutinefunction(callback) or inspect.isasyncgenfunction(callback)
+
+    def _record(self, callback, cpu_seconds):
+        self.stats.inc_value(f'metrics/callback_cpu_seconds/{callback}', cpu_seconds)
+        self.stats.inc_value(f'metrics/callback_calls/{callback}')
+
+
 class FactcheckerCrawlersDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """
+    文章的條件式重新驗證
+
+    為每篇文章保存 ETag、Last-Modified 與內容雜湊，之後的爬取送出
+    If-None-Match / If-Modified-Since。伺服器回 304，或回 200 但內容雜湊
+    與上次相同時，視為文章未變更並以 IgnoreRequest 中止，不再進入 parse_article。
+    只處理 meta 中帶有 revalidate=True 的請求（即文章頁）。
+
+    收到有變更的回應時就寫入驗證資訊：增量模式下低於水位的文章不會產出 item，
+    也不必在下次爬取時重新下載。文章解析失敗（spider_error）時刪除驗證資訊，下次重新下載。
+    """
+
+    def __init__(self, db_path, stats):
+        self.db_path = db_path
+        self.stats = stats
+        self.pending_count = 0
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        if not crawler.settings.getbool('TFC_REVALIDATION_ENABLED', True):
+            raise NotConfigured
+        s = cls(
+            crawler.settings.get('TFC_REVALIDATION_DB', 'output/tfc_validators.db'),
+            crawler.stats
+        )
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.spider_error, signal=signals.spider_error)
         return s
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
+        if not request.meta.get('revalidate'):
+            return None
 
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        validators = self.store.get(request.url)
+        if validators:
+            # 附上上次的驗證資訊，讓伺服器可以回 304
+            if validators['etag']:
+                request.headers.setdefault('If-None-Match', validators['etag'])
+            if validators['last_modified']:
+                request.headers.setdefault('If-Modified-Since', validators['last_modified'])
+            request.meta['revalidation_previous_hash'] = validators['body_hash']
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
+        if not request.meta.get('revalidate'):
+            return response
+
+        if response.status == 304:
+            self.stats.inc_value('revalidation/not_modified')
+            raise IgnoreRequest(f"文章未變更 (304): {request.url}")
+
+        if response.status != 200:
+            return response
 
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        body_hash = hashlib.sha1(response.body).hexdigest()
+        if body_hash == request.meta.get('revalidation_previous_hash'):
+            self.stats.inc_value('revalidation/unchanged_body')
+            raise IgnoreRequest(f"文章內容未變更: {request.url}")
+
+        self.store.set(
+            request.url,
+            response.headers.get('ETag', b'').decode('latin-1'),
+            response.headers.get('Last-Modified', b'').decode('latin-1'),
+            body_hash
+        )
+        self.pending_count += 1
+        if self.pending_count % 100 == 0:
+            self.store.commit()
+        self.stats.inc_value('revalidation/changed')
         return response
 
     def process_exception(self, request, exception, spider):
@@ -96,5 +217,227 @@ class FactcheckerCrawlersDownloaderMiddleware:
         # - return a Request object: stops process_exception() chain
         pass
 
+    def spider_error(self, failure, response, spider):
+        # 解析失敗的文章不保留驗證資訊，避免之後被視為未變更而略過
+        if response.request is not None and response.request.meta.get('revalidate'):
+            self.store.delete(response.request.url)
+
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.store = ValidatorStore(self.db_path)
+        spider.logger.info(f"條件式重新驗證已啟用：已記錄 {self.store.count()} 篇文章的驗證資訊")
+
+    def spider_closed(self, spider):
+        self.store.close()
+
+
+class RawArchiveDownloaderMiddleware:
+    """
+    將文章頁的原始回應封存為 .warc.gz
+
+    只處理 meta 中帶有 archive=True 的 200 回應。排在重新驗證 middleware 之後處理回應，
+    未變更的文章不會重複封存；內容已由 HttpCompressionMiddleware 解壓縮。
+    """
+
+    def __init__(self, directory, max_size, stats):
+        self.directory = directory
+        self.max_size = max_size
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('TFC_ARCHIVE_ENABLED', True):
+            raise NotConfigured
+        s = cls(
+            crawler.settings.get('TFC_ARCHIVE_DIR', 'output/archive'),
+            crawler.settings.getint('TFC_ARCHIVE_MAX_SIZE', 1 << 30),
+            crawler.stats
+        )
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def process_response(self, request, response, spider):
+        if not request.meta.get('archive') or response.status != 200:
+            return response
+
+        headers = [
+            (name, value)
+            for name, values in response.headers.items()
+            for value in values
+        ]
+        self.writer.write_response(response.url, response.status, headers, response.body)
+        self.stats.inc_value('archive/responses')
+        self.stats.inc_value('archive/bytes', len(response.body))
+        return response
+
+    def spider_opened(self, spider):
+        self.writer = WarcWriter(self.directory, prefix=spider.name, max_size=self.max_size)
+        spider.logger.info(f"原始回應封存已啟用：{self.directory}")
+
+    def spider_closed(self, spider):
+        self.writer.close()
+        spider.logger.info(f"已封存 {self.writer.count} 篇文章的原始回應")
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    依延遲與錯誤碼自動調整下載並行度與延遲（AIMD）
+
+    每收到 TFC_ADAPTIVE_WINDOW 個回應做一次決策：
+    - 出現 429，或 503 / 逾時佔窗口比例達 TFC_ADAPTIVE_ERROR_THRESHOLD：
+      並行度減半、延遲加倍（有 Retry-After 時至少等那麼久）
+    - p95 延遲超過基準 p95 的 TFC_ADAPTIVE_LATENCY_TOLERANCE 倍：並行度降為 3/4
+    - 延遲穩定：並行度加 1、延遲減半，直到上限 / 下限
+    基準 p95 取觀察到的最低值，並隨時間緩慢上升，伺服器整體變慢時不會一直退讓。
+
+    取代 AutoThrottle 與固定的 DOWNLOAD_DELAY，目前的決策寫入 stats（adaptive/*）。
+    排在 RetryMiddleware 之前處理回應，才看得到被重試的 429 / 503。
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, crawler, min_concurrency, max_concurrency, start_concurrency,
+                 min_delay, max_delay, window, latency_tolerance, error_threshold, baseline_drift=0.02):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.start_concurrency = start_concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.baseline_drift = baseline_drift
+        # 每個下載 slot（通常即每個網域）各自控制
+        self.controls = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('TFC_ADAPTIVE_ENABLED', True):
+            raise NotConfigured
+        max_concurrency = settings.getint('TFC_ADAPTIVE_MAX_CONCURRENCY', settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN', 8))
+        return cls(
+            crawler,
+            min_concurrency=settings.getint('TFC_ADAPTIVE_MIN_CONCURRENCY', 1),
+            max_concurrency=max_concurrency,
+            start_concurrency=min(settings.getint('TFC_ADAPTIVE_START_CONCURRENCY', 4), max_concurrency),
+            min_delay=settings.getfloat('TFC_ADAPTIVE_MIN_DELAY', 0.0),
+            max_delay=settings.getfloat('TFC_ADAPTIVE_MAX_DELAY', 10.0),
+            window=settings.getint('TFC_ADAPTIVE_WINDOW', 20),
+            latency_tolerance=settings.getfloat('TFC_ADAPTIVE_LATENCY_TOLERANCE', 1.5),
+            error_threshold=settings.getfloat('TFC_ADAPTIVE_ERROR_THRESHOLD', 0.1)
+        )
+
+    def process_response(self, request, response, spider):
+        control = self._control(request)
+        if control is None:
+            return response
+
+        if response.status == 429:
+            # 明確要求降速，不論比例都退讓
+            control['rate_limited'] = True
+        if response.status in self.THROTTLE_STATUSES:
+            control['throttled'] += 1
+            retry_after = self._retry_after(response)
+            if retry_after:
+                control['retry_after'] = max(control['retry_after'], retry_after)
+
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            control['latencies'].append(latency)
+
+        control['responses'] += 1
+        if control['responses'] >= self.window:
+            self._decide(control)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # 逾時、連線被拒等視同伺服器過載
+        control = self._control(request)
+        if control is not None:
+            control['throttled'] += 1
+            control['responses'] += 1
+            if control['responses'] >= self.window:
+                self._decide(control)
+        return None
+
+    def _control(self, request):
+        """取得請求所屬下載 slot 的控制狀態，第一次見到時套用起始並行度"""
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return None
+
+        control = self.controls.get(key)
+        if control is None or control['slot'] is not slot:
+            slot.concurrency = self.start_concurrency
+            slot.delay = min(max(slot.delay, self.min_delay), self.max_delay)
+            control = {
+                'key': key,
+                'slot': slot,
+                'latencies': deque(maxlen=self.window),
+                'responses': 0,
+                'throttled': 0,
+                'rate_limited': False,
+                'retry_after': 0.0,
+                'baseline_p95': None,
+            }
+            self.controls[key] = control
+            self._publish(control, 'start', None)
+        return control
+
+    def _decide(self, control):
+        slot = control['slot']
+        latencies = sorted(control['latencies'])
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None
+
+        baseline = control['baseline_p95']
+        if p95 is not None:
+            # 基準取最低 p95，並緩慢上升以適應伺服器整體變慢
+            baseline = p95 if baseline is None else min(p95, baseline * (1 + self.baseline_drift))
+            control['baseline_p95'] = baseline
+
+        error_ratio = control['throttled'] / max(control['responses'], 1)
+        if control['rate_limited'] or error_ratio >= self.error_threshold:
+            decision = 'backoff_throttled'
+            slot.concurrency = max(self.min_concurrency, slot.concurrency // 2)
+            slot.delay = min(self.max_delay, max(slot.delay * 2, control['retry_after'], 0.25))
+        elif p95 is not None and baseline and p95 > baseline * self.latency_tolerance:
+            decision = 'backoff_latency'
+            slot.concurrency = max(self.min_concurrency, int(slot.concurrency * 0.75))
+        elif slot.concurrency < self.max_concurrency or slot.delay > self.min_delay:
+            decision = 'increase'
+            slot.concurrency = min(self.max_concurrency, slot.concurrency + 1)
+            slot.delay = slot.delay / 2 if slot.delay / 2 > max(self.min_delay, 0.01) else self.min_delay
+        else:
+            decision = 'hold'
+
+        control['responses'] = 0
+        control['throttled'] = 0
+        control['rate_limited'] = False
+        control['retry_after'] = 0.0
+        self._publish(control, decision, p95)
+
+    def _publish(self, control, decision, p95):
+        """將目前的決策寫入 stats"""
+        slot = control['slot']
+        self.stats.set_value('adaptive/concurrency', slot.concurrency)
+        self.stats.set_value('adaptive/delay', round(slot.delay, 3))
+        self.stats.set_value('adaptive/decision', decision)
+        self.stats.inc_value(f'adaptive/decisions/{decision}')
+        if p95 is not None:
+            self.stats.set_value('adaptive/p95_latency', round(p95, 4))
+        if control['baseline_p95'] is not None:
+            self.stats.set_value('adaptive/baseline_p95_latency', round(control['baseline_p95'], 4))
+        self.stats.max_value('adaptive/max_concurrency', slot.concurrency)
+
+    def _retry_after(self, response):
+        """解析 Retry-After 標頭（秒數格式）"""
+        value = response.headers.get('Retry-After')
+        try:
+            return float(value) if value else 0.0
+        except ValueError:
+            return 0.0
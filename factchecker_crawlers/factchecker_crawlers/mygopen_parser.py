@@ -0,0 +1,174 @@
+# MyGoPen 文章頁解析
+#
+# MyGoPen（www.mygopen.com）架設在 Blogger 上：列表使用 Blogger 的 JSON feed
+# （可依 start-index 分頁，並提供總篇數），文章頁為一般的 Blogger 文章。
+# 查核結果寫在標題開頭的【】標籤中（例如【錯誤】、【誤導】），
+# 這裡對應到與 TFC 相同的四種查核結果，讓兩個來源可以共用同一份 item 結構與 pipeline。
+#
+# 與 article_parser 相同，解析邏輯以模組層級函式實作，可以交給 worker pool 執行。
+
+import json
+import math
+import re
+from urllib.parse import parse_qs, urlparse
+
+SOURCE_NAME = 'MyGoPen'
+
+# 列表 feed 每頁篇數（Blogger summary feed 上限為 150）
+FEED_PAGE_SIZE = 25
+
+TITLE_SUFFIX_RE = re.compile(r'\s*[-|｜]\s*MyGoPen.*$')
+VERDICT_RE = re.compile(r'^\s*【([^】]+)】')
+ARTICLE_PATH_RE = re.compile(r'/\d{4}/\d{2}/[^/]+\.html$')
+DATE_RE = re.compile(r'(\d{4})[-/](\d{1,2})[-/](\d{1,2})')
+URL_DATE_RE = re.compile(r'/(\d{4})/(\d{2})/')
+
+CONTENT_SELECTORS = [
+    '.post-body',
+    '.entry-content',
+]
+
+# 標題標籤對應的查核結果，依序比對關鍵字（「部分錯誤」須先於「錯誤」）
+VERDICT_KEYWORDS = [
+    (('部分', '誤導', '易誤解', '片面', '斷章取義'), '部分錯誤'),
+    (('錯誤', '謠言', '詐騙', '假', '偽造', '變造', '不實', '合成'), '錯誤'),
+    (('釐清', '資訊', '觀點', '解析', '誤會', '待查'), '事實釐清'),
+    (('正確', '屬實'), '正確'),
+]
+
+
+def feed_url(base_url, page, page_size=FEED_PAGE_SIZE):
+    """列表頁（Blogger JSON feed）網址"""
+    start_index = (page - 1) * page_size + 1
+    return f"{base_url}/feeds/posts/summary?alt=json&start-index={start_index}&max-results={page_size}"
+
+
+def feed_page_number(url, page_size=FEED_PAGE_SIZE):
+    """由 feed 網址的 start-index 推算頁碼"""
+    query = parse_qs(urlparse(url).query)
+    start_index = int((query.get('start-index') or ['1'])[0])
+    return (start_index - 1) // page_size + 1
+
+
+def parse_feed(response, page_size=FEED_PAGE_SIZE):
+    """
+    解析列表 feed
+
+    Returns:
+        (文章網址列表, 總頁數)；無法取得總篇數時總頁數為 None
+    """
+    feed = json.loads(response.text).get('feed', {})
+
+    links = []
+    for entry in feed.get('entry', []):
+        for link in entry.get('link', []):
+            if link.get('rel') == 'alternate' and link.get('href'):
+                url = response.urljoin(link['href'])
+                if ARTICLE_PATH_RE.search(urlparse(url).path):
+                    links.append(url)
+                break
+
+    total = feed.get('openSearch$totalResults', {}).get('$t')
+    max_pages = math.ceil(int(total) / page_size) if total else None
+    return links, max_pages
+
+
+def extract_title(response):
+    """提取標題（移除網站名稱後綴）"""
+    title = (
+        response.css('meta[property="og:title"]::attr(content)').get()
+        or response.css('.post-title::text').get()
+        or response.css('title::text').get()
+        or ''
+    )
+    return TITLE_SUFFIX_RE.sub('', title).strip()
+
+
+def extract_content(response):
+    """提取文章內文文字"""
+    for selector in CONTENT_SELECTORS:
+        content_elem = response.css(selector)
+        if content_elem:
+            texts = content_elem[0].css('*:not(script):not(style)::text').getall()
+            return ' '.join([text.strip() for text in texts if text.strip()])
+
+    return ''
+
+
+def classify_verdict(title):
+    """由標題開頭的【】標籤判斷查核結果"""
+    match = VERDICT_RE.match(title)
+    if not match:
+        return ''
+
+    label = match.group(1)
+    for keywords, check_result in VERDICT_KEYWORDS:
+        if any(keyword in label for keyword in keywords):
+            return check_result
+
+    return ''
+
+
+def _normalize_date(value):
+    """各種日期格式轉為 YYYY-MM-DD"""
+    match = DATE_RE.search(value or '')
+    if not match:
+        return ''
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+def extract_dates(response):
+    """提取發布日期與更新日期，沒有更新日期時與發布日期相同"""
+    publish_date = _normalize_date(
+        response.css('meta[property="article:published_time"]::attr(content)').get()
+        or response.css('.published::attr(datetime)').get()
+        or response.css('.published::attr(title)').get()
+        or response.css('time::attr(datetime)').get()
+    )
+    if not publish_date:
+        # 最後以網址中的年月（/2024/05/）代替
+        match = URL_DATE_RE.search(response.url)
+        if match:
+            publish_date = f"{match.group(1)}-{match.group(2)}-01"
+
+    update_date = _normalize_date(
+        response.css('meta[property="article:modified_time"]::attr(content)').get()
+        or response.css('.updated::attr(datetime)').get()
+        or response.css('.updated::attr(title)').get()
+    )
+    return publish_date, update_date or publish_date
+
+
+def extract_categories(response):
+    """提取 Blogger 標籤"""
+    labels = response.css('.post-labels a::text, a[rel="tag"]::text').getall()
+    categories = []
+    for label in labels:
+        label = label.strip()
+        if label and label not in categories:
+            categories.append(label)
+    return categories
+
+
+def parse_article_fields(response):
+    """解析 MyGoPen 文章頁，回傳與 TFC 相同結構的欄位"""
+    title = extract_title(response)
+    content = extract_content(response)
+    publish_date, update_date = extract_dates(response)
+
+    return {
+        'content_url': response.url,
+        'source': SOURCE_NAME,
+        'title': title,
+        'content': content,
+        'processed_content': content,
+        'check_result': classify_verdict(title),
+        'publish_date': publish_date,
+        'update_date': update_date,
+        'categories': extract_categories(response),
+        # MyGoPen 沒有報告編號，資料庫與排序改以文章網址為鍵
+        'report_number': '',
+        'reporter': '',
+        'editor': '',
+    }
@@ -3,57 +3,107 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
-import json
 import os
-from datetime import datetime
+import sys
+import time
 from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
+from twisted.internet.threads import deferToThread
+
+from .corpus import write_corpus
+from .exporters import JsonLinesWriter, iter_report_records, external_sort_reports, job_output_path, recover_jsonl
+from .storage import ReportStore
 
 
 class FactcheckerCrawlersPipeline:
+    def __init__(self, flush_interval=50, sort_chunk_size=2000, merge_existing=False, stats=None, jobdir=None,
+                 corpus_dir=None, corpus_shard_size=5000, corpus_compression='gzip', corpus_content_sidecar=True):
+        self.stats = stats
+        self.flush_interval = flush_interval
+        self.sort_chunk_size = sort_chunk_size
+        # 啟用條件式重新驗證時，未變更的文章不會產生 item，需與既有輸出合併
+        self.merge_existing = merge_existing
+        # 可續爬模式（設定 JOBDIR）：輸出跟著 job 保留，重新執行時接續寫入
+        self.jobdir = jobdir
+        # 壓縮分片語料（None 表示不輸出）
+        self.corpus_dir = corpus_dir
+        self.corpus_shard_size = corpus_shard_size
+        self.corpus_compression = corpus_compression
+        self.corpus_content_sidecar = corpus_content_sidecar
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # JSON 輸出為選用功能，關閉時只寫入 SQLite 資料庫
+        if not crawler.settings.getbool('TFC_EXPORT_JSON', True):
+            raise NotConfigured
+        return cls(
+            flush_interval=crawler.settings.getint('TFC_JSONL_FLUSH_INTERVAL', 50),
+            sort_chunk_size=crawler.settings.getint('TFC_SORT_CHUNK_SIZE', 2000),
+            merge_existing=crawler.settings.getbool('TFC_REVALIDATION_ENABLED', True),
+            stats=crawler.stats,
+            jobdir=crawler.settings.get('JOBDIR'),
+            corpus_dir=crawler.settings.get('TFC_CORPUS_DIR') if crawler.settings.getbool('TFC_CORPUS_EXPORT', True) else None,
+            corpus_shard_size=crawler.settings.getint('TFC_CORPUS_SHARD_SIZE', 5000),
+            corpus_compression=crawler.settings.get('TFC_CORPUS_COMPRESSION', 'gzip'),
+            corpus_content_sidecar=crawler.settings.getbool('TFC_CORPUS_CONTENT_SIDECAR', True)
+        )
+
     def open_spider(self, spider):
         os.makedirs('output', exist_ok=True)
         
-        self.items = []
-        self.unsorted_filename = 'output/tfc_reports_unsorted.json'
+        self.item_count = 0
+        # 每個來源各自輸出（output/tfc_reports_sorted.json、output/mygopen_reports_sorted.json）
+        source_key = getattr(spider, 'source_key', 'tfc')
+        self.unsorted_filename = f'output/{source_key}_reports_unsorted.jsonl'
+        self.sorted_filename = f'output/{source_key}_reports_sorted.json'
         
-        # 初始化檔案（清空舊內容）
-        with open(self.unsorted_filename, 'w', encoding='utf-8') as f:
-            f.write('[\n')
-        self.first_item = True
+        if self.jobdir:
+            # 可續爬模式：保留先前已寫入的資料（移除中斷時寫到一半的最後一行）後接續寫入
+            os.makedirs(self.jobdir, exist_ok=True)
+            self.unsorted_filename = job_output_path(self.jobdir, source_key)
+            self.item_count = recover_jsonl(self.unsorted_filename)
+            self.writer = JsonLinesWriter(self.unsorted_filename, flush_interval=self.flush_interval, mode='a')
+            spider.logger.info(f"接續 job 輸出 {self.unsorted_filename}（已有 {self.item_count} 筆）")
+        else:
+            # 開啟串流寫入器（清空舊內容），整個爬取過程只保留一個檔案把手
+            self.writer = JsonLinesWriter(self.unsorted_filename, flush_interval=self.flush_interval)
         
         spider.logger.info("開始收集資料...")
 
     def close_spider(self, spider):
-        if not self.items:
+        self.writer.close()
+        
+        if not self.item_count:
             spider.logger.info("沒有資料可以輸出")
             return
             
         try:
-            # 關閉未排序檔案的 JSON 陣列
-            with open(self.unsorted_filename, 'a', encoding='utf-8') as f:
-                f.write('\n]')
+            # 增量模式或重新驗證：與既有輸出合併，新爬到的報告覆蓋同編號的舊報告
+            source_filenames = [self.unsorted_filename]
+            merge_existing = self.merge_existing or getattr(spider, 'incremental', False)
+            if merge_existing and os.path.exists(self.sorted_filename):
+                source_filenames.append(self.sorted_filename)
             
-            # 依照 report_number 由新到舊排序（數字越大越新）
-            try:
-                def get_sort_key(item):
-                    report_num = item.get('report_number', '').strip()
-                    if report_num and report_num.isdigit():
-                        return int(report_num)
-                    else:
-                        return -1  # 空的 report_number 排在最後
-                
-                sorted_items = sorted(self.items, key=get_sort_key, reverse=True)
-            except (ValueError, TypeError) as e:
-                spider.logger.error(f"排序時發生錯誤: {e}，使用原始順序")
-                sorted_items = self.items.copy()
+            # 依照 report_number 由新到舊排序（數字越大越新），以外部合併排序控制記憶體
+            sorted_count = external_sort_reports(
+                source_filenames,
+                self.sorted_filename,
+                chunk_size=self.sort_chunk_size
+            )
             
-            # 寫入排序後的資料
-            sorted_filename = 'output/tfc_reports_sorted.json'
-            with open(sorted_filename, 'w', encoding='utf-8') as f:
-                json.dump(sorted_items, f, ensure_ascii=False, indent=4)
+            spider.logger.info(f"已輸出 {self.item_count} 筆資料到 {self.unsorted_filename}（未排序，JSONL）")
+            spider.logger.info(f"已輸出 {sorted_count} 筆資料到 {self.sorted_filename}（按報告編號由新到舊排序）")
             
-            spider.logger.info(f"已輸出 {len(self.items)} 筆資料到 {self.unsorted_filename}（未排序，格式化）")
-            spider.logger.info(f"已輸出 {len(sorted_items)} 筆資料到 {sorted_filename}（按報告編號由新到舊排序）")
+            # 由排序檔產生壓縮分片語料
+            if self.corpus_dir:
+                corpus_count = write_corpus(
+                    iter_report_records(self.sorted_filename),
+                    self.corpus_dir,
+                    shard_size=self.corpus_shard_size,
+                    compression=self.corpus_compression,
+                    content_sidecar=self.corpus_content_sidecar
+                )
+                spider.logger.info(f"已輸出 {corpus_count} 筆資料到 {self.corpus_dir}（{self.corpus_compression} 壓縮分片）")
             
         except Exception as e:
             spider.logger.error(f"寫入檔案時發生錯誤: {e}")
@@ -69,21 +119,147 @@ class FactcheckerCrawlersPipeline:
         
         item_dict = dict(adapter)
         
-        # 將項目加入列表
-        self.items.append(item_dict)
-        
         # 一邊抓一邊寫入未排序檔案
         try:
-            with open(self.unsorted_filename, 'a', encoding='utf-8') as f:
-                if not self.first_item:
-                    f.write(',\n')
-                else:
-                    self.first_item = False
-                json.dump(item_dict, f, ensure_ascii=False, indent=4)
+            started = time.perf_counter()
+            self.writer.write(item_dict)
+            self.item_count += 1
+            
+            # 記錄寫入時間供爬取指標使用
+            if self.stats is not None:
+                self.stats.inc_value('metrics/pipeline_write_seconds', time.perf_counter() - started)
+                self.stats.inc_value('metrics/pipeline_writes')
             
-            spider.logger.info(f"已即時寫入第 {len(self.items)} 筆資料到 {self.unsorted_filename}")
+            spider.logger.info(f"已即時寫入第 {self.item_count} 筆資料到 {self.unsorted_filename}")
             
         except Exception as e:
             spider.logger.error(f"即時寫入資料時發生錯誤: {e}")
         
         return item
+
+
+class ReportStorePipeline:
+    """將報告 upsert 到 SQLite 資料庫（以 report_number 為鍵）"""
+
+    # 同一個程序中同時爬取多個來源時，寫入同一個資料庫的 pipeline 共用一個連線：
+    # SQLite 同時只允許一個寫入交易，各自開連線會在 reactor 執行緒上互相等待鎖
+    _shared_stores = {}
+
+    def __init__(self, db_path='output/tfc_reports.db', commit_interval=100):
+        self.db_path = db_path
+        self.commit_interval = commit_interval
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            db_path=crawler.settings.get('TFC_DB_PATH', 'output/tfc_reports.db'),
+            commit_interval=crawler.settings.getint('TFC_DB_COMMIT_INTERVAL', 100)
+        )
+
+    def open_spider(self, spider):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        key = os.path.abspath(self.db_path)
+        if key not in self._shared_stores:
+            self._shared_stores[key] = [ReportStore(self.db_path), 0]
+        self._shared_stores[key][1] += 1
+        self.store = self._shared_stores[key][0]
+        self.item_count = 0
+        spider.logger.info(f"開啟報告資料庫: {self.db_path}（現有 {self.store.count()} 筆）")
+
+    def close_spider(self, spider):
+        key = os.path.abspath(self.db_path)
+        self._shared_stores[key][1] -= 1
+        if self._shared_stores[key][1] == 0:
+            del self._shared_stores[key]
+            self.store.close()
+        else:
+            self.store.commit()
+        spider.logger.info(f"已寫入 {self.item_count} 筆資料到 {self.db_path}")
+
+    def process_item(self, item, spider):
+        try:
+            self.store.upsert(ItemAdapter(item).asdict())
+            self.item_count += 1
+            
+            # 批次 commit，避免每筆資料都寫入磁碟
+            if self.item_count % self.commit_interval == 0:
+                self.store.commit()
+                
+        except Exception as e:
+            spider.logger.error(f"寫入資料庫時發生錯誤: {e}")
+        
+        return item
+
+
+class StreamingIndexPipeline:
+    """
+    將報告送入 rag_system 的串流索引器，邊爬邊嵌入並 upsert 到 Chroma 集合
+
+    需要 rag_system 的依賴套件（llama-index、chromadb）與 GOOGLE_API_KEY，
+    以 TFC_STREAM_INDEX_ENABLED 啟用。
+    """
+
+    def __init__(self, rag_dir, persist_path, embedding_dim=768, queue_size=200, batch_size=20, flush_interval=10.0):
+        self.rag_dir = rag_dir
+        self.persist_path = persist_path
+        self.embedding_dim = embedding_dim
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('TFC_STREAM_INDEX_ENABLED', False):
+            raise NotConfigured
+
+        rag_dir = os.path.abspath(settings.get('TFC_STREAM_INDEX_RAG_DIR', '../rag_system'))
+        if not os.path.isdir(rag_dir):
+            raise NotConfigured(f"找不到 rag_system 目錄: {rag_dir}")
+
+        pipeline = cls(
+            rag_dir=rag_dir,
+            persist_path=os.path.join(rag_dir, settings.get('TFC_STREAM_INDEX_STORE', 'vector_store_db')),
+            embedding_dim=settings.getint('TFC_STREAM_INDEX_EMBEDDING_DIM', 768),
+            queue_size=settings.getint('TFC_STREAM_INDEX_QUEUE_SIZE', 200),
+            batch_size=settings.getint('TFC_STREAM_INDEX_BATCH_SIZE', 20),
+            flush_interval=settings.getfloat('TFC_STREAM_INDEX_FLUSH_INTERVAL', 10.0)
+        )
+        pipeline._import_indexer()
+        return pipeline
+
+    def _import_indexer(self):
+        """載入 rag_system 的模組（與 rag_system/main.py 相同的匯入方式）"""
+        if self.rag_dir not in sys.path:
+            sys.path.append(self.rag_dir)
+        try:
+            from modules.streaming_indexer import StreamingIndexer
+            from modules.vector_index import FactCheckVectorStore
+        except ImportError as e:
+            raise NotConfigured(f"無法載入 rag_system 模組，請先安裝 rag_system/requirements.txt: {e}")
+        self.indexer_cls = StreamingIndexer
+        self.vector_store_cls = FactCheckVectorStore
+
+    def open_spider(self, spider):
+        vector_store = self.vector_store_cls(persist_path=self.persist_path, embedding_dim=self.embedding_dim)
+        self.indexer = self.indexer_cls(
+            vector_store,
+            queue_size=self.queue_size,
+            batch_size=self.batch_size,
+            flush_interval=self.flush_interval
+        ).start()
+        spider.logger.info(f"串流索引已啟用，寫入 {self.persist_path}")
+
+    def close_spider(self, spider):
+        # 在執行緒中等待佇列清空，不阻塞 reactor
+        return deferToThread(self.indexer.close)
+
+    def process_item(self, item, spider):
+        record = ItemAdapter(item).asdict()
+        if self.indexer.try_put(record):
+            return item
+
+        # 佇列已滿：在執行緒中等待 worker 消化，延後回傳 item 讓 Scrapy 減緩產出（背壓）
+        deferred = deferToThread(self.indexer.put, record)
+        deferred.addCallback(lambda _: item)
+        return deferred
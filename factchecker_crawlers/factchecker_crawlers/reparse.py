@@ -0,0 +1,160 @@
+# 離線重新解析封存的文章
+#
+# 對封存目錄內的 .warc.gz 以該來源轉接器目前的 parse_article 邏輯重新解析（多核心平行），
+# 產生新的排序輸出與壓縮分片語料，完全不連線。同一網址封存多次時只解析最新的版本。
+#
+# 用法（於 factchecker_crawlers/ 目錄下執行）：
+#     python -m factchecker_crawlers.reparse
+#     python -m factchecker_crawlers.reparse --archive-dir output/archive --output-dir output/reparsed --workers 8
+#     python -m factchecker_crawlers.reparse --source mygopen   # 預設讀取 output/mygopen_archive
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .archive import iter_warc_responses, list_archives
+from .corpus import write_corpus
+from .exporters import JsonLinesWriter, external_sort_reports, iter_report_records
+from .sources import SOURCE_ADAPTERS, get_adapter, parse_archived_source_article
+
+
+def source_paths(source):
+    """
+    來源的預設封存目錄與輸出檔名
+
+    Returns:
+        (封存目錄, 排序輸出檔名前綴, 語料目錄名稱)；TFC 沿用原本的 output/archive 與 corpus
+    """
+    if source == 'tfc':
+        return 'output/archive', 'tfc_reports', 'corpus'
+    return f'output/{source}_archive', f'{source}_reports', f'{source}_corpus'
+
+
+def iter_latest_responses(archive_filenames):
+    """依寫入順序讀取封存，同一網址只保留最後一次封存的回應"""
+    # 第一輪：記錄每個網址最後出現的位置
+    latest = {}
+    position = 0
+    for filename in archive_filenames:
+        for record in iter_warc_responses(filename):
+            latest[record['url']] = position
+            position += 1
+
+    # 第二輪：只輸出最新的版本
+    position = 0
+    for filename in archive_filenames:
+        for record in iter_warc_responses(filename):
+            if latest[record['url']] == position:
+                yield record
+            position += 1
+
+
+def clean_fields(fields):
+    """與 FactcheckerCrawlersPipeline 相同的清理：移除字串欄位前後空白"""
+    return {
+        name: value.strip() if isinstance(value, str) else value
+        for name, value in fields.items()
+    }
+
+
+def reparse_archive(archive_dir, output_dir, workers=None, shard_size=5000, compression='gzip',
+                    content_sidecar=True, sort_chunk_size=2000, source='tfc'):
+    """
+    平行重新解析封存並輸出排序檔與語料
+
+    source 決定解析文章所用的轉接器與輸出檔名（例如 mygopen_reports_sorted.json）。
+
+    Returns:
+        (解析成功筆數, 失敗筆數)
+    """
+    archive_filenames = list_archives(archive_dir)
+    if not archive_filenames:
+        raise FileNotFoundError(f"{archive_dir} 中沒有封存檔")
+
+    adapter = get_adapter(source)
+    _, output_prefix, corpus_name = source_paths(adapter.name)
+
+    os.makedirs(output_dir, exist_ok=True)
+    unsorted_filename = os.path.join(output_dir, f'{output_prefix}_unsorted.jsonl')
+    sorted_filename = os.path.join(output_dir, f'{output_prefix}_sorted.json')
+    workers = workers or os.cpu_count() or 1
+    # 限制進行中的工作數量，封存再大記憶體用量也固定
+    max_pending = workers * 4
+
+    parsed_count = 0
+    failed_count = 0
+    writer = JsonLinesWriter(unsorted_filename)
+
+    def collect(done):
+        nonlocal parsed_count, failed_count
+        for future in done:
+            url = pending.pop(future)
+            try:
+                writer.write(clean_fields(future.result()))
+                parsed_count += 1
+            except Exception as e:
+                failed_count += 1
+                print(f"解析失敗: {url} ({e})")
+        if parsed_count and parsed_count % 500 == 0:
+            print(f"已解析 {parsed_count} 篇文章")
+
+    pending = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for record in iter_latest_responses(archive_filenames):
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = executor.submit(parse_archived_source_article, adapter.name,
+                                         record['url'], record['headers'], record['body'])
+                pending[future] = record['url']
+            collect(wait(pending).done)
+    finally:
+        writer.close()
+
+    if parsed_count:
+        external_sort_reports([unsorted_filename], sorted_filename, chunk_size=sort_chunk_size)
+        write_corpus(
+            iter_report_records(sorted_filename),
+            os.path.join(output_dir, corpus_name),
+            shard_size=shard_size,
+            compression=compression,
+            content_sidecar=content_sidecar
+        )
+
+    return parsed_count, failed_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以目前的解析邏輯離線重新解析封存的文章')
+    parser.add_argument('--source', choices=sorted(SOURCE_ADAPTERS), default='tfc', help='封存的資料來源 (預設: tfc)')
+    parser.add_argument('--archive-dir', default=None, help='封存目錄 (預設: 該來源的封存目錄，TFC 為 output/archive)')
+    parser.add_argument('--output-dir', default='output/reparsed', help='輸出目錄 (預設: output/reparsed)')
+    parser.add_argument('--workers', type=int, default=None, help='worker 數量 (預設: CPU 核心數)')
+    parser.add_argument('--shard-size', type=int, default=5000, help='語料每個分片的筆數 (預設: 5000)')
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default='gzip', help='語料壓縮格式 (預設: gzip)')
+    parser.add_argument('--no-content', action='store_true', help='語料不輸出原始 content sidecar')
+    args = parser.parse_args()
+
+    archive_dir, output_prefix, corpus_name = source_paths(args.source)
+
+    started = time.perf_counter()
+    parsed_count, failed_count = reparse_archive(
+        args.archive_dir or archive_dir,
+        args.output_dir,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        compression=args.compression,
+        content_sidecar=not args.no_content,
+        source=args.source
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"重新解析完成：{parsed_count} 篇成功、{failed_count} 篇失敗，耗時 {elapsed:.1f} 秒"
+          f"（{parsed_count / elapsed:.1f} 篇/秒）")
+    print(f"輸出: {os.path.join(args.output_dir, f'{output_prefix}_sorted.json')}、{os.path.join(args.output_dir, corpus_name)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# 程序內執行爬蟲
+#
+# 不另外啟動 scrapy 子程序，直接在目前的 Python 程序中執行爬蟲，
+# 回傳爬取統計與新爬到的報告，呼叫端可以接著處理資料或更新索引，不必再讀回輸出檔。
+#
+#     from factchecker_crawlers.runner import run_tfc_crawl, run_crawls
+#     result = run_tfc_crawl(end_page=3, incremental=True, collect_items=True)
+#     print(result.finish_reason, len(result.items))
+#
+#     # 多個來源在同一個程序中同時爬取，各自使用 TFC_SOURCE_BUDGETS 中的並行度預算
+#     results = run_crawls(['tfc_spider', 'mygopen_spider'], end_page=3)
+#
+# 注意：Twisted reactor 無法重新啟動，同一個程序只能呼叫一次 run_tfc_crawl / run_crawls。
+# 輸出路徑（output/...）相對於目前的工作目錄。
+
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+os.environ.setdefault('SCRAPY_SETTINGS_MODULE', 'factchecker_crawlers.settings')
+
+from itemadapter import ItemAdapter
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from .spiders.tfc_spider import TfcSpiderSpider
+
+
+@dataclass
+class CrawlResult:
+    """一次爬取的結果"""
+    finish_reason: str
+    stats: Dict[str, Any]
+    # 只有 collect_items=True 時才會保留；報告數請看 stats['item_scraped_count']
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.finish_reason == 'finished'
+
+
+def run_tfc_crawl(start_page: Optional[int] = None,
+                  end_page: Optional[int] = None,
+                  target_url: Optional[str] = None,
+                  incremental: bool = False,
+                  job: Optional[str] = None,
+                  settings: Optional[Dict[str, Any]] = None,
+                  collect_items: bool = False,
+                  **spider_args: Any) -> CrawlResult:
+    """
+    在目前的程序中執行 TFC 爬蟲
+
+    Args:
+        start_page: 起始頁（預設第 1 頁）
+        end_page: 結束頁（預設爬到最後一頁）
+        target_url: 只爬取這篇文章
+        incremental: 增量模式，只爬取尚未見過的報告
+        job: 可續爬模式的 job 名稱（進度保存在 crawls/<job>/）
+        settings: 覆寫的 Scrapy 設定
+        collect_items: 是否在結果中保留爬到的報告（含全文，全站爬取時記憶體用量與報告數成正比，預設關閉）
+        **spider_args: 其他傳給 spider 的參數（例如 base_url）
+
+    Returns:
+        CrawlResult：結束原因、爬取統計與新爬到的報告（collect_items=True 時）
+    """
+    if target_url:
+        spider_args['target_url'] = target_url
+    results = run_crawls(
+        [TfcSpiderSpider],
+        start_page=start_page,
+        end_page=end_page,
+        incremental=incremental,
+        job=job,
+        settings=settings,
+        collect_items=collect_items,
+        **spider_args
+    )
+    return results[TfcSpiderSpider.name]
+
+
+def run_crawls(spiders: Sequence[Any],
+               start_page: Optional[int] = None,
+               end_page: Optional[int] = None,
+               incremental: bool = False,
+               job: Optional[str] = None,
+               settings: Optional[Dict[str, Any]] = None,
+               collect_items: bool = False,
+               **spider_args: Any) -> Dict[str, CrawlResult]:
+    """
+    在同一個程序中同時執行多個來源的爬蟲
+
+    每個 crawler 有自己的設定（TFC_SOURCE_BUDGETS 中的並行度預算、各來源的輸出路徑），
+    共用同一個 reactor，報告資料庫（TFC_DB_PATH）由各來源共用。
+
+    Args:
+        spiders: spider 名稱（例如 'mygopen_spider'）或類別
+        job: 可續爬模式的 job 名稱（每個來源的進度保存在 crawls/<job>/<spider>/）
+        其他參數同 run_tfc_crawl，套用到每個來源
+
+    Returns:
+        {spider 名稱: CrawlResult}
+    """
+    project_settings = get_project_settings()
+    for name, value in (settings or {}).items():
+        project_settings.set(name, value, priority='cmdline')
+
+    if start_page is not None:
+        spider_args['start_page'] = start_page
+    if end_page is not None:
+        spider_args['end_page'] = end_page
+    if incremental:
+        spider_args['incremental'] = True
+
+    items = {}
+    crawlers = {}
+
+    # LOG_STDOUT 會把 sys.stdout 導向日誌，結束後還原給呼叫端
+    stdout = sys.stdout
+    started = time.perf_counter()
+    try:
+        process = CrawlerProcess(project_settings)
+        for spider in spiders:
+            spidercls = process.spider_loader.load(spider) if isinstance(spider, str) else spider
+            crawler = process.create_crawler(spidercls)
+            if job:
+                # 只有一個來源時沿用 crawls/<job>/，與先前的 job 目錄相容
+                jobdir = os.path.join('crawls', job) if len(spiders) == 1 else os.path.join('crawls', job, spidercls.name)
+                crawler.settings.set('JOBDIR', jobdir, priority='cmdline')
+            crawlers[spidercls.name] = crawler
+            items[spidercls.name] = []
+            if collect_items:
+                crawler.signals.connect(_item_collector(items[spidercls.name]), signal=signals.item_scraped, weak=False)
+            process.crawl(crawler, **spider_args)
+        process.start()
+    finally:
+        sys.stdout = stdout
+
+    elapsed = time.perf_counter() - started
+    results = {}
+    for name, crawler in crawlers.items():
+        stats = crawler.stats.get_stats()
+        results[name] = CrawlResult(
+            finish_reason=stats.get('finish_reason', 'unknown'),
+            stats=stats,
+            items=items[name],
+            elapsed_seconds=elapsed
+        )
+    return results
+
+
+def _item_collector(items):
+    def on_item_scraped(item, response, spider):
+        items.append(ItemAdapter(item).asdict())
+    return on_item_scraped
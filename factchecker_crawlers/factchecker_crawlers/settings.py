@@ -26,6 +26,19 @@ CONCURRENT_REQUESTS = 64
 CONCURRENT_REQUESTS_PER_DOMAIN = 32
 DOWNLOAD_DELAY = 0.2
 RANDOMIZE_DOWNLOAD_DELAY = 0.1
+# 已知總頁數後，同時排入的列表頁數量上限（其餘名額留給文章頁）
+TFC_LISTING_CONCURRENCY = 8
+# 文章解析 worker 數量（0 表示在 reactor 執行緒上解析），以及使用 process 或 thread pool
+TFC_PARSE_WORKERS = 0
+TFC_PARSE_EXECUTOR = 'process'
+# 各來源的並行度預算（依來源代號），同一個程序同時爬取多個來源時各自計算：
+#   concurrency：同時進行中的請求上限（覆寫 CONCURRENT_REQUESTS 與自適應並行度上限；
+#                未設定時沿用上面的全域設定）
+#   listing_concurrency：同時排入的列表頁上限
+TFC_SOURCE_BUDGETS = {
+    'tfc': {'listing_concurrency': 8},
+    'mygopen': {'concurrency': 4, 'listing_concurrency': 2},
+}
 
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
@@ -44,28 +57,104 @@ RANDOMIZE_DOWNLOAD_DELAY = 0.1
 #SPIDER_MIDDLEWARES = {
 #    "factchecker_crawlers.middlewares.FactcheckerCrawlersSpiderMiddleware": 543,
 #}
+SPIDER_MIDDLEWARES = {
+    # 排在最靠近 spider 的位置，只計入 callback 本身的 CPU 時間
+    "factchecker_crawlers.middlewares.CallbackTimingSpiderMiddleware": 1000,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "factchecker_crawlers.middlewares.FactcheckerCrawlersDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "factchecker_crawlers.middlewares.FactcheckerCrawlersDownloaderMiddleware": 543,
+    # 數字較小者較晚處理回應：只封存通過重新驗證（內容有變更）的文章
+    "factchecker_crawlers.middlewares.RawArchiveDownloaderMiddleware": 540,
+    # 排在 RetryMiddleware（550）之前處理回應，才看得到被重試的 429 / 503
+    "factchecker_crawlers.middlewares.AdaptiveConcurrencyMiddleware": 560,
+}
+
+# 自適應並行度：延遲穩定時逐步提高每個網域的並行度，遇到 429 / 503 或 p95 延遲上升時退讓
+# 啟用時取代 AutoThrottle 與 DOWNLOAD_DELAY，決策記錄於 stats 的 adaptive/*
+TFC_ADAPTIVE_ENABLED = True
+TFC_ADAPTIVE_MIN_CONCURRENCY = 1
+TFC_ADAPTIVE_MAX_CONCURRENCY = 16
+TFC_ADAPTIVE_START_CONCURRENCY = 4
+TFC_ADAPTIVE_MIN_DELAY = 0.0
+TFC_ADAPTIVE_MAX_DELAY = 10
+# 每收到多少個回應做一次決策；p95 超過基準幾倍視為延遲上升
+TFC_ADAPTIVE_WINDOW = 20
+TFC_ADAPTIVE_LATENCY_TOLERANCE = 1.5
+# 503 / 逾時佔一個窗口的比例達此值才退讓（429 一律退讓）
+TFC_ADAPTIVE_ERROR_THRESHOLD = 0.1
+
+# 文章條件式重新驗證（ETag / Last-Modified / 內容雜湊），未變更的文章不再解析
+TFC_REVALIDATION_ENABLED = True
+TFC_REVALIDATION_DB = 'output/tfc_validators.db'
+
+# 文章原始回應封存（.warc.gz），修改解析邏輯後可用 reparse 離線重新解析
+TFC_ARCHIVE_ENABLED = True
+TFC_ARCHIVE_DIR = 'output/archive'
+# 單一封存檔大小上限（bytes），超過時輪替新檔
+TFC_ARCHIVE_MAX_SIZE = 1073741824
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
 #EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
 #}
+EXTENSIONS = {
+    "factchecker_crawlers.extensions.CrawlMetricsExtension": 500,
+}
+
+# 爬取指標：定期輸出 JSON 與 Prometheus textfile（node_exporter textfile collector）
+TFC_METRICS_ENABLED = True
+TFC_METRICS_INTERVAL = 30
+TFC_METRICS_JSON = 'output/crawl_metrics.json'
+TFC_METRICS_PROM = 'output/crawl_metrics.prom'
+# 計算延遲百分位數時保留的最近樣本數
+TFC_METRICS_LATENCY_WINDOW = 10000
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
     "factchecker_crawlers.pipelines.FactcheckerCrawlersPipeline": 300,
+    "factchecker_crawlers.pipelines.ReportStorePipeline": 400,
+    "factchecker_crawlers.pipelines.StreamingIndexPipeline": 500,
 }
 
+# 是否輸出 <來源>_reports_sorted.json（例如 tfc_reports_sorted.json；關閉時只寫入 SQLite 資料庫）
+TFC_EXPORT_JSON = True
+# SQLite 報告資料庫路徑，以 report_number 為鍵 upsert
+TFC_DB_PATH = 'output/tfc_reports.db'
+# 每寫入多少筆 commit 一次
+TFC_DB_COMMIT_INTERVAL = 100
+
+# 串流 JSONL 輸出：每寫入多少筆才 flush 一次
+TFC_JSONL_FLUSH_INTERVAL = 50
+# 外部合併排序：每個排序分塊的筆數（決定排序時的記憶體上限）
+TFC_SORT_CHUNK_SIZE = 2000
+
+# 壓縮分片語料：由排序檔產生 gzip/zstd 壓縮的 JSONL 分片，原始 content 另存於 sidecar
+TFC_CORPUS_EXPORT = True
+TFC_CORPUS_DIR = 'output/corpus'
+TFC_CORPUS_SHARD_SIZE = 5000
+# 'gzip'（標準函式庫）或 'zstd'（需要安裝 zstandard）
+TFC_CORPUS_COMPRESSION = 'gzip'
+TFC_CORPUS_CONTENT_SIDECAR = True
+
+# 串流索引：邊爬邊嵌入並 upsert 到 rag_system 的 Chroma 集合（需要 rag_system 的依賴套件與 GOOGLE_API_KEY）
+TFC_STREAM_INDEX_ENABLED = False
+TFC_STREAM_INDEX_RAG_DIR = '../rag_system'
+TFC_STREAM_INDEX_STORE = 'vector_store_db'
+TFC_STREAM_INDEX_EMBEDDING_DIM = 768
+# 佇列上限（決定記憶體上限）、每批嵌入篇數、批次未滿時最多等待秒數
+TFC_STREAM_INDEX_QUEUE_SIZE = 200
+TFC_STREAM_INDEX_BATCH_SIZE = 20
+TFC_STREAM_INDEX_FLUSH_INTERVAL = 10
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
-AUTOTHROTTLE_ENABLED = True
+# 由 AdaptiveConcurrencyMiddleware 取代（兩者會互相覆寫下載延遲），關閉 TFC_ADAPTIVE_ENABLED 時再開啟
+AUTOTHROTTLE_ENABLED = False
 # The initial download delay
 AUTOTHROTTLE_START_DELAY = 1
 # The maximum download delay to be set in case of high latencies
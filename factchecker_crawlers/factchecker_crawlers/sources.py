@@ -0,0 +1,113 @@
+# 資料來源轉接器
+#
+# 每個事實查核網站以一個 SourceAdapter 描述：列表頁網址與分頁方式、列表頁中的文章連結、
+# 總頁數，以及文章頁的解析方式。解析結果一律對應到 FactCheckReportItem 的欄位，
+# 所有來源共用同一組 pipeline（JSONL / 排序輸出、SQLite、語料、串流索引）。
+#
+# 爬取流程（列表頁預算、增量 / 可續爬、worker pool 解析）由 spiders/base.py 的
+# FactCheckSpider 負責，新增來源只需要實作轉接器並宣告一個 spider 子類別。
+
+import re
+
+from scrapy.http import HtmlResponse
+
+from . import article_parser, mygopen_parser
+
+
+class SourceAdapter:
+    """事實查核來源轉接器"""
+
+    # 來源代號，也是輸出檔名前綴（output/<name>_reports_sorted.json）
+    name = ''
+    # 正式網站根網址
+    base_url = ''
+
+    def listing_url(self, base_url, page):
+        """第 page 頁列表頁網址"""
+        raise NotImplementedError
+
+    def page_number(self, url):
+        """由列表頁網址取得頁碼"""
+        raise NotImplementedError
+
+    def parse_listing(self, response):
+        """
+        解析列表頁
+
+        Returns:
+            (文章網址列表, 總頁數)；無法取得總頁數時為 None
+        """
+        raise NotImplementedError
+
+    def parse_article(self, response):
+        """解析文章頁，回傳 FactCheckReportItem 的所有欄位"""
+        raise NotImplementedError
+
+
+class TfcAdapter(SourceAdapter):
+    """台灣事實查核中心（tfc-taiwan.org.tw）"""
+
+    name = 'tfc'
+    base_url = 'https://tfc-taiwan.org.tw'
+
+    def listing_url(self, base_url, page):
+        return f"{base_url}/fact-check-reports-all/?pg={page}"
+
+    def page_number(self, url):
+        match = re.search(r'[?&]pg=(\d+)', url)
+        return int(match.group(1)) if match else 1
+
+    def parse_listing(self, response):
+        links = response.css('li.kb-query-item a.kb-section-link-overlay::attr(href)').getall()
+        article_urls = [response.urljoin(link) for link in links if link and '/fact-check-reports/' in link]
+
+        max_pages = response.css('[data-max-num-pages]::attr(data-max-num-pages)').get()
+        return article_urls, int(max_pages) if max_pages else None
+
+    def parse_article(self, response):
+        return article_parser.parse_article_fields(response)
+
+
+class MygopenAdapter(SourceAdapter):
+    """MyGoPen 麥擱騙（www.mygopen.com，Blogger）"""
+
+    name = 'mygopen'
+    base_url = 'https://www.mygopen.com'
+
+    def listing_url(self, base_url, page):
+        return mygopen_parser.feed_url(base_url, page)
+
+    def page_number(self, url):
+        return mygopen_parser.feed_page_number(url)
+
+    def parse_listing(self, response):
+        return mygopen_parser.parse_feed(response)
+
+    def parse_article(self, response):
+        return mygopen_parser.parse_article_fields(response)
+
+
+SOURCE_ADAPTERS = {
+    adapter.name: adapter
+    for adapter in (TfcAdapter(), MygopenAdapter())
+}
+
+
+def get_adapter(name):
+    """依來源代號取得轉接器"""
+    try:
+        return SOURCE_ADAPTERS[name]
+    except KeyError:
+        raise ValueError(f"未知的資料來源: {name}（可用: {', '.join(sorted(SOURCE_ADAPTERS))}）")
+
+
+def parse_source_article(name, url, body, encoding):
+    """worker 入口：由原始回應內容重建 response 後以該來源的轉接器解析（參數與回傳值皆可 pickle）"""
+    response = HtmlResponse(url=url, body=body, encoding=encoding)
+    return get_adapter(name).parse_article(response)
+
+
+def parse_archived_source_article(name, url, headers, body):
+    """worker 入口：由封存的回應標頭與內容重建 response 後以該來源的轉接器解析，編碼判斷與爬取時相同"""
+    response = HtmlResponse(url=url, body=body, headers=headers)
+    return get_adapter(name).parse_article(response)
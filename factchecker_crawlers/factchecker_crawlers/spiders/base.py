@@ -0,0 +1,485 @@
+# 事實查核來源共用的爬蟲框架
+#
+# FactCheckSpider 負責與來源無關的爬取流程：頁數參數、列表頁預算排程、增量模式水位、
+# JOBDIR 可續爬、worker pool 解析與各來源的並行度預算；列表頁與文章頁的網址、
+# 選擇器與查核結果標籤則由各來源的 SourceAdapter（sources.py）提供。
+# 子類別只需要宣告 name、allowed_domains、base_url 與 adapter。
+
+import scrapy
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import urlparse
+from scrapy import signals
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import Deferred
+from twisted.python.failure import Failure
+from ..items import FactCheckReportItem
+from ..exporters import iter_report_records, job_output_path
+from ..sources import parse_source_article
+
+class FactCheckSpider(scrapy.Spider):
+    # 來源轉接器（SourceAdapter），由子類別指定
+    adapter = None
+
+    # 網站根網址（可用 -a base_url=... 指向本機測試站）
+    base_url = None
+
+    # 同時進行中的列表頁請求上限（可由 TFC_LISTING_CONCURRENCY 設定）
+    listing_concurrency = 8
+
+    # 文章解析用的 worker pool（None 表示在 reactor 執行緒上直接解析）
+    parse_executor = None
+
+    # 可續爬模式（設定 JOBDIR 時啟用）
+    resumable = False
+
+    @classmethod
+    def update_settings(cls, settings):
+        """套用 TFC_SOURCE_BUDGETS 中此來源的並行度預算（每個 crawler 各自一份設定）"""
+        super().update_settings(settings)
+        budget = settings.getdict('TFC_SOURCE_BUDGETS').get(cls.adapter.name) or {}
+        if 'concurrency' in budget:
+            concurrency = int(budget['concurrency'])
+            for name in ('CONCURRENT_REQUESTS', 'CONCURRENT_REQUESTS_PER_DOMAIN', 'TFC_ADAPTIVE_MAX_CONCURRENCY'):
+                settings.set(name, concurrency, priority='spider')
+            settings.set('TFC_ADAPTIVE_START_CONCURRENCY',
+                         min(concurrency, settings.getint('TFC_ADAPTIVE_START_CONCURRENCY', 4)), priority='spider')
+        if 'listing_concurrency' in budget:
+            settings.set('TFC_LISTING_CONCURRENCY', int(budget['listing_concurrency']), priority='spider')
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.listing_concurrency = crawler.settings.getint('TFC_LISTING_CONCURRENCY', cls.listing_concurrency)
+
+        # JOBDIR 保存排程佇列、已見過的請求與 spider.state，重新執行同一個 job 時接續爬取
+        spider.jobdir = crawler.settings.get('JOBDIR')
+        spider.resumable = bool(spider.jobdir)
+
+        # 將文章解析移出 reactor 執行緒，讓下載並行度與解析吞吐量分開擴展
+        parse_workers = crawler.settings.getint('TFC_PARSE_WORKERS', 0)
+        if parse_workers > 0:
+            if crawler.settings.get('TFC_PARSE_EXECUTOR', 'process') == 'thread':
+                spider.parse_executor = ThreadPoolExecutor(max_workers=parse_workers)
+            else:
+                spider.parse_executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=get_context('spawn'))
+            spider.logger.info(f"文章解析使用 {parse_workers} 個 worker（{crawler.settings.get('TFC_PARSE_EXECUTOR', 'process')}）")
+        return spider
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.item_count = 0
+
+        # 指向其他網站（例如本機的效能測試站）時，同步調整允許的網域
+        self.base_url = self.base_url.rstrip('/')
+        if self.base_url != type(self).base_url.rstrip('/'):
+            self.allowed_domains = [urlparse(self.base_url).hostname]
+
+        start_page = kwargs.get('start_page')
+        end_page = kwargs.get('end_page')
+
+        if start_page is None and end_page is None and len(args) > 0:
+            if len(args) == 1:
+                # 一個參數：end_page
+                end_page = args[0]
+                start_page = None
+            elif len(args) == 2:
+                # 兩個參數：start_page, end_page
+                start_page = args[0]
+                end_page = args[1]
+
+        if start_page is None and end_page is None:
+            # 沒有輸入參數：從第1頁爬到最後一頁
+            self.start_page = 1
+            self.end_page = None  
+        elif start_page is None and end_page is not None:
+            # 只輸入一個參數：從第1頁開始，爬到指定頁數
+            self.start_page = 1
+            self.end_page = int(end_page)
+        else:
+            # 輸入兩個參數
+            self.start_page = int(start_page) if start_page is not None else 1
+            self.end_page = int(end_page) if end_page is not None else 1
+
+        # 增量模式：只輸出報告編號或更新日期超過水位的報告，遇到整頁都沒有新報告時停止翻頁
+        self.incremental = str(kwargs.get('incremental', '')).lower() in ('1', 'true', 'yes', 'y')
+        self.state_file = kwargs.get('state_file') or f'output/{self.source_key}_crawl_state.json'
+        self._load_crawl_state()
+
+        # 列表頁排程狀態：起始頁已由 start_urls 發出
+        self._next_listing_page = self.start_page + 1
+        self._listing_in_flight = 1
+        self._completed_listing_pages = set()
+
+        # 可續爬模式下已寫入輸出的文章網址
+        self.scraped_urls = set()
+
+        # 檢查是否有目標URL參數
+        if hasattr(self, 'target_url') and self.target_url:
+            self.start_urls = [self.target_url]
+        else:
+            self.start_urls = [self._listing_url(self.start_page)]
+
+    @property
+    def source_key(self):
+        """來源代號，也是輸出檔名前綴"""
+        return self.adapter.name
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        """起始請求；可續爬的 job 已經開始過時，由 JOBDIR 內保存的排程佇列接續"""
+        if self.resumable and self._restore_job_state():
+            return
+
+        for url in self.start_urls:
+            if hasattr(self, 'target_url') and self.target_url:
+                yield scrapy.Request(url, dont_filter=True)
+            else:
+                # 起始列表頁也佔用一個列表頁預算，下載失敗時同樣要釋放
+                yield scrapy.Request(url, dont_filter=True, errback=self._listing_failed)
+
+    def parse(self, response):
+        # 如果是特定文章URL，直接解析文章
+        if hasattr(self, 'target_url') and self.target_url and response.url == self.target_url:
+            yield from self.parse_article(response)
+            return
+        
+        """解析頁面（列表頁面或單篇文章）"""
+        self.logger.info(f"解析頁面: {response.url}")
+        current_page = self._extract_current_page(response.url)
+        
+        try:
+            yield from self._parse_listing_page(response, current_page)
+        except Exception as e:
+            # 解析失敗的列表頁視為已完成，下面照常釋放列表頁預算，避免可用的列表頁請求數逐漸減少
+            self.logger.error(f"解析列表頁失敗: {response.url} ({e!r})")
+            self._completed_listing_pages.add(current_page)
+            self._checkpoint_listing()
+        
+        # 已知總頁數：在列表頁預算內一次排入多個列表頁，每完成一頁就補上一頁
+        if not self.incremental and not (hasattr(self, 'target_url') and self.target_url):
+            self._listing_in_flight -= 1
+            yield from self._schedule_listing_pages()
+
+    def _parse_listing_page(self, response, current_page):
+        """排入列表頁上的文章，並處理分頁"""
+        # 提取文章連結與總頁數
+        article_urls, max_pages = self.adapter.parse_listing(response)
+        
+        self.logger.info(f"找到 {len(article_urls)} 篇文章")
+
+        # 增量模式需要等這一頁的文章都解析完，才能依水位判斷是否繼續翻頁
+        article_meta = {'revalidate': True, 'archive': True}
+        if self.incremental:
+            article_meta['listing_page'] = current_page
+            self._page_pending[current_page] = 0
+            self._page_new_count[current_page] = 0
+
+        # 處理每篇文章
+        for absolute_url in article_urls:
+            if absolute_url in self.scraped_urls:
+                continue
+            if self.incremental:
+                self._page_pending[current_page] += 1
+            yield scrapy.Request(
+                url=absolute_url,
+                callback=self.parse_article if self.parse_executor is None else self.parse_article_offloaded,
+                errback=self._article_failed if self.incremental else None,
+                dont_filter=True,
+                meta=article_meta
+            )
+        
+        # 處理分頁，只爬取指定範圍內的頁面
+        if not hasattr(self, 'target_url') or not self.target_url:
+            self._completed_listing_pages.add(current_page)
+            self._checkpoint_listing()
+
+            if self.end_page is None:
+                self.end_page = max_pages or current_page
+                self.logger.info(f"設定結束頁面為總頁數: {self.end_page}")
+                self._checkpoint_listing()
+
+            # 增量模式逐頁翻頁，由最後一篇文章的回應決定是否排入下一頁
+            if self.incremental and self._page_pending[current_page] == 0:
+                yield from self._finish_incremental_page(current_page)
+
+    def _listing_url(self, page):
+        """列表頁網址"""
+        return self.adapter.listing_url(self.base_url, page)
+
+    def _listing_request(self, page, **kwargs):
+        """建立列表頁請求"""
+        return scrapy.Request(
+            url=self._listing_url(page),
+            callback=self.parse,
+            dont_filter=True,
+            **kwargs
+        )
+
+    def _schedule_listing_pages(self):
+        """補滿列表頁預算：最多同時 listing_concurrency 個列表頁請求"""
+        # 增量模式逐頁翻頁；總頁數未知（起始列表頁失敗）時無法排程
+        if self.incremental or self.end_page is None:
+            return
+        while self._listing_in_flight < self.listing_concurrency and self._next_listing_page <= self.end_page:
+            page = self._next_listing_page
+            self._next_listing_page += 1
+            self._listing_in_flight += 1
+            self.logger.info(f"排入列表頁: {page} (範圍: {self.start_page}-{self.end_page})")
+            self._checkpoint_listing()
+            yield self._listing_request(page, errback=self._listing_failed)
+
+    def _listing_failed(self, failure):
+        """列表頁下載失敗時釋放預算並繼續排程"""
+        self.logger.error(f"列表頁下載失敗: {failure.request.url} ({failure.value!r})")
+        self._completed_listing_pages.add(self._extract_current_page(failure.request.url))
+        self._checkpoint_listing()
+        self._listing_in_flight -= 1
+        yield from self._schedule_listing_pages()
+
+    def parse_article(self, response):
+        """解析單篇文章詳情"""
+        self.logger.info(f"解析文章: {response.url}")
+        
+        try:
+            fields = self.adapter.parse_article(response)
+        except Exception as e:
+            yield from self._article_parse_failed(response, e)
+            return
+        yield from self._article_results(response, fields)
+    
+    async def parse_article_offloaded(self, response):
+        """在 worker pool 中解析文章，reactor 執行緒只負責下載與排程"""
+        self.logger.info(f"解析文章（worker）: {response.url}")
+        
+        try:
+            fields = await maybe_deferred_to_future(self._submit_parse(response))
+        except Exception as e:
+            results = self._article_parse_failed(response, e)
+        else:
+            results = self._article_results(response, fields)
+        for result in results:
+            yield result
+    
+    def _article_results(self, response, fields):
+        """產出文章 item；增量模式只產出超過水位的報告，並在整頁完成時決定是否翻頁"""
+        page = response.meta.get('listing_page')
+        if page is None:
+            yield self._build_item(fields)
+            return
+
+        try:
+            item = self._build_item(fields) if self._is_new_report(fields) else None
+        except Exception as e:
+            yield from self._article_parse_failed(response, e)
+            return
+        if item is not None:
+            self._page_new_count[page] += 1
+            yield item
+        yield from self._article_done(page)
+
+    def _article_parse_failed(self, response, exception):
+        """
+        文章解析失敗：增量模式視為沒有新內容，讓所屬列表頁照常完成並決定是否翻頁；
+        其他模式交由 Scrapy 記錄錯誤
+        """
+        page = response.meta.get('listing_page')
+        if page is None:
+            raise exception
+        self.logger.error(f"解析文章失敗: {response.url} ({exception!r})")
+        # 與 callback 拋出例外時相同，通知 spider_error（重新驗證 middleware 據此刪除驗證資訊）
+        self.crawler.signals.send_catch_log(
+            signal=signals.spider_error, failure=Failure(exception), response=response, spider=self
+        )
+        yield from self._article_done(page)
+
+    def _article_failed(self, failure):
+        """增量模式的文章請求失敗或被略過（例如 304 未變更）時，視為沒有新內容"""
+        self.logger.debug(f"文章未產出報告: {failure.request.url} ({failure.value!r})")
+        yield from self._article_done(failure.request.meta['listing_page'])
+
+    def _article_done(self, page):
+        self._page_pending[page] -= 1
+        if self._page_pending[page] == 0:
+            yield from self._finish_incremental_page(page)
+
+    def _finish_incremental_page(self, page):
+        """增量模式：一頁的文章都處理完後，有新報告才繼續翻頁"""
+        self._page_pending.pop(page, None)
+        new_count = self._page_new_count.pop(page, 0)
+
+        # 列表頁依發布時間排序，整頁都沒有超過水位的報告代表後面的頁面也都爬過了
+        if new_count == 0:
+            self.logger.info(
+                f"第 {page} 頁沒有新報告，停止翻頁"
+                f"（報告編號水位: {self._baseline_report_number}，更新日期水位: {self._baseline_update_date or '無'}）"
+            )
+            return
+
+        if self.end_page is not None and page < self.end_page:
+            next_page = page + 1
+            self.logger.info(f"第 {page} 頁有 {new_count} 篇新報告，準備爬取下一頁: {next_page} (範圍: {self.start_page}-{self.end_page})")
+            self._next_listing_page = next_page + 1
+            self._checkpoint_listing()
+            yield self._listing_request(next_page)
+
+    def _is_new_report(self, fields):
+        """報告編號或更新日期超過本次爬取開始時的水位（沒有任何水位可比對時視為新報告）"""
+        report_number = str(fields.get('report_number') or '').strip()
+        if report_number.isdigit() and int(report_number) > self._baseline_report_number:
+            return True
+
+        # 已發布報告的內容更新會推進更新日期，即使報告編號沒有超過水位也要重新輸出
+        update_date = fields.get('update_date') or fields.get('publish_date') or ''
+        if update_date:
+            return update_date > self._baseline_update_date
+        return not report_number.isdigit()
+    
+    def _submit_parse(self, response):
+        """將文章解析交給 worker pool，回傳在 reactor 執行緒觸發的 Deferred"""
+        from twisted.internet import reactor
+        
+        deferred = Deferred()
+        future = self.parse_executor.submit(parse_source_article, self.adapter.name, response.url, response.body, response.encoding)
+        
+        def on_done(future):
+            exception = future.exception()
+            if exception is not None:
+                reactor.callFromThread(deferred.errback, exception)
+            else:
+                reactor.callFromThread(deferred.callback, future.result())
+        
+        future.add_done_callback(on_done)
+        return deferred
+    
+    def _build_item(self, fields):
+        """由解析結果建立 item 並更新爬取狀態"""
+        item = FactCheckReportItem(**fields)
+        
+        # 更新增量爬取水位
+        self._update_crawl_state(item)
+        
+        # 增加計數器
+        self.item_count += 1
+        self.logger.info(f"已處理 {self.item_count} 篇文章")
+        
+        return item
+    
+    def closed(self, reason):
+        """爬蟲結束時保存增量爬取狀態"""
+        self._save_crawl_state()
+        if self.parse_executor is not None:
+            self.parse_executor.shutdown(wait=True)
+
+    def _checkpoint_listing(self):
+        """將列表頁排程進度寫入 spider.state（由 Scrapy 在爬蟲結束時保存到 JOBDIR）"""
+        if not self.resumable or not hasattr(self, 'state'):
+            return
+        self.state['listing'] = {
+            'start_page': self.start_page,
+            'end_page': self.end_page,
+            'next_listing_page': self._next_listing_page,
+            'completed_pages': sorted(self._completed_listing_pages),
+        }
+
+    def _restore_job_state(self):
+        """
+        載入可續爬 job 的進度，回傳 job 是否已經開始過
+
+        正常停止（Ctrl+C 一次、SIGTERM）時，尚未完成的請求保存在 JOBDIR 的排程佇列中，
+        這裡只需要還原列表頁排程進度。若上次是異常中斷而沒有保存佇列，則從頭掃描列表頁，
+        並略過 job 輸出中已有的文章。
+        """
+        output_filename = job_output_path(self.jobdir, self.source_key)
+        if os.path.exists(output_filename):
+            try:
+                for record in iter_report_records(output_filename):
+                    if record.get('content_url'):
+                        self.scraped_urls.add(record['content_url'])
+            except (OSError, ValueError) as e:
+                self.logger.error(f"讀取 job 輸出失敗: {e}")
+
+        listing = self.state.get('listing')
+        if not listing:
+            if self.scraped_urls:
+                self.logger.info(f"job 沒有保存排程進度，重新掃描列表頁並略過已爬取的 {len(self.scraped_urls)} 篇文章")
+            return False
+
+        self.start_page = listing['start_page']
+        self.end_page = listing['end_page']
+        self._next_listing_page = listing['next_listing_page']
+        self._completed_listing_pages = set(listing['completed_pages'])
+        # 已排入但尚未完成的列表頁仍在排程佇列中，會隨 job 一起恢復
+        self._listing_in_flight = sum(
+            1 for page in range(self.start_page, self._next_listing_page)
+            if page not in self._completed_listing_pages
+        )
+        self.logger.info(
+            f"接續 job：列表頁已完成 {len(self._completed_listing_pages)} 頁，"
+            f"下一頁 {self._next_listing_page}（範圍: {self.start_page}-{self.end_page or '未定'}），"
+            f"job 輸出已有 {len(self.scraped_urls)} 篇文章"
+        )
+        return True
+
+    def _load_crawl_state(self):
+        """載入已爬取報告的水位（最大報告編號與最新更新日期）"""
+        self.max_report_number = 0
+        self.max_update_date = ''
+
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                self.max_report_number = int(state.get('max_report_number') or 0)
+                self.max_update_date = state.get('max_update_date') or ''
+            except (OSError, ValueError) as e:
+                self.logger.error(f"讀取爬取狀態失敗: {e}，將重新建立")
+        elif self.incremental and os.path.exists(f'output/{self.source_key}_reports_sorted.json'):
+            # 第一次使用增量模式：從既有的輸出檔建立水位
+            try:
+                for record in iter_report_records(f'output/{self.source_key}_reports_sorted.json'):
+                    self._update_crawl_state(record)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"從既有輸出建立爬取狀態失敗: {e}")
+
+        # 本次爬取以開始時的水位判斷新報告，爬取中推進的水位留到下次使用
+        self._baseline_report_number = self.max_report_number
+        self._baseline_update_date = self.max_update_date
+        self._page_pending = {}
+        self._page_new_count = {}
+
+        if self.incremental:
+            self.logger.info(f"增量模式：報告編號水位 {self.max_report_number}，更新日期水位 {self.max_update_date or '無'}")
+
+    def _update_crawl_state(self, item):
+        """以一筆報告更新水位"""
+        report_number = str(item.get('report_number') or '').strip()
+        if report_number.isdigit():
+            self.max_report_number = max(self.max_report_number, int(report_number))
+
+        update_date = item.get('update_date') or ''
+        if update_date > self.max_update_date:
+            self.max_update_date = update_date
+
+    def _save_crawl_state(self):
+        """保存增量爬取狀態"""
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            state = {
+                'max_report_number': self.max_report_number,
+                'max_update_date': self.max_update_date
+            }
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"已保存爬取狀態到 {self.state_file}（報告編號水位: {self.max_report_number}）")
+        except OSError as e:
+            self.logger.error(f"保存爬取狀態失敗: {e}")
+
+    def _extract_current_page(self, url):
+        """從URL提取當前頁碼"""
+        return self.adapter.page_number(url)
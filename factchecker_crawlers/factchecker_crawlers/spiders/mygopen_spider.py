@@ -0,0 +1,20 @@
+from ..sources import MygopenAdapter
+from .base import FactCheckSpider
+
+class MygopenSpiderSpider(FactCheckSpider):
+    name = "mygopen_spider"
+    allowed_domains = ["www.mygopen.com"]
+
+    # 網站根網址（可用 -a base_url=... 指向本機測試站）
+    base_url = "https://www.mygopen.com"
+
+    adapter = MygopenAdapter()
+
+    # 與 TFC 分開的驗證資訊、封存、語料與指標檔案；報告資料庫（TFC_DB_PATH）則共用
+    custom_settings = {
+        'TFC_REVALIDATION_DB': 'output/mygopen_validators.db',
+        'TFC_ARCHIVE_DIR': 'output/mygopen_archive',
+        'TFC_CORPUS_DIR': 'output/mygopen_corpus',
+        'TFC_METRICS_JSON': 'output/mygopen_crawl_metrics.json',
+        'TFC_METRICS_PROM': 'output/mygopen_crawl_metrics.prom',
+    }
@@ -0,0 +1,209 @@
+# SQLite 報告資料庫
+#
+# 以 report_number 為鍵 upsert 爬到的報告，重新爬取時直接更新原本的資料列，
+# 不必重寫整份輸出檔。publish_date、update_date、check_result 建有索引，
+# 方便下游以索引查詢「最新 N 筆」或日期區間。
+
+import json
+import sqlite3
+from datetime import datetime
+
+REPORT_FIELDS = [
+    'content_url', 'source', 'title', 'content', 'processed_content', 'check_result',
+    'publish_date', 'update_date', 'categories', 'report_number', 'reporter', 'editor'
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_key TEXT PRIMARY KEY,
+    report_number INTEGER,
+    content_url TEXT,
+    source TEXT,
+    title TEXT,
+    content TEXT,
+    processed_content TEXT,
+    check_result TEXT,
+    publish_date TEXT,
+    update_date TEXT,
+    categories TEXT,
+    reporter TEXT,
+    editor TEXT,
+    crawled_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reports_report_number ON reports (report_number);
+CREATE INDEX IF NOT EXISTS idx_reports_publish_date ON reports (publish_date);
+CREATE INDEX IF NOT EXISTS idx_reports_update_date ON reports (update_date);
+CREATE INDEX IF NOT EXISTS idx_reports_check_result ON reports (check_result);
+CREATE INDEX IF NOT EXISTS idx_reports_source_publish_date ON reports (source, publish_date);
+"""
+
+UPSERT_SQL = """
+INSERT INTO reports (
+    report_key, report_number, content_url, source, title, content, processed_content,
+    check_result, publish_date, update_date, categories, reporter, editor, crawled_at
+) VALUES (
+    :report_key, :report_number, :content_url, :source, :title, :content, :processed_content,
+    :check_result, :publish_date, :update_date, :categories, :reporter, :editor, :crawled_at
+)
+ON CONFLICT (report_key) DO UPDATE SET
+    report_number = excluded.report_number,
+    content_url = excluded.content_url,
+    source = excluded.source,
+    title = excluded.title,
+    content = excluded.content,
+    processed_content = excluded.processed_content,
+    check_result = excluded.check_result,
+    publish_date = excluded.publish_date,
+    update_date = excluded.update_date,
+    categories = excluded.categories,
+    reporter = excluded.reporter,
+    editor = excluded.editor,
+    crawled_at = excluded.crawled_at
+"""
+
+
+def report_key(item):
+    """資料列主鍵：有報告編號時使用編號，否則退回文章網址"""
+    report_number = str(item.get('report_number') or '').strip()
+    if report_number:
+        return report_number
+    return f"url:{item.get('content_url', '')}"
+
+
+class ReportStore:
+    """以 SQLite 儲存事實查核報告"""
+
+    def __init__(self, db_path, read_only=False):
+        """
+        Args:
+            db_path: 資料庫路徑
+            read_only: 唯讀開啟既有的資料庫（下游讀取用，不建立資料表也不改變日誌模式）
+        """
+        self.db_path = db_path
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            self.conn.row_factory = sqlite3.Row
+            return
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL 模式讓寫入時仍可讀取，並減少每次 commit 的 fsync 成本
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def upsert(self, item):
+        """新增或更新一筆報告"""
+        report_number = str(item.get('report_number') or '').strip()
+        row = {field: item.get(field) or '' for field in REPORT_FIELDS}
+        row['report_key'] = report_key(item)
+        row['report_number'] = int(report_number) if report_number.isdigit() else None
+        row['categories'] = json.dumps(item.get('categories') or [], ensure_ascii=False)
+        row['crawled_at'] = datetime.now().isoformat(timespec='seconds')
+        self.conn.execute(UPSERT_SQL, row)
+
+    def iter_reports(self, limit=None, start_date=None, end_date=None, source=None):
+        """
+        依發佈日期由新到舊逐筆讀取報告（同一天依報告編號）
+
+        rag_system 的 TFCDataProcessor 也以此方法讀取資料庫。
+
+        Args:
+            limit: 最多讀取幾筆（None 表示全部）
+            start_date: 發佈日期下限（含），格式 YYYY-MM-DD
+            end_date: 發佈日期上限（含），格式 YYYY-MM-DD
+            source: 只讀取此來源的報告（例如 'TFC'）
+        """
+        conditions = []
+        params = []
+        if source:
+            conditions.append('source = ?')
+            params.append(source)
+        if start_date:
+            conditions.append('publish_date >= ?')
+            params.append(start_date)
+        if end_date:
+            conditions.append('publish_date <= ?')
+            params.append(end_date)
+
+        sql = f"SELECT {', '.join(REPORT_FIELDS)} FROM reports"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        # 多個來源共用資料庫（MyGoPen 沒有報告編號），依發佈日期交錯排列，最新 N 筆不會只取到單一來源
+        sql += ' ORDER BY publish_date DESC, report_number DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        for row in self.conn.execute(sql, params):
+            record = dict(row)
+            record['report_number'] = str(record['report_number']) if record['report_number'] is not None else ''
+            record['categories'] = json.loads(record['categories'] or '[]')
+            yield record
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+VALIDATOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS http_validators (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    body_hash TEXT,
+    checked_at TEXT
+);
+"""
+
+
+class ValidatorStore:
+    """以 SQLite 儲存每篇文章的 ETag、Last-Modified 與內容雜湊，供條件式請求使用"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(VALIDATOR_SCHEMA)
+
+    def get(self, url):
+        """取得文章的驗證資訊，沒有紀錄時回傳 None"""
+        row = self.conn.execute(
+            'SELECT etag, last_modified, body_hash FROM http_validators WHERE url = ?', (url,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def set(self, url, etag, last_modified, body_hash):
+        self.conn.execute(
+            """
+            INSERT INTO http_validators (url, etag, last_modified, body_hash, checked_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                body_hash = excluded.body_hash,
+                checked_at = excluded.checked_at
+            """,
+            (url, etag, last_modified, body_hash, datetime.now().isoformat(timespec='seconds'))
+        )
+
+    def delete(self, url):
+        self.conn.execute('DELETE FROM http_validators WHERE url = ?', (url,))
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM http_validators').fetchone()[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
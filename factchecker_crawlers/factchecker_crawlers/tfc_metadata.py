@@ -0,0 +1,224 @@
+# TFC 文章 metadata 解析
+#
+# 所有正規表示式在模組載入時預先編譯。每個樣式都先以字面字串做 C 層級的
+# 子字串檢查，確定可能匹配才執行 regex，因此大部分文章只需掃過內容幾次，
+# 輸出與原本逐一 re.search / re.sub 的版本完全相同。
+
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+CLASSIFICATIONS = '錯誤|部分錯誤|事實釐清|正確|易生誤解|證據不足'
+
+SHARE_MARKER = 'Share on Facebook Share on Threads Share on Pinterest Share on LINE Email this Page Print this Page'
+SHARE_RE = re.compile(re.escape(SHARE_MARKER) + r'\s*')
+
+# 完整 metadata 樣式，按優先順序：(名稱, 必要字面字串, 樣式, 欄位對應群組)
+FULL_PATTERNS = [
+    # 模式1: 完整的舊版格式
+    (
+        'legacy_complete',
+        ('報告編號', '責任編輯'),
+        re.compile(r'(錯誤|部分錯誤|事實釐清|正確)\s+(.*?)\s+發佈：?\s*(\d{4}-\d{2}-\d{2})\s*(?:更新：?\s*(\d{4}-\d{2}-\d{2}))?\s*報告編號\s*：?\s*(\d+)\s*(?:查核)?記者：?\s*([^責]+?)\s*責任編輯：?\s*([^\s內容背景查核]+)'),
+        {'check_result': 1, 'categories': 2, 'publish_date': 3,
+         'update_date': 4, 'report_number': 5, 'reporter': 6, 'editor': 7}
+    ),
+    # 模式2: 新版格式（含更新版本）
+    (
+        'new_format_with_update',
+        ('事實查核報告#', '【報告將隨時更新'),
+        re.compile(r'事實查核報告#(\d+)\s+【([^】]+)】.*?發布日期／(\d{4}-\d{2}-\d{2})\s+\d{2}:\d{2}:\d{2}\s+【報告將隨時更新\s+(\d{4}/\d{2}/\d{2})版】'),
+        {'report_number': 1, 'check_result': 2, 'publish_date': 3, 'update_date': 4}
+    ),
+    # 模式3: 舊版事實查核報告格式
+    (
+        'old_fact_check_format',
+        ('事實查核報告#', '發布日期／'),
+        re.compile(r'事實查核報告#(\d+)\s+【([^】]+)】[^發]*?發布日期／(\d{4}-\d{2}-\d{2})\s+\d{2}:\d{2}:\d{2}'),
+        {'report_number': 1, 'check_result': 2, 'publish_date': 3}
+    ),
+]
+
+# 逐欄位提取用的樣式
+BRACKET_CLASS_RE = re.compile(rf'【({CLASSIFICATIONS})】')
+BARE_CLASS_RE = re.compile(rf'(?:^|\s)({CLASSIFICATIONS})(?:\s|$)')
+PUBLISH_DATE_RES = [
+    ('發佈', re.compile(r'發佈：?\s*(\d{4}-\d{2}-\d{2})')),
+    ('發布日期／', re.compile(r'發布日期／(\d{4}-\d{2}-\d{2})')),
+]
+UPDATE_DATE_RE = re.compile(r'更新：?\s*(\d{4}-\d{2}-\d{2})')
+REPORT_NUMBER_RES = [
+    ('事實查核報告#', re.compile(r'事實查核報告#(\d+)')),
+    ('報告編號', re.compile(r'報告編號\s*：?\s*(\d+)')),
+]
+REPORTER_EDITOR_RE = re.compile(r'（記者：([^；]+)；責任編輯：([^）]+)）')
+REPORTER_RE = re.compile(r'(?:查核)?記者：?\s*([^責任編輯]+?)(?:\s*責任編輯|$)')
+EDITOR_RE = re.compile(r'責任編輯：?\s*([^\s內容背景查核]+)')
+
+# 清理處理後內容的樣式（皆以 MULTILINE 模式套用）：(必要字面字串, 樣式)
+CLEANUP_PATTERNS = [
+    (('【報告將隨時更新',), re.compile(r'【報告將隨時更新[^】]*】\s*', re.MULTILINE)),
+    (('事實查核報告#', '發布日期／'), re.compile(r'^事實查核報告#\d+\s+.*?發布日期／\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*', re.MULTILINE)),
+    (('【', '發布日期／'), re.compile(r'^【[^】]+】.*?發布日期／\d{4}-\d{2}-\d{2}.*$', re.MULTILINE)),
+    (('事實查核報告#', '【報告將隨時更新'), re.compile(r'事實查核報告#\d+\s+【[^】]+】[^【]*【報告將隨時更新[^】]*】\s*', re.MULTILINE)),
+    (('事實查核報告#', '發布日期／'), re.compile(r'事實查核報告#\d+\s+【[^】]+】[^一二三四五六七八九十]*?發布日期／\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s*', re.MULTILINE)),
+]
+
+
+def _contains_all(content, literals):
+    return all(literal in content for literal in literals)
+
+
+def parse_content_metadata(content, title=''):
+    """從content中解析metadata並提取純內容"""
+    result = {
+        'check_result': '',
+        'publish_date': '',
+        'update_date': '',
+        'categories': [],
+        'report_number': '',
+        'reporter': '',
+        'editor': '',
+        'processed_content': content
+    }
+
+    if not content:
+        return result
+
+    # 預處理：找到文章正文起始位置
+    result['processed_content'] = extract_article_content(content)
+
+    # 嘗試不同的 metadata 模式匹配，按優先順序
+    matched = False
+    for name, literals, pattern, groups in FULL_PATTERNS:
+        if not _contains_all(content, literals):
+            continue
+        match = pattern.search(content)
+        if match:
+            _extract_from_match(result, match, groups)
+            matched = True
+
+            # 特殊處理：更新日期格式轉換
+            if name == 'new_format_with_update' and result['update_date']:
+                result['update_date'] = result['update_date'].replace('/', '-')
+
+            # 如果沒有更新日期，使用發布日期
+            if not result['update_date'] and result['publish_date']:
+                result['update_date'] = result['publish_date']
+
+            break
+
+    # 如果沒有匹配到完整格式，逐個提取字段
+    if not matched:
+        _extract_individual_fields(result, content)
+
+    # 如果仍然沒有分類結果，從標題中提取（針對 migration 文章）
+    if not result['check_result']:
+        result['check_result'] = extract_from_title(title)
+
+    # 統一處理分類重新歸類
+    result['check_result'] = normalize_classification(result['check_result'])
+
+    # 清理處理後的內容
+    result['processed_content'] = clean_processed_content(result['processed_content'])
+
+    return result
+
+
+def extract_article_content(content):
+    """提取文章正文內容（以分享按鈕位置作為文章起始點）"""
+    position = content.find(SHARE_MARKER)
+    if position < 0:
+        return content
+    return content[SHARE_RE.match(content, position).end():].strip()
+
+
+def _extract_from_match(result, match, groups):
+    """從正則匹配結果中提取數據"""
+    group_count = len(match.groups())
+    for field, group_index in groups.items():
+        if group_index <= group_count and match.group(group_index):
+            value = match.group(group_index).strip()
+
+            if field == 'categories':
+                result[field] = [value]
+            elif field == 'reporter':
+                result[field] = value.rstrip('、')
+            else:
+                result[field] = value
+
+
+def _extract_individual_fields(result, content):
+    """逐個提取各個字段"""
+    # 提取分類：先找標題格式，再找內容前1000字符
+    match = BRACKET_CLASS_RE.search(content) if '【' in content else None
+    if not match:
+        match = BARE_CLASS_RE.search(content[:1000])
+    if match:
+        result['check_result'] = match.group(1)
+
+    # 提取日期
+    for literal, pattern in PUBLISH_DATE_RES:
+        if literal in content:
+            match = pattern.search(content)
+            if match:
+                result['publish_date'] = match.group(1)
+                break
+
+    # 提取更新日期
+    update_match = UPDATE_DATE_RE.search(content) if '更新' in content else None
+    if update_match:
+        result['update_date'] = update_match.group(1)
+    elif result['publish_date']:
+        result['update_date'] = result['publish_date']
+
+    # 提取報告編號
+    for literal, pattern in REPORT_NUMBER_RES:
+        if literal in content:
+            match = pattern.search(content)
+            if match:
+                result['report_number'] = match.group(1)
+                break
+
+    # 提取記者和編輯信息
+    # 嘗試括號格式
+    reporter_editor_match = REPORTER_EDITOR_RE.search(content) if '（記者：' in content else None
+    if reporter_editor_match:
+        result['reporter'] = reporter_editor_match.group(1).strip()
+        result['editor'] = reporter_editor_match.group(2).strip()
+    else:
+        # 分別提取
+        reporter_match = REPORTER_RE.search(content) if '記者' in content else None
+        if reporter_match:
+            result['reporter'] = reporter_match.group(1).strip().rstrip('、')
+
+        editor_match = EDITOR_RE.search(content) if '責任編輯' in content else None
+        if editor_match:
+            result['editor'] = editor_match.group(1).strip()
+
+
+def extract_from_title(title):
+    """從標題中提取分類（針對 migration 文章）"""
+    if title:
+        title_match = BRACKET_CLASS_RE.search(title)
+        if title_match:
+            logger.info(f"從標題中提取到分類: {title_match.group(1)}")
+            return title_match.group(1)
+    return ''
+
+
+def normalize_classification(classification):
+    """統一處理分類標準化"""
+    if classification == '易生誤解':
+        return '錯誤'
+    return classification
+
+
+def clean_processed_content(content):
+    """清理處理後的內容，移除 metadata"""
+    for literals, pattern in CLEANUP_PATTERNS:
+        if _contains_all(content, literals):
+            content = pattern.sub('', content)
+
+    return content.strip()
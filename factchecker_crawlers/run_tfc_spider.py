@@ -1,7 +1,8 @@
 import sys
-import subprocess
 import os
 
+from factchecker_crawlers.runner import run_tfc_crawl
+
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     project_dir = script_dir 
@@ -9,9 +10,23 @@ def main():
     # 解析參數
     args = sys.argv[1:]
 
+    # 增量模式：只爬取尚未見過的新報告
+    incremental = '--incremental' in args
+    args = [arg for arg in args if arg != '--incremental']
+
+    # 可續爬模式：同一個 job 名稱重新執行時接續上次的進度
+    job = None
+    if '--job' in args:
+        index = args.index('--job')
+        if index + 1 >= len(args):
+            print("錯誤：--job 需要指定 job 名稱")
+            sys.exit(1)
+        job = args[index + 1]
+        args = args[:index] + args[index + 2:]
+
     if len(args) == 0:
         # 沒有參數：爬取所有頁面
-        cmd = ['scrapy', 'crawl', 'tfc_spider']
+        crawl_args = {}
     elif len(args) == 1:
         arg = args[0]
         if arg in ['--help', '-h', 'help']:
@@ -21,16 +36,18 @@ def main():
             print("  python run_tfc_spider.py <pages>                       # 爬取前 N 頁")
             print("  python run_tfc_spider.py <start> <end>                 # 爬取從 start 到 end 頁")
             print("  python run_tfc_spider.py https://tfc-taiwan.org.tw...  # 爬取特定文章")
+            print("  python run_tfc_spider.py --incremental                 # 增量爬取（整頁都沒有超過水位的報告時停止）")
+            print("  python run_tfc_spider.py --job <name> [...]            # 可續爬模式（中斷後以同一名稱重新執行即可接續）")
             print("  python run_tfc_spider.py --help                        # 顯示此幫助信息")
             sys.exit(0)
         elif arg.startswith('http'):
             # URL 參數：爬取特定文章
-            cmd = ['scrapy', 'crawl', 'tfc_spider', '-a', f'target_url={arg}']
+            crawl_args = {'target_url': arg}
         else:
             # 一個參數：爬取前 N 頁
             try:
                 pages = int(arg)
-                cmd = ['scrapy', 'crawl', 'tfc_spider', '-a', f'end_page={pages}']
+                crawl_args = {'end_page': pages}
             except ValueError:
                 print(f"錯誤：參數必須是數字或 URL，得到：{arg}")
                 sys.exit(1)
@@ -39,7 +56,7 @@ def main():
         try:
             start_page = int(args[0])
             end_page = int(args[1])
-            cmd = ['scrapy', 'crawl', 'tfc_spider', '-a', f'start_page={start_page}', '-a', f'end_page={end_page}']
+            crawl_args = {'start_page': start_page, 'end_page': end_page}
         except ValueError:
             print(f"錯誤：參數必須是數字，得到：{args[0]}, {args[1]}")
             sys.exit(1)
@@ -49,16 +66,23 @@ def main():
         print("  python run_tfc_spider.py <pages>                       # 爬取前 N 頁")
         print("  python run_tfc_spider.py <start> <end>                 # 爬取從 start 到 end 頁")
         print("  python run_tfc_spider.py https://tfc-taiwan.org.tw...  # 爬取特定文章")
+        print("  python run_tfc_spider.py --incremental                 # 增量爬取（整頁都沒有超過水位的報告時停止）")
+        print("  python run_tfc_spider.py --job <name> [...]            # 可續爬模式（中斷後以同一名稱重新執行即可接續）")
         print("  python run_tfc_spider.py --help                        # 顯示此幫助信息")
         sys.exit(1)
 
-    # 切換到專案目錄並執行命令
+    # 切換到專案目錄，輸出檔寫在 output/ 下
     os.chdir(project_dir)
-    print(f"執行命令：{' '.join(cmd)}")
-    result = subprocess.run(cmd)
 
-    # 返回 Scrapy 的退出碼
-    sys.exit(result.returncode)
+    # 在目前的程序中執行爬蟲（Ctrl+C 一次會完成進行中的請求並保存 job 進度）
+    result = run_tfc_crawl(incremental=incremental, job=job, **crawl_args)
+
+    print(f"爬取結束（{result.finish_reason}）：新增 {result.stats.get('item_scraped_count', 0)} 篇報告，"
+          f"請求 {result.stats.get('downloader/request_count', 0)} 次，耗時 {result.elapsed_seconds:.1f} 秒")
+    if job and not result.succeeded:
+        print(f"進度已保存，重新執行 --job {job} 即可接續")
+
+    sys.exit(0 if result.succeeded else 1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 與 scrapy.cfg 相同，以 factchecker_crawlers 目錄為專案根目錄
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
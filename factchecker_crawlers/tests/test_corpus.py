@@ -0,0 +1,34 @@
+import os
+
+from factchecker_crawlers.corpus import iter_corpus, write_corpus
+
+
+def reports(*numbers):
+    return [{'report_number': str(n), 'title': f"報告{n}", 'content': f"原文{n}"} for n in numbers]
+
+
+def test_rewrite_replaces_previous_corpus(tmp_path):
+    corpus_dir = str(tmp_path / 'corpus')
+    write_corpus(reports(3, 2, 1), corpus_dir, shard_size=2)
+
+    write_corpus(reports(5, 4), corpus_dir, shard_size=2)
+
+    assert [r['report_number'] for r in iter_corpus(corpus_dir, include_content=True)] == ['5', '4']
+    assert sorted(os.listdir(tmp_path)) == ['corpus']
+
+
+def test_restores_corpus_moved_aside_by_interrupted_write(tmp_path):
+    corpus_dir = str(tmp_path / 'corpus')
+    write_corpus(reports(2, 1), corpus_dir)
+    os.replace(corpus_dir, corpus_dir + '.old')
+
+    def failing_records():
+        yield from reports(3)
+        raise RuntimeError('來源讀取失敗')
+
+    try:
+        write_corpus(failing_records(), corpus_dir)
+    except RuntimeError:
+        pass
+
+    assert [r['report_number'] for r in iter_corpus(corpus_dir)] == ['2', '1']
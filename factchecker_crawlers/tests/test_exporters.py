@@ -0,0 +1,80 @@
+import json
+import os
+
+from factchecker_crawlers.exporters import external_sort_reports, iter_report_records, job_output_path
+
+
+def write_jsonl(path, records):
+    path.write_text(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records), encoding='utf-8')
+    return str(path)
+
+
+def sort_reports(tmp_path, *sources, chunk_size=2):
+    output = str(tmp_path / 'sorted.json')
+    count = external_sort_reports(list(sources), output, chunk_size=chunk_size)
+    records = list(iter_report_records(output))
+    assert count == len(records)
+    return records
+
+
+def test_sorts_by_report_number_across_runs(tmp_path):
+    source = write_jsonl(tmp_path / 'a.jsonl', [
+        {'report_number': '3', 'content_url': 'u3'},
+        {'report_number': '10', 'content_url': 'u10'},
+        {'report_number': '7', 'content_url': 'u7'},
+        {'report_number': '12', 'content_url': 'u12'},
+        {'report_number': '1', 'content_url': 'u1'},
+    ])
+
+    records = sort_reports(tmp_path, source)
+
+    assert [r['report_number'] for r in records] == ['12', '10', '7', '3', '1']
+
+
+def test_deduplicates_by_report_number_keeping_earlier_source(tmp_path):
+    new = write_jsonl(tmp_path / 'new.jsonl', [
+        {'report_number': '5', 'content_url': 'u5', 'title': '新'},
+        {'report_number': '4', 'content_url': 'u4', 'title': '新'},
+    ])
+    old = write_jsonl(tmp_path / 'old.jsonl', [
+        {'report_number': '6', 'content_url': 'u6', 'title': '舊'},
+        {'report_number': '5', 'content_url': 'u5', 'title': '舊'},
+        {'report_number': '4', 'content_url': 'u4', 'title': '舊'},
+    ])
+
+    records = sort_reports(tmp_path, new, old)
+
+    assert [(r['report_number'], r['title']) for r in records] == [('6', '舊'), ('5', '新'), ('4', '新')]
+
+
+def test_deduplicates_reports_without_number_by_url(tmp_path):
+    new = write_jsonl(tmp_path / 'new.jsonl', [
+        {'report_number': '', 'content_url': 'https://www.mygopen.com/a', 'title': '新'},
+        {'report_number': '2', 'content_url': 'u2'},
+    ])
+    old = write_jsonl(tmp_path / 'old.jsonl', [
+        {'report_number': '', 'content_url': 'https://www.mygopen.com/b', 'title': '舊'},
+        {'report_number': '', 'content_url': 'https://www.mygopen.com/a', 'title': '舊'},
+    ])
+
+    records = sort_reports(tmp_path, new, old)
+
+    assert [(r['content_url'], r.get('title')) for r in records] == [
+        ('u2', None),
+        ('https://www.mygopen.com/a', '新'),
+        ('https://www.mygopen.com/b', '舊'),
+    ]
+
+
+def test_output_may_replace_source(tmp_path):
+    path = tmp_path / 'reports.json'
+    write_jsonl(path, [{'report_number': '1'}, {'report_number': '2'}, {'report_number': '2'}])
+
+    external_sort_reports([str(path)], str(path))
+
+    assert [r['report_number'] for r in iter_report_records(str(path))] == ['2', '1']
+
+
+def test_job_output_is_named_after_source():
+    assert job_output_path('jobs/tfc', 'tfc') == os.path.join('jobs/tfc', 'tfc_reports_unsorted.jsonl')
+    assert job_output_path('jobs/mygopen', 'mygopen') == os.path.join('jobs/mygopen', 'mygopen_reports_unsorted.jsonl')
@@ -0,0 +1,88 @@
+import pytest
+import scrapy
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from factchecker_crawlers.sources import TfcAdapter
+from factchecker_crawlers.spiders.tfc_spider import TfcSpiderSpider
+
+BASE_URL = 'https://tfc-taiwan.org.tw'
+
+
+class StubAdapter(TfcAdapter):
+    """列表頁固定兩篇文章；fields 為 None 的文章解析失敗"""
+
+    def __init__(self, articles):
+        self.articles = articles
+
+    def parse_listing(self, response):
+        return list(self.articles), 3
+
+    def parse_article(self, response):
+        fields = self.articles[response.url]
+        if fields is None:
+            raise ValueError('版面改變')
+        return dict(fields, content_url=response.url)
+
+
+@pytest.fixture
+def make_spider(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def make(articles):
+        spider = TfcSpiderSpider.from_crawler(
+            get_crawler(TfcSpiderSpider), incremental='true', state_file=str(tmp_path / 'state.json')
+        )
+        spider.adapter = StubAdapter(articles)
+        return spider
+    return make
+
+
+def crawl_listing_page(spider, page=1):
+    """解析一頁列表頁並依序處理其中的文章，回傳所有文章產出的結果"""
+    listing = HtmlResponse(spider._listing_url(page), body=b'<html></html>', encoding='utf-8')
+    requests = [r for r in spider._parse_listing_page(listing, page) if isinstance(r, scrapy.Request)]
+
+    results = []
+    for request in requests:
+        response = HtmlResponse(request.url, body=b'<html></html>', encoding='utf-8', request=request)
+        results.extend(spider.parse_article(response))
+    return results
+
+
+def listing_requests(results):
+    return [r for r in results if isinstance(r, scrapy.Request)]
+
+
+def test_failed_article_still_completes_listing_page(make_spider):
+    spider = make_spider({
+        f'{BASE_URL}/articles/1': None,
+        f'{BASE_URL}/articles/2': {'report_number': '100', 'update_date': '2024-01-02'},
+    })
+
+    results = crawl_listing_page(spider)
+
+    assert [r['report_number'] for r in results if not isinstance(r, scrapy.Request)] == ['100']
+    assert [r.url for r in listing_requests(results)] == [spider._listing_url(2)]
+    assert spider._page_pending == {}
+
+
+def test_page_with_only_failed_articles_stops_paging(make_spider):
+    spider = make_spider({
+        f'{BASE_URL}/articles/1': None,
+        f'{BASE_URL}/articles/2': None,
+    })
+
+    results = crawl_listing_page(spider)
+
+    assert results == []
+    assert spider._page_pending == {}
+
+
+def test_failed_article_outside_incremental_mode_raises(make_spider):
+    spider = make_spider({f'{BASE_URL}/articles/1': None})
+    response = HtmlResponse(f'{BASE_URL}/articles/1', body=b'<html></html>', encoding='utf-8',
+                            request=scrapy.Request(f'{BASE_URL}/articles/1'))
+
+    with pytest.raises(ValueError):
+        list(spider.parse_article(response))
@@ -0,0 +1,52 @@
+import pytest
+import scrapy
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+
+from factchecker_crawlers.middlewares import FactcheckerCrawlersDownloaderMiddleware
+from factchecker_crawlers.spiders.tfc_spider import TfcSpiderSpider
+
+URL = 'https://tfc-taiwan.org.tw/articles/1'
+
+
+@pytest.fixture
+def middleware(tmp_path):
+    crawler = get_crawler(TfcSpiderSpider, {'TFC_REVALIDATION_DB': str(tmp_path / 'validators.db')})
+    spider = TfcSpiderSpider.from_crawler(crawler)
+    middleware = FactcheckerCrawlersDownloaderMiddleware.from_crawler(crawler)
+    middleware.spider_opened(spider)
+    yield middleware, spider
+    middleware.spider_closed(spider)
+
+
+def fetch(middleware, spider, body=b'<html>v1</html>', status=200):
+    request = scrapy.Request(URL, meta={'revalidate': True})
+    middleware.process_request(request, spider)
+    response = HtmlResponse(URL, status=status, body=body, headers={'ETag': '"v1"'}, request=request)
+    return request, middleware.process_response(request, response, spider)
+
+
+def test_stores_validators_when_response_is_received(middleware):
+    middleware, spider = middleware
+
+    fetch(middleware, spider)
+    request = scrapy.Request(URL, meta={'revalidate': True})
+    middleware.process_request(request, spider)
+
+    # 沒有產出 item（例如低於增量水位）也會送出條件式請求
+    assert request.headers['If-None-Match'] == b'"v1"'
+    with pytest.raises(IgnoreRequest):
+        fetch(middleware, spider)
+
+
+def test_forgets_validators_when_article_fails_to_parse(middleware):
+    middleware, spider = middleware
+    _, response = fetch(middleware, spider)
+
+    middleware.spider_error(Failure(ValueError('版面改變')), response, spider)
+
+    assert middleware.store.get(URL) is None
+    _, response = fetch(middleware, spider)
+    assert response.status == 200
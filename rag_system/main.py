@@ -4,7 +4,6 @@
 """
 import os
 import sys
-import json
 import logging
 import argparse
 from pathlib import Path
@@ -16,7 +15,11 @@ sys.path.append(str(current_dir))
 
 try:
     from modules.logger import setup_logging, get_logger
-    from modules.data_processor import TFCDataProcessor
+    from modules.data_processor import TFCDataProcessor, iter_json_records
+    from modules.change_manifest import ProcessingManifest
+    from modules.near_duplicate import NearDuplicateDetector
+    from modules.boilerplate import BoilerplateStripper
+    from modules.gemini_tokenizer import get_gemini_tokenizer
     from modules.embedding import FactCheckEmbedding
     from modules.vector_index import FactCheckVectorStore
     from modules.retriever import FactCheckRetriever
@@ -36,7 +39,9 @@ class FactCheckRAGSystem:
     def __init__(self, 
                  data_limit: int = 1000,
                  embedding_dim: int = 768,
-                 similarity_top_k: int = 3):
+                 similarity_top_k: int = 3,
+                 parse_workers: Optional[int] = None,
+                 raw_input: str = 'json'):
         """
         初始化 RAG 系統
         
@@ -44,18 +49,30 @@ class FactCheckRAGSystem:
             data_limit: 處理的資料數量限制
             embedding_dim: 嵌入向量維度
             similarity_top_k: 相似性搜索返回數量
+            parse_workers: 切分分層節點的 worker 數量（預設為 CPU 核心數）
+            raw_input: 原始資料來源（json：排序後的 JSON 輸出；sqlite：爬蟲的 SQLite 資料庫；
+                       corpus：壓縮分片語料）
         """
         self.data_limit = data_limit
         self.embedding_dim = embedding_dim
         self.similarity_top_k = similarity_top_k
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.raw_input = raw_input
         
         # 設定檔案路徑
-        self.raw_data_path = "../factchecker_crawlers/output/tfc_reports_sorted.json"
+        self.raw_data_paths = {
+            'json': "../factchecker_crawlers/output/tfc_reports_sorted.json",
+            'sqlite': "../factchecker_crawlers/output/tfc_reports.db",
+            'corpus': "../factchecker_crawlers/output/corpus",
+        }
         self.processed_data_path = "data/processed_tfc_data.json"
+        self.manifest_path = "data/processed_tfc_manifest.json"
+        self.clusters_path = "data/processed_tfc_clusters.json"
         self.vector_store_path = "vector_store_db"
         
         # 初始化元件
         self.data_processor = None
+        self.manifest = None
         self.vector_store = None
         self.retriever = None
         self.query_engine = None
@@ -101,8 +118,11 @@ class FactCheckRAGSystem:
     def _setup_data_processing(self, force_rebuild: bool) -> bool:
         """設定資料處理元件"""
         try:
+            # 有變更清單時只比對差異，不需要詢問是否重新處理
+            self.manifest = ProcessingManifest(self.manifest_path)
+            
             # 檢查是否需要重新處理資料
-            if not force_rebuild and os.path.exists(self.processed_data_path):
+            if not force_rebuild and not self.manifest.exists and os.path.exists(self.processed_data_path):
                 logger.info("已存在處理後的資料")
                 while True:
                     response = input("是否要重新處理資料？(Y/N): ").strip().upper()
@@ -117,20 +137,34 @@ class FactCheckRAGSystem:
 
             logger.info("開始處理事實查核資料...")
 
+            raw_data_path = self.raw_data_paths[self.raw_input]
+            logger.info(f"原始資料來源: {raw_data_path}")
+
             # 檢查原始資料是否存在
-            if not os.path.exists(self.raw_data_path):
-                logger.error(f"找不到原始資料檔案: {self.raw_data_path}")
+            if not os.path.exists(raw_data_path):
+                logger.error(f"找不到原始資料檔案: {raw_data_path}")
                 return False
 
             # 初始化資料處理器
             self.data_processor = TFCDataProcessor()
 
-            # 載入和處理資料
-            raw_data = self.data_processor.load_raw_data(self.raw_data_path)
-            processed_data = self.data_processor.process_data(raw_data, limit=self.data_limit)
-            self.data_processor.save_processed_data(self.processed_data_path)
+            # 逐筆讀取、處理並寫出，不把整份資料載入記憶體；寫出的同時比對變更清單
+            # SQLite 資料庫由 TFC 與 MyGoPen 共用，只取 TFC 的報告
+            raw_data = self.data_processor.iter_raw_data(raw_data_path, limit=self.data_limit, source='TFC')
+            processed_data = self.data_processor.iter_processed_data(raw_data, limit=self.data_limit)
+            temp_path = f"{self.processed_data_path}.tmp"
+            processed_count = self.data_processor.write_processed_data(
+                self.manifest.track(processed_data), temp_path
+            )
+
+            # 沒有任何變更時保留原本的處理後資料
+            if self.manifest.changes.is_empty() and os.path.exists(self.processed_data_path):
+                os.remove(temp_path)
+                logger.info("資料沒有變更，沿用現有的處理後資料")
+            else:
+                os.replace(temp_path, self.processed_data_path)
 
-            logger.info(f"成功處理 {len(processed_data)} 筆資料")
+            logger.info(f"成功處理 {processed_count} 筆資料（{self.manifest.changes.summary()}）")
             return True
 
         except Exception as e:
@@ -142,18 +176,43 @@ class FactCheckRAGSystem:
         try:
             logger.info("初始化向量儲存...")
             
-            # 載入處理後的資料
-            with open(self.processed_data_path, 'r', encoding='utf-8') as f:
-                documents = json.load(f)
-            
             # 初始化向量儲存器
             self.vector_store = FactCheckVectorStore(
                 persist_path=self.vector_store_path,
-                embedding_dim=self.embedding_dim
+                embedding_dim=self.embedding_dim,
+                parse_workers=self.parse_workers
             )
             
-            # 建立或載入索引
-            self.vector_store.build_index(documents, force_rebuild=force_rebuild)
+            # 近似重複的報告分群，每群只嵌入一篇代表報告（分群只需讀取處理後資料，不呼叫嵌入 API）
+            detector = NearDuplicateDetector(clusters_path=self.clusters_path)
+            detector.fit(iter_json_records(self.processed_data_path))
+            
+            # 統計整份語料的重複段落，嵌入前移除樣板段落
+            stripper = BoilerplateStripper(tokenizer=get_gemini_tokenizer())
+            stripper.fit(iter_json_records(self.processed_data_path))
+            
+            changes = self.manifest.changes if self.manifest else None
+            if (not force_rebuild and changes is not None and self.manifest.exists
+                    and self.vector_store.chroma_collection.count() > 0):
+                # 已有索引與上次的變更清單：只嵌入新增與變更的代表報告、刪除已移除的報告
+                index_changes = detector.plan_changes(changes, iter_json_records(self.processed_data_path))
+                index_changes.added = [stripper.strip(document) for document in index_changes.added]
+                self.vector_store.apply_changes(index_changes)
+                indexed = True
+            else:
+                # 逐筆讀取處理後的資料，由 build_index 分批切分與嵌入
+                documents = stripper.transform(detector.collapse(iter_json_records(self.processed_data_path)))
+                indexed = self.vector_store.build_index(documents, force_rebuild=force_rebuild)
+            stripper.log_statistics()
+            
+            if indexed:
+                # 索引已反映本次處理的結果，寫回變更清單與分群結果
+                detector.commit()
+                if changes is not None:
+                    self.manifest.commit()
+            else:
+                # 沿用現有索引：不寫回清單，下次執行仍會以全部資料重建或比對差異
+                logger.info("沿用現有向量索引，未寫回變更清單")
             
             logger.info("向量儲存設定完成")
             return True
@@ -288,6 +347,13 @@ def interactive_mode(rag_system: FactCheckRAGSystem):
                         check_result = source.get('check_result', 'N/A')
                         score = source.get('score', 0.0)
                         print(f"  {i+1}. [{check_result}] {title} (相似度: {score:.3f})")
+                        duplicate_reports = source.get('duplicate_reports', [])
+                        if duplicate_reports:
+                            print(f"     另有 {len(duplicate_reports)} 篇內容相近的報告:")
+                            for report in duplicate_reports:
+                                date = report.get('publish_date', '')
+                                print(f"       - {report.get('title') or '(無標題)'}"
+                                      f"{f' ({date})' if date else ''} {report.get('content_url', '')}")
             else:
                 print(f"查詢失敗: {result.get('error', '未知錯誤')}")
                 
@@ -304,6 +370,11 @@ def main():
                        help='強制重建所有資料和索引')
     parser.add_argument('--data-limit', type=int, default=1000,
                        help='處理的資料數量限制 (預設: 1000)')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                       help='切分分層節點的 worker 數量 (預設: CPU 核心數)')
+    parser.add_argument('--input', choices=['json', 'sqlite', 'corpus'], default='json',
+                       help='原始資料來源：json 為排序後的 JSON 輸出、sqlite 為爬蟲的 SQLite 資料庫、'
+                            'corpus 為壓縮分片語料 (預設: json)')
     
     args = parser.parse_args()
     
@@ -320,7 +391,9 @@ def main():
         rag_system = FactCheckRAGSystem(
             data_limit=args.data_limit,
             embedding_dim=768,
-            similarity_top_k=3
+            similarity_top_k=3,
+            parse_workers=args.parse_workers,
+            raw_input=args.input
         )
         
         # 設定系統
@@ -0,0 +1,175 @@
+"""
+樣板段落移除模組
+許多 TFC 報告重複出現相同的段落（查核說明、「背景」樣板、分享與頁尾文字），
+這些段落在 _clean_processed_content 之後仍然存在，每篇報告都會被重新切分與嵌入。
+此模組先掃描整份語料，找出出現在大部分報告中的段落，在 HierarchicalNodeParser 切分前移除，
+並統計移除前後的 token 數與實際切分出的葉子 chunk 數。
+
+段落以換行分隔（Cofacts 以空行分段），移除時保留其餘段落原本的分隔字元；
+只比對完整段落，句子中共用的片語（例如「COVID-19 疫苗」）不會被切掉。
+"""
+import hashlib
+import math
+import re
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional
+import logging
+
+try:
+    from llama_index.core.utils import get_tokenizer
+except ImportError:
+    get_tokenizer = None
+
+logger = logging.getLogger(__name__)
+
+# 段落與分隔字元（保留分隔字元以便原樣重組）
+_SEGMENT_RE = re.compile(r'(\n\s*)')
+
+
+def count_leaf_nodes(document: Dict[str, Any]) -> int:
+    """以向量索引使用的分層切分器切分單篇報告，回傳葉子節點數"""
+    from llama_index.core.node_parser import get_leaf_nodes
+    from .node_parser import parse_nodes
+    return len(get_leaf_nodes(parse_nodes([document])))
+
+
+class BoilerplateStripper:
+    """語料層級的重複段落移除器"""
+
+    def __init__(self,
+                 min_documents: int = 10,
+                 min_ratio: float = 0.3,
+                 min_length: int = 8,
+                 tokenizer: Optional[Callable[[str], List]] = None,
+                 chunk_counter: Optional[Callable[[Dict[str, Any]], int]] = None):
+        """
+        初始化移除器
+
+        Args:
+            min_documents: 段落至少出現在幾篇報告中才視為樣板
+            min_ratio: 段落至少出現在多少比例的報告中才視為樣板（與 min_documents 取較大者）
+            min_length: 少於此字數的段落（例如「背景」等小標題）不列入統計，也不會被移除
+            tokenizer: 計算 token 數的函式（預設為 LlamaIndex 的 tokenizer；未安裝時以字元數計算）
+            chunk_counter: 計算單篇報告葉子 chunk 數的函式（預設以 node_parser 實際切分）
+        """
+        self.min_documents = min_documents
+        self.min_ratio = min_ratio
+        self.min_length = min_length
+        if tokenizer is None and get_tokenizer is not None:
+            tokenizer = get_tokenizer()
+        self.tokenizer = tokenizer or list
+        self.chunk_counter = chunk_counter or count_leaf_nodes
+
+        self.boilerplate = set()
+        self.document_count = 0
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """清除移除前後的統計"""
+        self.stats = {
+            'documents': 0,
+            'stripped_documents': 0,
+            'removed_paragraphs': 0,
+            'tokens_before': 0,
+            'tokens_after': 0,
+            'chunks_before': 0,
+            'chunks_after': 0,
+        }
+
+    @staticmethod
+    def _paragraph_key(paragraph: str) -> int:
+        return int.from_bytes(hashlib.blake2b(paragraph.encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def _paragraphs(self, content: str) -> Iterator[str]:
+        for paragraph in _SEGMENT_RE.split(content)[::2]:
+            paragraph = paragraph.strip()
+            if len(paragraph) >= self.min_length:
+                yield paragraph
+
+    def fit(self, documents: Iterable[Dict[str, Any]]) -> 'BoilerplateStripper':
+        """
+        逐筆統計段落出現在幾篇報告中，找出樣板段落
+
+        只保留段落雜湊與計數，不保存段落文字，記憶體用量與不重複的段落數成正比。
+        """
+        frequencies = {}
+        document_count = 0
+        for document in documents:
+            document_count += 1
+            for key in {self._paragraph_key(p) for p in self._paragraphs(document.get('processed_content', ''))}:
+                frequencies[key] = frequencies.get(key, 0) + 1
+
+        threshold = max(self.min_documents, math.ceil(self.min_ratio * document_count))
+        self.boilerplate = {key for key, count in frequencies.items() if count >= threshold}
+        self.document_count = document_count
+
+        logger.info(f"樣板段落偵測：{document_count} 篇報告、{len(frequencies)} 種段落，"
+                    f"出現於 {threshold} 篇以上的 {len(self.boilerplate)} 種段落視為樣板")
+        return self
+
+    def strip(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """移除單篇報告中的樣板段落（須先呼叫 fit），並累計移除前後的 token 與 chunk 數"""
+        content = document.get('processed_content', '')
+        parts = _SEGMENT_RE.split(content)
+
+        kept = []
+        removed = 0
+        for index in range(0, len(parts), 2):
+            paragraph = parts[index]
+            key_text = paragraph.strip()
+            if len(key_text) >= self.min_length and self._paragraph_key(key_text) in self.boilerplate:
+                removed += 1
+                continue
+            kept.append(paragraph)
+            if index + 1 < len(parts):
+                kept.append(parts[index + 1])
+
+        stripped_content = ''.join(kept).strip()
+        if not stripped_content:
+            # 全部都是樣板時保留原文，避免產生空白文件
+            removed = 0
+
+        if not removed:
+            self._count(document, document, 0)
+            return document
+        stripped = dict(document, processed_content=stripped_content)
+        self._count(document, stripped, removed)
+        return stripped
+
+    def transform(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """逐筆移除樣板段落"""
+        for document in documents:
+            yield self.strip(document)
+
+    def _tokens(self, document: Dict[str, Any]) -> int:
+        return len(self.tokenizer(f"{document.get('title', '')}\n\n{document.get('processed_content', '')}"))
+
+    def _count(self, before: Dict[str, Any], after: Dict[str, Any], removed: int):
+        tokens_before = self._tokens(before)
+        self.stats['documents'] += 1
+        self.stats['tokens_before'] += tokens_before
+        if not removed:
+            self.stats['tokens_after'] += tokens_before
+            return
+
+        # 只切分有移除段落的報告：未變更的報告前後 chunk 數相同，不需要重複切分
+        self.stats['tokens_after'] += self._tokens(after)
+        self.stats['chunks_before'] += self.chunk_counter(before)
+        self.stats['chunks_after'] += self.chunk_counter(after)
+        self.stats['stripped_documents'] += 1
+        self.stats['removed_paragraphs'] += removed
+
+    def log_statistics(self):
+        """輸出移除前後的 token 與葉子 chunk 數"""
+        stats = self.stats
+        if not stats['documents']:
+            return
+
+        def reduction(before, after):
+            return f"{(1 - after / before) * 100:.1f}%" if before else "0%"
+
+        logger.info("=== 樣板段落移除統計 ===")
+        logger.info(f"報告數: {stats['documents']}（{stats['stripped_documents']} 篇移除了 {stats['removed_paragraphs']} 個段落）")
+        logger.info(f"Token 數: {stats['tokens_before']} -> {stats['tokens_after']}"
+                    f"（減少 {reduction(stats['tokens_before'], stats['tokens_after'])}）")
+        logger.info(f"有移除段落的報告葉子 chunk 數: {stats['chunks_before']} -> {stats['chunks_after']}"
+                    f"（減少 {reduction(stats['chunks_before'], stats['chunks_after'])}）")
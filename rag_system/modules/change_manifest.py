@@ -0,0 +1,150 @@
+"""
+變更偵測模組
+以處理後資料的內容雜湊（依報告 ID，例如 tfc_<report_number>）記錄上次處理的結果，
+每次處理時比對出新增、變更與刪除的記錄，下游（向量索引）只需要處理差異，
+每日更新的成本與變更量成正比，而不是與整份語料成正比。
+
+清單只在下游成功套用差異後才寫回（commit），中途失敗時下次執行會重新產生同一份差異。
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 'processed-manifest'
+# 雜湊的計算方式改變時遞增，舊清單會被視為不存在（全部重新處理）
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ChangeSet:
+    """一次處理相對於上次清單的差異"""
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged_count: int = 0
+
+    @property
+    def upserts(self) -> List[Dict[str, Any]]:
+        """需要（重新）嵌入的記錄"""
+        return self.added + self.changed
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (f"新增 {len(self.added)} 筆、變更 {len(self.changed)} 筆、"
+                f"刪除 {len(self.removed)} 筆、未變更 {self.unchanged_count} 筆")
+
+
+class ProcessingManifest:
+    """處理後資料的內容雜湊清單"""
+
+    def __init__(self, manifest_path: str):
+        """
+        初始化清單
+
+        Args:
+            manifest_path: 清單檔案路徑（JSON，記錄 ID 對應內容雜湊）
+        """
+        self.manifest_path = manifest_path
+        self.hashes = self._load()
+
+        # 本次處理的結果，commit() 後取代 hashes
+        self._pending_hashes = None
+        self._changes = None
+
+    @property
+    def exists(self) -> bool:
+        """是否有上次處理的清單（沒有時所有記錄都會被視為新增）"""
+        return self.hashes is not None
+
+    def _load(self) -> Optional[Dict[str, str]]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"讀取變更清單失敗，將視為全部新增: {e}")
+            return None
+
+        if manifest.get('format') != MANIFEST_FORMAT or manifest.get('version') != MANIFEST_VERSION:
+            logger.warning(f"{self.manifest_path} 的格式或版本不符，將視為全部新增")
+            return None
+        return manifest.get('records', {})
+
+    @staticmethod
+    def record_hash(record: Dict[str, Any]) -> str:
+        """處理後記錄的內容雜湊（欄位順序不影響結果）"""
+        payload = json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def track(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        逐筆比對處理後的記錄並原樣產出（可直接接到 write_processed_data）
+
+        產出完畢後以 changes 取得差異；只有新增與變更的記錄會留在記憶體中。
+        """
+        previous = self.hashes or {}
+        current = {}
+        changes = ChangeSet()
+
+        for record in records:
+            record_id = record['id']
+            if record_id in current:
+                # 同一 ID 出現多次（例如缺少報告編號）時只追蹤第一筆
+                logger.warning(f"記錄 {record_id} 重複出現，變更偵測只採用第一筆")
+                yield record
+                continue
+
+            record_hash = self.record_hash(record)
+            current[record_id] = record_hash
+
+            previous_hash = previous.get(record_id)
+            if previous_hash is None:
+                changes.added.append(record)
+            elif previous_hash != record_hash:
+                changes.changed.append(record)
+            else:
+                changes.unchanged_count += 1
+            yield record
+
+        changes.removed = [record_id for record_id in previous if record_id not in current]
+
+        self._pending_hashes = current
+        self._changes = changes
+        logger.info(f"變更偵測：{changes.summary()}")
+
+    @property
+    def changes(self) -> Optional[ChangeSet]:
+        """最近一次 track() 的差異；尚未追蹤完畢時為 None"""
+        return self._changes
+
+    def commit(self):
+        """下游套用差異成功後寫回清單"""
+        if self._pending_hashes is None:
+            return
+
+        self._write(self._pending_hashes)
+        self.hashes = self._pending_hashes
+        self._pending_hashes = None
+        self._changes = None
+        logger.info(f"變更清單已更新: {self.manifest_path}（{len(self.hashes)} 筆）")
+
+    def _write(self, hashes: Dict[str, str]):
+        """先寫暫存檔再取代，避免中斷時留下損毀的清單"""
+        Path(self.manifest_path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': MANIFEST_FORMAT,
+                'version': MANIFEST_VERSION,
+                'records': hashes,
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
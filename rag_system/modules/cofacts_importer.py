@@ -0,0 +1,303 @@
+"""
+Cofacts 開放資料匯入模組
+以串流方式讀取 Cofacts 公開的 CSV 資料庫傾印（articles / replies / article_replies / 分類），
+整理成與爬蟲相同的原始報告結構，再交給 TFCDataProcessor 轉成相同的處理後格式。
+
+replies 與 article_replies 先逐行寫入暫存的 SQLite 索引，再逐行讀取 articles 並以索引查詢
+每篇文章的回應，記憶體用量與資料量無關。CSV 可為解壓縮後的 .csv 或官方提供的 .csv.zip。
+
+資料來源：https://github.com/cofacts/opendata
+"""
+import csv
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import zipfile
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, Iterator, Optional
+import logging
+from .data_processor import TFCDataProcessor
+
+logger = logging.getLogger(__name__)
+
+# 文章與回應內文可能超過 csv 模組預設的欄位長度上限（128 KB）
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+SOURCE_NAME = 'Cofacts'
+ARTICLE_URL = 'https://cofacts.tw/article/{}'
+
+# Cofacts 回應類型對應到 TFC 的查核結果；NOT_ARTICLE（不在查證範圍）不匯入
+REPLY_TYPE_RESULTS = {
+    'RUMOR': '錯誤',
+    'NOT_RUMOR': '正確',
+    'OPINIONATED': '事實釐清',
+}
+
+# 標題取文章第一行的前幾個字
+TITLE_LENGTH = 60
+
+INDEX_SCHEMA = """
+CREATE TABLE replies (
+    id TEXT PRIMARY KEY,
+    type TEXT,
+    text TEXT,
+    reference TEXT
+);
+CREATE TABLE article_replies (
+    article_id TEXT,
+    reply_id TEXT,
+    reply_type TEXT,
+    score INTEGER,
+    created_at TEXT
+);
+CREATE TABLE article_categories (
+    article_id TEXT,
+    category_id TEXT
+);
+"""
+
+INDEX_CREATE = """
+CREATE INDEX idx_article_replies_article ON article_replies (article_id);
+CREATE INDEX idx_article_categories_article ON article_categories (article_id);
+"""
+
+# 每篇文章選用評價最高（正評減負評）的回應，同分時取最早的回應；
+# 舊版傾印的 article_replies 沒有 replyType 時以 replies.type 代替
+BEST_REPLY_SQL = """
+SELECT COALESCE(NULLIF(ar.reply_type, ''), r.type) AS reply_type, r.text, r.reference
+FROM article_replies ar JOIN replies r ON r.id = ar.reply_id
+WHERE ar.article_id = ? AND COALESCE(NULLIF(ar.reply_type, ''), r.type) != 'NOT_ARTICLE'
+ORDER BY ar.score DESC, ar.created_at
+LIMIT 1
+"""
+
+
+class CofactsImporter:
+    """Cofacts 開放資料 CSV 匯入器"""
+
+    def __init__(self,
+                 dump_dir: str,
+                 index_dir: Optional[str] = None,
+                 processor: Optional[TFCDataProcessor] = None,
+                 batch_size: int = 5000):
+        """
+        初始化匯入器
+
+        Args:
+            dump_dir: 傾印目錄（articles.csv、replies.csv、article_replies.csv，
+                      以及選用的 categories.csv、article_categories.csv；可為 .csv.zip）
+            index_dir: 暫存 SQLite 索引所在的目錄（預設為系統暫存目錄；索引檔匯入結束後刪除）
+            processor: 資料處理器（負責轉成處理後格式）
+            batch_size: 寫入索引時每批的列數
+        """
+        self.dump_dir = Path(dump_dir)
+        self.index_dir = index_dir
+        self.processor = processor or TFCDataProcessor()
+        self.batch_size = batch_size
+
+        # 統計資訊
+        self.article_count = 0
+        self.imported_count = 0
+        self.skipped_count = 0
+
+    def _find_csv(self, name: str, required: bool = True) -> Optional[Path]:
+        """尋找 <name>.csv 或 <name>.csv.zip"""
+        for candidate in (self.dump_dir / f"{name}.csv", self.dump_dir / f"{name}.csv.zip"):
+            if candidate.exists():
+                return candidate
+        if required:
+            raise FileNotFoundError(f"{self.dump_dir} 中找不到 {name}.csv 或 {name}.csv.zip")
+        return None
+
+    def _iter_csv(self, path: Path) -> Iterator[Dict[str, str]]:
+        """逐行讀取 CSV（支援 zip 內的單一 CSV）"""
+        if path.suffix == '.zip':
+            with zipfile.ZipFile(path) as archive:
+                member = next(name for name in archive.namelist() if name.endswith('.csv'))
+                with archive.open(member) as raw:
+                    yield from csv.DictReader(io.TextIOWrapper(raw, encoding='utf-8-sig', newline=''))
+        else:
+            with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+                yield from csv.DictReader(f)
+
+    def _insert_rows(self, conn: sqlite3.Connection, sql: str, rows: Iterator[tuple]) -> int:
+        """分批寫入索引"""
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                conn.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def _build_index(self, conn: sqlite3.Connection) -> Dict[str, str]:
+        """將回應與分類寫入暫存索引，回傳分類 ID 對應的名稱"""
+        conn.executescript(INDEX_SCHEMA)
+
+        reply_count = self._insert_rows(conn, 'INSERT OR REPLACE INTO replies VALUES (?, ?, ?, ?)', (
+            (row['id'], row.get('type', ''), row.get('text', ''), row.get('reference', ''))
+            for row in self._iter_csv(self._find_csv('replies'))
+        ))
+
+        article_reply_count = self._insert_rows(conn, 'INSERT INTO article_replies VALUES (?, ?, ?, ?, ?)', (
+            (
+                row['articleId'],
+                row['replyId'],
+                row.get('replyType', ''),
+                self._to_int(row.get('positiveFeedbackCount')) - self._to_int(row.get('negativeFeedbackCount')),
+                row.get('createdAt', '')
+            )
+            for row in self._iter_csv(self._find_csv('article_replies'))
+            if row.get('status', 'NORMAL') == 'NORMAL'
+        ))
+
+        # 分類為選用資料
+        categories = {}
+        categories_path = self._find_csv('categories', required=False)
+        if categories_path:
+            categories = {row['id']: row.get('title', '') for row in self._iter_csv(categories_path)}
+
+        article_categories_path = self._find_csv('article_categories', required=False)
+        if article_categories_path:
+            self._insert_rows(conn, 'INSERT INTO article_categories VALUES (?, ?)', (
+                (row['articleId'], row['categoryId'])
+                for row in self._iter_csv(article_categories_path)
+                if row.get('status', 'NORMAL') == 'NORMAL'
+                and self._to_int(row.get('positiveFeedbackCount')) >= self._to_int(row.get('negativeFeedbackCount'))
+            ))
+
+        conn.executescript(INDEX_CREATE)
+        conn.commit()
+        logger.info(f"已建立 Cofacts 索引：{reply_count} 則回應、{article_reply_count} 筆文章回應")
+        return categories
+
+    def iter_raw_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐篇產生與爬蟲輸出相同結構的原始報告（可直接送入 StreamingIndexer）
+
+        只匯入狀態正常、且至少有一則可對應查核結果的回應的文章
+        """
+        # 索引一律是新建立的暫存檔，結束時只刪除這個檔案
+        fd, index_path = tempfile.mkstemp(prefix='cofacts_', suffix='.db', dir=self.index_dir)
+        os.close(fd)
+
+        conn = sqlite3.connect(index_path)
+        try:
+            conn.execute('PRAGMA journal_mode=OFF')
+            conn.execute('PRAGMA synchronous=OFF')
+            categories = self._build_index(conn)
+
+            for row in self._iter_csv(self._find_csv('articles')):
+                self.article_count += 1
+                if row.get('status', 'NORMAL') != 'NORMAL':
+                    self.skipped_count += 1
+                    continue
+
+                reply = conn.execute(BEST_REPLY_SQL, (row['id'],)).fetchone()
+                check_result = REPLY_TYPE_RESULTS.get(reply[0]) if reply else None
+                if not check_result:
+                    self.skipped_count += 1
+                    continue
+
+                category_names = [
+                    categories[category_id]
+                    for (category_id,) in conn.execute(
+                        'SELECT category_id FROM article_categories WHERE article_id = ?', (row['id'],)
+                    )
+                    if categories.get(category_id)
+                ]
+                yield self._to_raw_record(row, check_result, reply[1], reply[2], category_names)
+        finally:
+            conn.close()
+            os.remove(index_path)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """逐篇產生與 TFCDataProcessor.process_data 相同格式的處理後資料"""
+        for index, raw_record in enumerate(self.iter_raw_records()):
+            record = self.processor.process_record(raw_record, index)
+            if record is None:
+                self.skipped_count += 1
+                continue
+            self.imported_count += 1
+            yield record
+
+    def import_to_file(self, output_path: str, limit: Optional[int] = None) -> int:
+        """
+        將處理後資料逐筆寫成 JSON 陣列（與 save_processed_data 的輸出格式相同）
+
+        Returns:
+            寫入筆數
+        """
+        records = self.iter_records()
+        try:
+            count = self.processor.write_processed_data(islice(records, limit), output_path)
+        finally:
+            # 提前結束時關閉 generator，刪除暫存索引
+            records.close()
+
+        logger.info(f"已匯入 {count} 筆 Cofacts 資料至: {output_path}（共讀取 {self.article_count} 篇文章，略過 {self.skipped_count} 篇）")
+        return count
+
+    def _to_raw_record(self, row: Dict[str, str], check_result: str, reply_text: str,
+                       reference: str, categories: list) -> Dict[str, Any]:
+        """組合成爬蟲的原始報告結構"""
+        text = (row.get('text') or '').strip()
+        first_line = next((line.strip() for line in text.splitlines() if line.strip()), '')
+        title = first_line[:TITLE_LENGTH] + ('…' if len(first_line) > TITLE_LENGTH else '')
+
+        sections = [f"網傳訊息：{text}", f"查核回應：{(reply_text or '').strip()}"]
+        if reference and reference.strip():
+            sections.append(f"參考資料：{reference.strip()}")
+        processed_content = '\n\n'.join(sections)
+
+        created_at = row.get('createdAt') or ''
+        updated_at = row.get('updatedAt') or created_at
+        return {
+            'content_url': ARTICLE_URL.format(row['id']),
+            'source': SOURCE_NAME,
+            'title': title,
+            'content': text,
+            'processed_content': processed_content,
+            'check_result': check_result,
+            'publish_date': created_at[:10],
+            'update_date': updated_at[:10],
+            'categories': categories,
+            'report_number': '',
+            'reporter': '',
+            'editor': '',
+        }
+
+    @staticmethod
+    def _to_int(value: Optional[str]) -> int:
+        try:
+            return int(value or 0)
+        except ValueError:
+            return 0
+
+
+def main():
+    """主執行函數"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='匯入 Cofacts 開放資料 CSV')
+    parser.add_argument('dump_dir', help='Cofacts 傾印目錄（articles.csv、replies.csv、article_replies.csv，可為 .csv.zip）')
+    parser.add_argument('-o', '--output', default='data/processed_cofacts_data.json', help='輸出路徑 (預設: data/processed_cofacts_data.json)')
+    parser.add_argument('--limit', type=int, default=None, help='最多匯入筆數')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    importer = CofactsImporter(args.dump_dir)
+    count = importer.import_to_file(args.output, limit=args.limit)
+    print(f"Cofacts 匯入完成！匯入了 {count} 筆資料")
+
+
+if __name__ == "__main__":
+    main()
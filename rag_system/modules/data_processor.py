@@ -2,78 +2,309 @@
 資料處理模組
 處理 TFC 事實查核報告資料，提取並清理需要的欄位
 """
+import hashlib
+import importlib
 import json
-from typing import Dict, List, Any
+import re
+import sys
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 爬蟲 SQLite 資料庫（factchecker_crawlers/output/tfc_reports.db）的副檔名
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+# 爬蟲的壓縮分片語料（factchecker_crawlers/output/corpus/）
+CORPUS_MANIFEST = 'manifest.json'
+
+# 爬蟲專案目錄：資料庫與語料的讀取沿用爬蟲的實作
+CRAWLER_DIR = Path(__file__).resolve().parent.parent.parent / 'factchecker_crawlers'
+
+# 逐筆解析 JSON 陣列時，記錄之間的空白與逗號
+_JSON_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def _crawler_module(name: str):
+    """載入爬蟲套件的模組（與爬蟲的 StreamingIndexPipeline 載入 rag_system 模組的方式相同）"""
+    if str(CRAWLER_DIR) not in sys.path:
+        sys.path.append(str(CRAWLER_DIR))
+    return importlib.import_module(f'factchecker_crawlers.{name}')
+
+
+def iter_json_records(file_path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    逐筆讀取 JSON 陣列或 JSONL 檔案，不整檔載入
+    
+    不論 JSON 陣列是否排版（indent）皆可解析；緩衝區只保留尚未解析的部分，
+    記憶體用量取決於 chunk_size 與單筆記錄的大小。
+    
+    Args:
+        file_path: JSON 陣列或 JSONL 檔案路徑
+        chunk_size: 每次讀取的字元數
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip('\ufeff')
+        position = _JSON_SEPARATOR.match(buffer).end()
+        
+        # JSON 陣列以 [ 開頭，JSONL 則直接是第一筆記錄
+        in_array = buffer[position:position + 1] == '['
+        if in_array:
+            position += 1
+        
+        read_size = chunk_size
+        while True:
+            position = _JSON_SEPARATOR.match(buffer, position).end()
+            if position < len(buffer) and not (in_array and buffer[position] == ']'):
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # 記錄被緩衝區截斷，讀入更多內容後重試
+                    pass
+                else:
+                    # 數字等純量可能剛好被截斷在緩衝區結尾
+                    if end < len(buffer) or isinstance(record, (dict, list)):
+                        position = end
+                        read_size = chunk_size
+                        yield record
+                        continue
+            elif position < len(buffer):
+                return
+            
+            chunk = f.read(read_size)
+            if not chunk:
+                if position < len(buffer):
+                    raise ValueError(f"{file_path} 的 JSON 格式不完整")
+                return
+            # 丟棄已解析的部分；單筆記錄超過緩衝區時每次加倍讀取量
+            buffer = buffer[position:] + chunk
+            position = 0
+            read_size *= 2
+
 class TFCDataProcessor:
     """TFC 事實查核資料處理器"""
     
     def __init__(self):
         self.processed_data = []
     
-    def load_raw_data(self, file_path: str) -> List[Dict[str, Any]]:
-        """載入原始 JSON 資料"""
+    def load_raw_data(self, 
+                      file_path: str, 
+                      limit: Optional[int] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      include_content: bool = False,
+                      source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        載入原始資料（JSON / JSONL 檔、爬蟲的 SQLite 資料庫或壓縮分片語料目錄）
+        
+        整份載入到記憶體；資料量大時改用 iter_raw_data 逐筆處理。
+        
+        Args:
+            file_path: 原始資料路徑
+            limit: 只載入最新的 N 筆
+            start_date: 發佈日期下限，格式 YYYY-MM-DD
+            end_date: 發佈日期上限，格式 YYYY-MM-DD
+            include_content: 語料目錄是否一併讀取原始 content sidecar（處理流程只需要 processed_content）
+            source: 只載入此來源的報告（例如 'TFC'；爬蟲的 SQLite 資料庫由多個來源共用）
+            
+        Returns:
+            原始資料列表（依報告編號由新到舊）
+        """
+        data = list(self.iter_raw_data(file_path, limit, start_date, end_date, include_content, source))
+        logger.info(f"成功載入 {len(data)} 筆原始資料")
+        return data
+    
+    def iter_raw_data(self, 
+                      file_path: str, 
+                      limit: Optional[int] = None,
+                      start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      include_content: bool = False,
+                      source: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐筆讀取原始資料（參數同 load_raw_data），記憶體用量與資料總量無關
+        
+        Yields:
+            原始資料（依檔案中的順序，爬蟲輸出為報告編號由新到舊）
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            logger.info(f"成功載入 {len(data)} 筆原始資料")
-            return data
+            path = Path(file_path)
+            if path.is_dir() or path.name == CORPUS_MANIFEST:
+                corpus_dir = path if path.is_dir() else path.parent
+                yield from self._load_from_corpus(corpus_dir, limit, start_date, end_date, include_content, source)
+            elif path.suffix in SQLITE_SUFFIXES:
+                yield from self._load_from_sqlite(file_path, limit, start_date, end_date, source)
+            else:
+                records = (
+                    record for record in iter_json_records(file_path)
+                    if self._matches(record, start_date, end_date, source)
+                )
+                yield from islice(records, limit)
         except Exception as e:
             logger.error(f"載入資料失敗: {e}")
             raise
     
-    def process_data(self, raw_data: List[Dict[str, Any]], limit: int = 1000) -> List[Dict[str, Any]]:
+    def _matches(self, record: Dict[str, Any], start_date: Optional[str], end_date: Optional[str],
+                 source: Optional[str]) -> bool:
+        publish_date = record.get('publish_date') or ''
+        if start_date and publish_date < start_date:
+            return False
+        if end_date and publish_date > end_date:
+            return False
+        if source and record.get('source', 'TFC') != source:
+            return False
+        return True
+    
+    def _load_from_sqlite(self, 
+                          db_path: str, 
+                          limit: Optional[int],
+                          start_date: Optional[str],
+                          end_date: Optional[str],
+                          source: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """以爬蟲的 ReportStore 唯讀查詢資料庫，逐筆讀取最新 N 筆（各來源依發佈日期交錯）或日期區間內的報告"""
+        store = _crawler_module('storage').ReportStore(db_path, read_only=True)
+        try:
+            yield from store.iter_reports(limit=limit, start_date=start_date, end_date=end_date, source=source)
+        finally:
+            store.close()
+    
+    def _load_from_corpus(self, 
+                          corpus_dir: Path, 
+                          limit: Optional[int],
+                          start_date: Optional[str],
+                          end_date: Optional[str],
+                          include_content: bool,
+                          source: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        逐分片串流讀取壓縮語料；分片已依報告編號由新到舊排列，取滿 limit 筆即停止
+
+        以爬蟲的 corpus.iter_corpus 讀取，content sidecar 與報告分片未對齊時會拋出例外
+        """
+        iter_corpus = _crawler_module('corpus').iter_corpus
+        records = (
+            record for record in iter_corpus(str(corpus_dir), include_content=include_content)
+            if self._matches(record, start_date, end_date, source)
+        )
+        yield from islice(records, limit)
+    
+    def process_data(self, raw_data: Iterable[Dict[str, Any]], limit: int = 1000) -> List[Dict[str, Any]]:
         """處理原始資料，提取需要的欄位"""
-        processed_records = []
+        processed_records = list(self.iter_processed_data(raw_data, limit))
         
-        # 取最新的 limit 筆資料（資料已按時間排序）
-        recent_data = raw_data[:limit]
-        logger.info(f"處理最新 {len(recent_data)} 筆資料")
+        logger.info(f"成功處理 {len(processed_records)} 筆資料")
+        self.processed_data = processed_records
+        return processed_records
+    
+    def iter_processed_data(self, raw_data: Iterable[Dict[str, Any]], limit: Optional[int] = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        逐筆處理原始資料（process_data 的 generator 版本）
         
-        for i, record in enumerate(recent_data):
+        Args:
+            raw_data: 原始資料（列表或 iter_raw_data 的 generator）
+            limit: 只處理最新的 limit 筆（資料已按時間排序）
+            
+        Yields:
+            處理後的資料，缺少必要欄位或處理失敗的記錄會略過
+        """
+        logger.info(f"處理最新 {limit if limit is not None else '全部'} 筆資料")
+        
+        for i, record in enumerate(islice(raw_data, limit)):
             try:
-                # 生成唯一 ID: tfc + report_number
-                unique_id = f"tfc_{record.get('report_number', str(i))}"
-                
-                # 提取核心欄位
-                processed_record = {
-                    'id': unique_id,
-                    'title': record.get('title', ''),
-                    'processed_content': record.get('processed_content', ''),
-                    'check_result': record.get('check_result', ''),
-                    'categories': record.get('categories', []),
-                    'publish_date': record.get('publish_date', ''),
-                    'content_url': record.get('content_url', ''),
-                    'source': record.get('source', 'TFC')
-                }
-                
-                # 檢查必要欄位
-                if not processed_record['title'] or not processed_record['processed_content']:
-                    logger.warning(f"記錄 {unique_id} 缺少必要欄位，跳過")
-                    continue
-                
-                # 處理 categories - 只保留有值的分類
-                if processed_record['categories']:
-                    processed_record['categories'] = [
-                        cat for cat in processed_record['categories'] 
-                        if cat and cat.strip()
-                    ]
-                else:
-                    processed_record['categories'] = []
-                
-                processed_records.append(processed_record)
-                
+                processed_record = self.process_record(record, i)
             except Exception as e:
                 logger.error(f"處理第 {i} 筆記錄時發生錯誤: {e}")
                 continue
+            
+            if processed_record is not None:
+                yield processed_record
+    
+    def process_record(self, record: Dict[str, Any], index: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        處理單筆原始資料（批次處理與串流索引共用）
         
-        logger.info(f"成功處理 {len(processed_records)} 筆資料")
-        self.processed_data = processed_records
-        return processed_records
+        Args:
+            record: 原始資料
+            index: 資料序號，沒有報告編號也沒有網址時用於產生 ID
+            
+        Returns:
+            處理後的資料，缺少必要欄位時回傳 None
+        """
+        # 生成唯一 ID: tfc + report_number；沒有報告編號的報告（例如 MyGoPen）改用網址雜湊，
+        # 串流索引分批處理時 ID 也不會重複
+        source = record.get('source', 'TFC')
+        report_number = str(record.get('report_number') or '').strip()
+        if source == 'TFC' and report_number:
+            unique_id = f"tfc_{report_number}"
+        else:
+            url_key = record.get('content_url') or f"{source}:{index}"
+            url_hash = hashlib.sha1(url_key.encode('utf-8')).hexdigest()[:16]
+            unique_id = f"{source.lower()}_{url_hash}"
+        
+        # 提取核心欄位
+        processed_record = {
+            'id': unique_id,
+            'title': record.get('title', ''),
+            'processed_content': record.get('processed_content', ''),
+            'check_result': record.get('check_result', ''),
+            'categories': record.get('categories', []),
+            'publish_date': record.get('publish_date', ''),
+            'content_url': record.get('content_url', ''),
+            'source': source
+        }
+        
+        # 檢查必要欄位
+        if not processed_record['title'] or not processed_record['processed_content']:
+            logger.warning(f"記錄 {unique_id} 缺少必要欄位，跳過")
+            return None
+        
+        # 處理 categories - 只保留有值的分類
+        if processed_record['categories']:
+            processed_record['categories'] = [
+                cat for cat in processed_record['categories'] 
+                if cat and cat.strip()
+            ]
+        else:
+            processed_record['categories'] = []
+        
+        return processed_record
+    
+    def write_processed_data(self, records: Iterable[Dict[str, Any]], output_path: str) -> int:
+        """
+        將處理後的資料逐筆寫成 JSON 陣列（每行一筆），不需要先收集成列表
+        
+        輸出格式與 save_processed_data 相容（json.load 與 iter_json_records 皆可讀取）。
+        
+        Returns:
+            寫入筆數
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        count = 0
+        result_counts = {}
+        category_counts = {}
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write('[')
+                for record in records:
+                    f.write(',\n' if count else '\n')
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    count += 1
+                    
+                    result = record.get('check_result', '未知')
+                    result_counts[result] = result_counts.get(result, 0) + 1
+                    for category in record.get('categories', []):
+                        category_counts[category] = category_counts.get(category, 0) + 1
+                f.write('\n]\n' if count else ']\n')
+        except Exception as e:
+            logger.error(f"儲存資料失敗: {e}")
+            raise
+        
+        logger.info(f"處理後資料已儲存至: {output_path}")
+        self._log_statistics(count, result_counts, category_counts)
+        return count
     
     def save_processed_data(self, output_path: str):
         """儲存處理後的資料"""
@@ -100,8 +331,6 @@ class TFCDataProcessor:
             logger.info("沒有資料可統計")
             return
         
-        total_count = len(self.processed_data)
-        
         # 統計查核結果分佈
         result_counts = {}
         for record in self.processed_data:
@@ -115,7 +344,10 @@ class TFCDataProcessor:
             for category in categories:
                 category_counts[category] = category_counts.get(category, 0) + 1
         
-        # 輸出統計結果
+        self._log_statistics(len(self.processed_data), result_counts, category_counts)
+    
+    def _log_statistics(self, total_count: int, result_counts: Dict[str, int], category_counts: Dict[str, int]):
+        """輸出統計結果"""
         logger.info("=== 資料統計 ===")
         logger.info(f"總記錄數: {total_count}")
         logger.info(f"查核結果分佈: {result_counts}")
@@ -130,12 +362,11 @@ def main():
     # 初始化處理器
     processor = TFCDataProcessor()
     
-    # 處理資料
-    raw_data = processor.load_raw_data(input_file)
-    processed_data = processor.process_data(raw_data, limit=1000)
-    processor.save_processed_data(output_file)
+    # 逐筆讀取、處理並寫出，記憶體用量與資料總量無關
+    raw_data = processor.iter_raw_data(input_file)
+    count = processor.write_processed_data(processor.iter_processed_data(raw_data, limit=1000), output_file)
     
-    print(f"資料處理完成！處理了 {len(processed_data)} 筆資料")
+    print(f"資料處理完成！處理了 {count} 筆資料")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
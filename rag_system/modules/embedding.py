@@ -1,32 +1,111 @@
 """
 嵌入模組
 使用 Google GenAI embeddings (gemini-embedding-001) 進行文字向量化
+
+文字嵌入經過持久化的嵌入快取（見 embedding_cache 模組），內容未變的 chunk 重建索引時不再呼叫 API。
 """
 import os
 import logging
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.bridge.pydantic import PrivateAttr
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 from google.genai.types import EmbedContentConfig
+from .embedding_cache import EmbeddingCache
 
 # 載入環境變數
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# 預設快取位置相對於 rag_system 目錄，由 factchecker_crawlers 執行的串流索引與 main.py 共用同一份快取
+DEFAULT_CACHE_PATH = str(Path(__file__).resolve().parent.parent / "data" / "embedding_cache.db")
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    在 LlamaIndex 嵌入模型前加上嵌入快取
+    
+    文字（文件）嵌入先查快取，只有未命中的文字送往底層模型；查詢嵌入直接交給底層模型。
+    可直接作為 VectorStoreIndex 的 embed_model。
+    """
+    
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _namespace: str = PrivateAttr()
+    
+    def __init__(self, embed_model: BaseEmbedding, cache: EmbeddingCache, namespace: str, **kwargs: Any):
+        """
+        Args:
+            embed_model: 底層嵌入模型
+            cache: 嵌入快取
+            namespace: 快取命名空間（模型、維度與任務類型），設定不同的向量不會互相取用
+        """
+        super().__init__(
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs
+        )
+        self._embed_model = embed_model
+        self._cache = cache
+        self._namespace = namespace
+    
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+    
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed_model.get_query_embedding(query)
+    
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._embed_model.aget_query_embedding(query)
+    
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._get_text_embeddings([text])[0]
+    
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        keys = [EmbeddingCache.make_key(self._namespace, text) for text in texts]
+        cached = self._cache.get_many(keys)
+        
+        # 只嵌入未命中的文字（同一批中重複的文字只送一次）
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            embeddings = self._embed_model.get_text_embedding_batch(list(missing.values()))
+            new_items = list(zip(missing.keys(), embeddings))
+            self._cache.put_many(new_items)
+            cached.update(new_items)
+        
+        return [cached[key] for key in keys]
+    
+    @property
+    def cache(self) -> EmbeddingCache:
+        return self._cache
+
 class FactCheckEmbedding:
     """事實查核嵌入處理器"""
     
-    def __init__(self, model_name: str = "gemini-embedding-001", output_dimensionality: int = 768):
+    def __init__(self,
+                 model_name: str = "gemini-embedding-001",
+                 output_dimensionality: int = 768,
+                 cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 cache_max_mb: int = 1024):
         """
         初始化嵌入模型
         
         Args:
             model_name: Gemini 嵌入模型名稱
             output_dimensionality: 輸出向量維度 (768, 1536, 3072)
+            cache_path: 嵌入快取的 SQLite 路徑（預設為 rag_system/data/embedding_cache.db，None 表示不使用快取）
+            cache_max_mb: 嵌入快取的大小上限（MB），超過時淘汰最久未使用的向量
         """
         self.model_name = model_name
         self.output_dimensionality = output_dimensionality
+        self.task_type = "FACT_VERIFICATION"
+        self.cache = None
         
         # 檢查 API 金鑰
         api_key = os.getenv('GOOGLE_API_KEY')
@@ -35,7 +114,7 @@ class FactCheckEmbedding:
         
         # 設定嵌入配置（針對事實查核優化）
         embedding_config = EmbedContentConfig(
-            task_type="FACT_VERIFICATION",  # 事實驗證任務
+            task_type=self.task_type,  # 事實驗證任務
             output_dimensionality=output_dimensionality
         )
         
@@ -47,6 +126,17 @@ class FactCheckEmbedding:
                 embed_batch_size=50,  # 減少批次處理大小以避免限制
                 embedding_config=embedding_config
             )
+            
+            # 文字嵌入經過快取；鍵包含模型、維度與任務類型，設定改變時不會取到舊向量
+            if cache_path:
+                self.cache = EmbeddingCache(cache_path, max_bytes=cache_max_mb << 20)
+                self.embed_model = CachedEmbedding(
+                    self.embed_model,
+                    self.cache,
+                    namespace=f"{model_name}:{output_dimensionality}:{self.task_type}"
+                )
+                logger.info(f"嵌入快取: {cache_path}（{self.cache.size_bytes / (1 << 20):.1f} MB / 上限 {cache_max_mb} MB）")
+            
             logger.info(f"成功初始化 {model_name} 嵌入模型，維度: {output_dimensionality}")
             
         except Exception as e:
@@ -157,6 +247,15 @@ class FactCheckEmbedding:
             # 返回零向量作為後備
             return [0.0] * self.output_dimensionality
     
+    def log_cache_statistics(self):
+        """輸出嵌入快取的命中統計"""
+        if self.cache is None:
+            return
+        total = self.cache.hit_count + self.cache.miss_count
+        hit_rate = self.cache.hit_count / total * 100 if total else 0.0
+        logger.info(f"嵌入快取：命中 {self.cache.hit_count} / {total}（{hit_rate:.1f}%），"
+                    f"API 嵌入 {self.cache.miss_count} 個 chunk，快取大小 {self.cache.size_bytes / (1 << 20):.1f} MB")
+    
     def _normalize_embedding(self, embedding: List[float]) -> List[float]:
         """
         正規化嵌入向量（L2 正規化）
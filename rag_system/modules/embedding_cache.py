@@ -0,0 +1,146 @@
+"""
+嵌入快取模組
+以 SQLite 保存已計算過的嵌入向量，鍵為（模型、維度、任務類型、文字）的 SHA-256，
+重建索引或切分方式改變時，只有新出現的 chunk 需要呼叫嵌入 API。
+
+向量以 float32 儲存（768 維約 3 KB）；總大小超過上限時依最近使用時間淘汰最舊的項目。
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key BLOB PRIMARY KEY,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used);
+"""
+
+# 淘汰時降到上限的比例，避免每次寫入都觸發淘汰
+EVICTION_TARGET = 0.9
+# SQLite 單一查詢的參數數量上限以內
+QUERY_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """以內容雜湊為鍵的持久化嵌入快取"""
+
+    def __init__(self, db_path: str, max_bytes: int = 1 << 30):
+        """
+        初始化快取
+
+        Args:
+            db_path: SQLite 資料庫路徑
+            max_bytes: 向量資料的總大小上限（預設 1 GB）
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # 嵌入可能在 LlamaIndex 的背景執行緒中呼叫，連線以鎖保護
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(CACHE_SCHEMA)
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM embeddings').fetchone()[0]
+
+        # 統計資訊
+        self.hit_count = 0
+        self.miss_count = 0
+        self.evicted_count = 0
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> bytes:
+        """快取鍵：命名空間（模型、維度、任務類型）與文字內容的 SHA-256"""
+        return hashlib.sha256(f"{namespace}\0{text}".encode('utf-8')).digest()
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """查詢多個鍵，回傳命中的向量並更新其使用時間"""
+        found = {}
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), QUERY_BATCH_SIZE):
+                batch = unique_keys[start:start + QUERY_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                for key, vector in self._conn.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({placeholders})', batch
+                ):
+                    found[key] = array('f', vector).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany('UPDATE embeddings SET last_used = ? WHERE key = ?',
+                                       [(now, key) for key in found])
+                self._conn.commit()
+
+            self.hit_count += sum(1 for key in keys if key in found)
+            self.miss_count += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, List[float]]]):
+        """寫入多個向量，超過大小上限時淘汰最久未使用的項目"""
+        now = time.time()
+        rows = []
+        for key, embedding in items:
+            vector = array('f', embedding).tobytes()
+            rows.append((key, vector, len(vector), now))
+        if not rows:
+            return
+
+        with self._lock:
+            keys = [row[0] for row in rows]
+            replaced = 0
+            for start in range(0, len(keys), QUERY_BATCH_SIZE):
+                batch = keys[start:start + QUERY_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                replaced += self._conn.execute(
+                    f'SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({placeholders})', batch
+                ).fetchone()[0]
+
+            self._conn.executemany('INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)', rows)
+            self._total_bytes += sum(row[2] for row in rows) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """依最近使用時間刪除最舊的項目，直到總大小降到上限的 EVICTION_TARGET（呼叫前須持有鎖）"""
+        target = self.max_bytes * EVICTION_TARGET
+        evicted_count = 0
+        while self._total_bytes > target:
+            rows = self._conn.execute(
+                'SELECT key, size FROM embeddings ORDER BY last_used LIMIT ?', (QUERY_BATCH_SIZE,)
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+
+            evicted = []
+            for key, size in rows:
+                evicted.append((key,))
+                self._total_bytes -= size
+                if self._total_bytes <= target:
+                    break
+            self._conn.executemany('DELETE FROM embeddings WHERE key = ?', evicted)
+            evicted_count += len(evicted)
+
+        self.evicted_count += evicted_count
+        logger.info(f"嵌入快取超過上限，淘汰 {evicted_count} 筆（目前 {self._total_bytes / (1 << 20):.1f} MB）")
+
+    @property
+    def size_bytes(self) -> int:
+        return self._total_bytes
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
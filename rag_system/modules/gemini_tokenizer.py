@@ -0,0 +1,92 @@
+"""
+Gemini tokenizer 模組
+Gemini 系列模型與 Gemma 3 使用相同的 SentencePiece 詞彙表（google-genai 的 LocalTokenizer 亦以此計算），
+這裡直接以 sentencepiece 載入該模型計算 token 數，讓 chunk 大小與 Gemini 實際的 token 數一致。
+
+模型檔在第一次使用時下載並驗證 SHA-256，快取於 GEMINI_TOKENIZER_PATH（預設 rag_system/data/gemini_tokenizer.model）。
+未安裝 sentencepiece 或無法取得模型檔時，改以字元類別估算：中日韓文字與全形標點每字一個 token，
+其他連續字元約四字一個 token。
+"""
+import functools
+import hashlib
+import math
+import os
+import re
+import urllib.request
+from pathlib import Path
+from typing import Callable, Sequence
+import logging
+
+try:
+    import sentencepiece
+except ImportError:
+    sentencepiece = None
+
+logger = logging.getLogger(__name__)
+
+GEMINI_TOKENIZER_URL = (
+    "https://raw.githubusercontent.com/google/gemma_pytorch/014acb7ac4563a5f77c76d7ff98f31b568c16508"
+    "/tokenizer/gemma3_cleaned_262144_v2.spiece.model"
+)
+GEMINI_TOKENIZER_SHA256 = "1299c11d7cf632ef3b4e11937501358ada021bbdf7c47638d13c0ee982f2e79c"
+# 相對於 rag_system 目錄，不論從哪個工作目錄執行（例如爬蟲的串流索引）都共用同一個模型檔
+DEFAULT_TOKENIZER_PATH = str(Path(__file__).resolve().parent.parent / "data" / "gemini_tokenizer.model")
+
+_CJK_CHARS = r'\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef'
+_CJK_RE = re.compile(f'[{_CJK_CHARS}]')
+_OTHER_RE = re.compile(f'[^{_CJK_CHARS}\\s]+')
+
+
+def estimate_tokens(text: str) -> Sequence[int]:
+    """以字元類別估算 token 數（回傳長度即為 token 數的序列，與 tokenizer 介面相同）"""
+    cjk_count = len(_CJK_RE.findall(text))
+    other_count = sum(math.ceil(len(run) / 4) for run in _OTHER_RE.findall(text))
+    return range(cjk_count + other_count)
+
+
+def _load_model(model_path: str) -> bytes:
+    """讀取快取的模型檔，不存在或雜湊不符時重新下載"""
+    path = Path(model_path)
+    if path.exists():
+        data = path.read_bytes()
+        if hashlib.sha256(data).hexdigest() == GEMINI_TOKENIZER_SHA256:
+            return data
+        logger.warning(f"{model_path} 的雜湊不符，重新下載")
+
+    logger.info(f"下載 Gemini tokenizer 模型: {GEMINI_TOKENIZER_URL}")
+    with urllib.request.urlopen(GEMINI_TOKENIZER_URL, timeout=30) as response:
+        data = response.read()
+    if hashlib.sha256(data).hexdigest() != GEMINI_TOKENIZER_SHA256:
+        raise ValueError("下載的 Gemini tokenizer 模型雜湊不符")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+    return data
+
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_tokenizer(model_path: str = '') -> Callable[[str], Sequence[int]]:
+    """
+    取得 Gemini tokenizer（同一程序內只載入一次）
+
+    Args:
+        model_path: 模型檔快取路徑（預設為環境變數 GEMINI_TOKENIZER_PATH 或 rag_system/data/gemini_tokenizer.model）
+
+    Returns:
+        text -> token 序列的函式，可直接作為 LlamaIndex 切分器的 tokenizer
+    """
+    if sentencepiece is None:
+        logger.warning("未安裝 sentencepiece，以字元類別估算 token 數")
+        return estimate_tokens
+
+    model_path = model_path or os.getenv('GEMINI_TOKENIZER_PATH', DEFAULT_TOKENIZER_PATH)
+    try:
+        processor = sentencepiece.SentencePieceProcessor(model_proto=_load_model(model_path))
+    except Exception as e:
+        logger.warning(f"載入 Gemini tokenizer 失敗，以字元類別估算 token 數: {e}")
+        return estimate_tokens
+
+    logger.info("已載入 Gemini tokenizer")
+    return processor.encode
@@ -0,0 +1,231 @@
+"""
+近似重複偵測模組
+TFC 常針對同一則謠言發布多篇內容幾乎相同的報告。此模組在嵌入前以 MinHash + LSH
+將近似重複的報告分群，每群只嵌入一篇代表報告（資料中最新的一篇），
+群內其他報告的 ID、標題、網址、發布日期與分類記錄在代表報告的 metadata 中，
+檢索結果與引用來源仍可列出每一篇報告；相同內容不會重複嵌入，也不會在 similarity_top_k 的結果中重複出現。
+只有部分段落相同的報告不會被分群，各自嵌入；相同的 chunk 文字由嵌入快取（embedding_cache）共用向量，不會重複呼叫 API。
+
+只有查核結果相同的報告會被分在同一群（同一謠言的不同結論不可互相取代）。
+"""
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+import logging
+import numpy as np
+from .change_manifest import ChangeSet
+
+logger = logging.getLogger(__name__)
+
+# 比對前移除空白與標點，只保留文字內容
+_NORMALIZE_RE = re.compile(r'[\W_]+')
+
+# MinHash 的通用雜湊：(a * x + b) mod p，取 32 位元
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# 字元 shingle 的多項式滾動雜湊基底
+_SHINGLE_BASE = np.uint64(1000003)
+
+# 記錄在代表報告中的群成員欄位（查核結果與代表報告相同，不需重複記錄）
+MEMBER_FIELDS = ('id', 'title', 'content_url', 'publish_date', 'categories')
+
+
+class NearDuplicateDetector:
+    """以 MinHash + LSH 分群近似重複的處理後報告"""
+
+    def __init__(self,
+                 threshold: float = 0.8,
+                 num_perm: int = 128,
+                 bands: int = 32,
+                 shingle_size: int = 5,
+                 seed: int = 1,
+                 clusters_path: Optional[str] = None):
+        """
+        初始化偵測器
+
+        Args:
+            threshold: 估計的 Jaccard 相似度達到此值才視為近似重複
+            num_perm: MinHash 簽章長度
+            bands: LSH 分段數（num_perm 須可被整除）；每段列數越少，候選越多、漏判越少
+            shingle_size: 字元 shingle 長度（中文不需斷詞，直接以連續字元比對）
+            seed: 雜湊參數的亂數種子，固定後每次執行的分群結果一致
+            clusters_path: 分群結果的保存路徑（增量更新時用來比對上次的分群）
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) 必須可被 bands ({bands}) 整除")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.clusters_path = clusters_path
+
+        random_state = np.random.RandomState(seed)
+        # a、b 小於 2^31，與 32 位元的 shingle 雜湊相乘相加不會超過 uint64
+        self._a = random_state.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+        self._b = random_state.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+        # 代表報告 ID -> 群內其他報告的摘要（MEMBER_FIELDS），依資料順序排列
+        self.clusters = {}
+        self.duplicate_count = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        """計算文字的 MinHash 簽章"""
+        normalized = _NORMALIZE_RE.sub('', text)
+        codes = np.frombuffer(normalized.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+        if len(codes) == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+
+        # 字元 k-gram 的滾動雜湊（uint64 溢位即取模 2^64），再摺疊為 32 位元
+        width = min(self.shingle_size, len(codes))
+        count = len(codes) - width + 1
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(width):
+            hashes = hashes * _SHINGLE_BASE + codes[offset:offset + count]
+        hashes = np.unique((hashes >> np.uint64(32)) ^ (hashes & _MAX_HASH))
+
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+    def _document_text(self, document: Dict[str, Any]) -> str:
+        return f"{document.get('title', '')}\n{document.get('processed_content', '')}"
+
+    def _band_keys(self, group: str, signature: np.ndarray) -> List[Tuple[str, int, bytes]]:
+        return [
+            (group, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def fit(self, documents: Iterable[Dict[str, Any]]) -> 'NearDuplicateDetector':
+        """
+        逐筆分群（第一次讀取）
+
+        依資料順序處理，每筆報告與既有代表報告比對，相似度達門檻就併入最相似的一群，
+        否則成為新群的代表；處理後資料為由新到舊，因此代表報告是群內最新的一篇。
+        記憶體中只保留代表報告的簽章。
+        """
+        self.clusters = {}
+        self.duplicate_count = 0
+        signatures = {}
+        buckets = defaultdict(list)
+        seen = set()
+
+        for document in documents:
+            doc_id = document['id']
+            if doc_id in seen:
+                continue
+            seen.add(doc_id)
+
+            signature = self.signature(self._document_text(document))
+            band_keys = self._band_keys(document.get('check_result', ''), signature)
+
+            candidates = {rep_id for key in band_keys for rep_id in buckets.get(key, ())}
+            best_id, best_score = None, self.threshold
+            for rep_id in candidates:
+                score = float(np.mean(signatures[rep_id] == signature))
+                if score >= best_score:
+                    best_id, best_score = rep_id, score
+
+            if best_id is not None:
+                self.clusters[best_id].append({field: document.get(field, '') for field in MEMBER_FIELDS})
+                self.duplicate_count += 1
+                continue
+
+            self.clusters[doc_id] = []
+            signatures[doc_id] = signature
+            for key in band_keys:
+                buckets[key].append(doc_id)
+
+        cluster_count = sum(1 for members in self.clusters.values() if members)
+        logger.info(f"近似重複偵測：{len(seen)} 篇報告，{cluster_count} 群共 {self.duplicate_count} 篇重複，"
+                    f"需嵌入 {len(self.clusters)} 篇")
+        return self
+
+    def _with_links(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        members = self.clusters[document['id']]
+        return dict(
+            document,
+            duplicate_ids=[member['id'] for member in members],
+            duplicate_urls=[member['content_url'] for member in members if member['content_url']],
+            duplicate_reports=members,
+        )
+
+    def collapse(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        只產出代表報告（第二次讀取，須先呼叫 fit）
+
+        代表報告加上 duplicate_ids / duplicate_urls / duplicate_reports 欄位，列出群內的其他報告。
+        """
+        emitted = set()
+        for document in documents:
+            doc_id = document['id']
+            if doc_id in self.clusters and doc_id not in emitted:
+                emitted.add(doc_id)
+                yield self._with_links(document)
+
+    def plan_changes(self, changes: ChangeSet, documents: Iterable[Dict[str, Any]]) -> ChangeSet:
+        """
+        將資料層的差異轉換為向量索引的差異（須先以目前的完整資料呼叫 fit）
+
+        重新嵌入內容有變更、群成員有變動或群成員內容有變更的代表報告；刪除已移除的報告、
+        原本是代表、現在併入其他群的報告，以及新增或變更的群成員（可能已由串流索引寫入）。
+
+        Args:
+            changes: ProcessingManifest 產生的差異
+            documents: 目前完整的處理後資料（用來取得需要重新嵌入的代表報告）
+        """
+        previous = self._load_clusters()
+        changed_ids = {document['id'] for document in changes.upserts}
+
+        if previous is None:
+            # 沒有上次的分群：索引中可能有每一篇報告，群成員一律刪除，有成員的代表報告補上連結
+            upsert_ids = {rep_id for rep_id, members in self.clusters.items() if members or rep_id in changed_ids}
+            removed = set(changes.removed)
+            removed.update(member['id'] for members in self.clusters.values() for member in members)
+        else:
+            upsert_ids = {
+                rep_id for rep_id, members in self.clusters.items()
+                if rep_id in changed_ids
+                or rep_id not in previous
+                or set(previous[rep_id]) != {member['id'] for member in members}
+                # 群成員的標題等欄位記錄在代表報告中，成員變更時代表報告也要更新
+                or any(member['id'] in changed_ids for member in members)
+            }
+            removed = set(changes.removed)
+            removed.update(rep_id for rep_id in previous if rep_id not in self.clusters)
+            removed.update(member['id'] for members in self.clusters.values()
+                           for member in members if member['id'] in changed_ids)
+
+        upserts = [self._with_links(document) for document in documents
+                   if document['id'] in upsert_ids and document['id'] not in removed]
+        unchanged_count = len(self.clusters) - len(upserts)
+        return ChangeSet(added=upserts, removed=sorted(removed), unchanged_count=unchanged_count)
+
+    def _load_clusters(self) -> Optional[Dict[str, List[str]]]:
+        if not self.clusters_path or not os.path.exists(self.clusters_path):
+            return None
+        try:
+            with open(self.clusters_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"讀取分群結果失敗，將重新套用所有分群: {e}")
+            return None
+
+    def commit(self):
+        """向量索引更新成功後保存分群結果（代表報告 ID -> 群成員 ID）"""
+        if not self.clusters_path:
+            return
+
+        Path(self.clusters_path).parent.mkdir(parents=True, exist_ok=True)
+        temp_path = f"{self.clusters_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                rep_id: [member['id'] for member in members]
+                for rep_id, members in self.clusters.items()
+            }, f, ensure_ascii=False)
+        os.replace(temp_path, self.clusters_path)
+        logger.info(f"分群結果已更新: {self.clusters_path}")
@@ -0,0 +1,169 @@
+"""
+節點切分模組
+將處理後的報告轉換為 Document，並以 HierarchicalNodeParser 切分為分層節點。
+
+預設的 SentenceSplitter 以英文標點斷句、以 OpenAI tokenizer 計算長度，繁體中文報告的 chunk 大小
+不一致且葉子節點偏多。這裡每一層改用以全形句末標點（。！？；）斷句、以逗號頓號等斷子句的切分器，
+並以 Gemini tokenizer 計算 token 數；父子節點結構不變，AutoMergingRetriever 仍可合併。
+
+HierarchicalNodeParser 在數萬篇報告上很慢，ParallelNodeParser 將文檔分片後交給
+process pool 平行切分，再依原本的文檔順序合併節點列表。每篇文檔完整地在同一個 worker 中切分，
+父子節點關係不會跨越分片，合併後與單一程序切分的結構相同。
+"""
+import json
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Any, Optional
+import logging
+from llama_index.core import Document
+from llama_index.core.schema import BaseNode
+from llama_index.core.node_parser import HierarchicalNodeParser, SentenceSplitter
+from .gemini_tokenizer import get_gemini_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# 分層切分的三層 chunk 大小與重疊 token 數
+CHUNK_SIZES = [2048, 512, 256]
+CHUNK_OVERLAP = 30
+
+DUPLICATE_METADATA_KEYS = ['duplicate_count', 'duplicate_ids', 'duplicate_urls', 'duplicate_reports']
+
+# 句末標點（全形與半形）與緊接在後的引號、括號歸入同一句；換行也視為句子邊界
+_SENTENCE_END = re.escape('。！？；!?;…')
+_CLOSING = re.escape('」』）》〕】”’"\')]')
+_SENTENCE_BOUNDARY_RE = re.compile(
+    f'(?:(?<=[{_SENTENCE_END}])|(?<=[{_SENTENCE_END}][{_CLOSING}]))(?![{_SENTENCE_END}{_CLOSING}])'
+    '|(?<=\n)(?!\n)'
+)
+# 句子仍超過 chunk 大小時，再以逗號、頓號、冒號斷為子句（findall 須涵蓋所有字元）
+CLAUSE_REGEX = '[^，、：,:]*[，、：,:]+|[^，、：,:]+'
+# 段落分隔（Cofacts 與其他來源以空行分段）
+PARAGRAPH_SEPARATOR = '\n\n'
+
+
+def split_sentences(text: str) -> List[str]:
+    """以中文句末標點斷句，斷開後的句子串接起來與原文相同"""
+    return [sentence for sentence in _SENTENCE_BOUNDARY_RE.split(text) if sentence]
+
+
+def create_node_parser() -> HierarchicalNodeParser:
+    """創建分層節點解析器（每一層都是中文斷句、以 Gemini token 數計算大小的 SentenceSplitter）"""
+    tokenizer = get_gemini_tokenizer()
+    node_parser_ids = [f"chunk_size_{chunk_size}" for chunk_size in CHUNK_SIZES]
+    node_parser_map = {
+        node_parser_id: SentenceSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=CHUNK_OVERLAP,
+            tokenizer=tokenizer,
+            paragraph_separator=PARAGRAPH_SEPARATOR,
+            chunking_tokenizer_fn=split_sentences,
+            secondary_chunking_regex=CLAUSE_REGEX
+        )
+        for node_parser_id, chunk_size in zip(node_parser_ids, CHUNK_SIZES)
+    }
+    return HierarchicalNodeParser.from_defaults(
+        node_parser_ids=node_parser_ids,  # 三層分層結構：2048 / 512 / 256 個 Gemini token
+        node_parser_map=node_parser_map
+    )
+
+
+def report_to_document(doc: Dict[str, Any]) -> Document:
+    """將處理後的報告轉換為 Document 對象"""
+    # 組合文檔內容（標題 + 處理後內容）
+    content = f"標題: {doc['title']}\n\n內容: {doc['processed_content']}"
+
+    # 處理 categories - ChromaDB 不支援列表，轉換為 string
+    categories_list = doc.get('categories', [])
+    categories_str = ', '.join(categories_list) if isinstance(categories_list, list) else str(categories_list)
+
+    # 近似重複的報告（見 near_duplicate 模組）只嵌入代表報告，其餘報告的連結與摘要放在 metadata
+    # （ChromaDB 的 metadata 只接受純量，摘要列表以 JSON 字串儲存）
+    duplicate_ids = doc.get('duplicate_ids', [])
+
+    return Document(
+        text=content,
+        metadata={
+            'id': doc['id'],
+            'title': doc['title'],
+            'check_result': doc['check_result'],
+            'categories': categories_str,
+            'publish_date': doc.get('publish_date', ''),
+            'content_url': doc.get('content_url', ''),
+            'source': doc.get('source', 'TFC'),
+            'duplicate_count': len(duplicate_ids),
+            'duplicate_ids': ','.join(duplicate_ids),
+            'duplicate_urls': ','.join(doc.get('duplicate_urls', [])),
+            'duplicate_reports': json.dumps(doc.get('duplicate_reports', []), ensure_ascii=False)
+        },
+        # 連結列表不參與嵌入與 LLM 上下文，也不佔用切分的 chunk 長度
+        excluded_embed_metadata_keys=DUPLICATE_METADATA_KEYS,
+        excluded_llm_metadata_keys=DUPLICATE_METADATA_KEYS
+    )
+
+
+def duplicate_reports_from_metadata(metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """由節點 metadata 取回群內其他報告的摘要（舊索引沒有此欄位時只有網址）"""
+    reports = metadata.get('duplicate_reports')
+    if reports:
+        return json.loads(reports)
+    return [{'content_url': url} for url in metadata.get('duplicate_urls', '').split(',') if url]
+
+
+def parse_nodes(documents: List[Dict[str, Any]]) -> List[BaseNode]:
+    """切分一批處理後的報告（worker 入口：參數與回傳值皆可 pickle）"""
+    return create_node_parser().get_nodes_from_documents(
+        [report_to_document(doc) for doc in documents]
+    )
+
+
+class ParallelNodeParser:
+    """以 process pool 分片切分文檔的分層節點解析器"""
+
+    def __init__(self, workers: Optional[int] = None, min_shard_size: int = 8):
+        """
+        初始化解析器
+
+        Args:
+            workers: worker 數量（預設為 CPU 核心數；1 表示在目前的程序中切分）
+            min_shard_size: 每個分片至少的文檔數，文檔太少時不值得送到 worker
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard_size = min_shard_size
+        self._executor = None
+
+    def parse(self, documents: List[Dict[str, Any]]) -> List[BaseNode]:
+        """
+        切分文檔並依文檔順序合併節點
+
+        Returns:
+            與 parse_nodes(documents) 結構相同的節點列表
+        """
+        if self.workers <= 1 or len(documents) < self.min_shard_size * 2:
+            return parse_nodes(documents)
+
+        # 每個 worker 分到約兩個分片，切分時間不均時仍能平衡負載
+        shard_count = min(self.workers * 2, math.ceil(len(documents) / self.min_shard_size))
+        shard_size = math.ceil(len(documents) / shard_count)
+        shards = [documents[start:start + shard_size] for start in range(0, len(documents), shard_size)]
+
+        # map 依提交順序回傳結果，合併後的節點順序固定
+        nodes = []
+        for shard_nodes in self._get_executor().map(parse_nodes, shards):
+            nodes.extend(shard_nodes)
+        return nodes
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn：worker 不繼承父程序的 ChromaDB 連線與嵌入模型的執行緒
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+            logger.info(f"啟動 {self.workers} 個節點切分 worker")
+        return self._executor
+
+    def close(self):
+        """關閉 worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,174 @@
+"""
+分層節點儲存模組
+以 SQLite 保存所有分層節點（父節點與葉子節點），作為 AutoMergingRetriever 的文檔儲存器。
+
+Chroma 只保存葉子節點的向量；AutoMerging 合併時需要依節點 ID 取回父節點與相鄰的葉子節點。
+節點放在磁碟上、只在檢索時按需讀取，建立索引時記憶體用量不隨語料大小成長，
+增量更新與重新啟動後也不需要重新切分整份語料。
+"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import logging
+from llama_index.core.schema import BaseNode
+from llama_index.core.storage.docstore.keyval_docstore import KVDocumentStore
+from llama_index.core.storage.kvstore.types import BaseKVStore, DEFAULT_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+KV_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    collection TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (collection, key)
+);
+"""
+
+# 報告 ID 對應節點 ID 列表（依報告刪除節點時使用）
+REPORT_COLLECTION = 'report_nodes'
+# 節點儲存器的狀態（是否涵蓋向量資料庫中的所有報告）
+META_COLLECTION = 'node_store_meta'
+
+
+class SQLiteKVStore(BaseKVStore):
+    """以 SQLite 實作的 LlamaIndex KV store（值為 JSON）"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        # 串流索引在背景執行緒寫入，連線以鎖保護
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(KV_SCHEMA)
+
+    def put(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put_all([(key, val)], collection=collection)
+
+    async def aput(self, key: str, val: dict, collection: str = DEFAULT_COLLECTION) -> None:
+        self.put(key, val, collection)
+
+    def put_all(self, kv_pairs: Sequence[Tuple[str, dict]], collection: str = DEFAULT_COLLECTION,
+                batch_size: int = 1) -> None:
+        """在同一個交易中寫入多筆（batch_size 僅為相容介面）"""
+        rows = [(collection, key, json.dumps(val, ensure_ascii=False)) for key, val in kv_pairs]
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO kv VALUES (?, ?, ?)', rows)
+
+    async def aput_all(self, kv_pairs: Sequence[Tuple[str, dict]], collection: str = DEFAULT_COLLECTION,
+                       batch_size: int = 1) -> None:
+        self.put_all(kv_pairs, collection, batch_size)
+
+    def get(self, key: str, collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM kv WHERE collection = ? AND key = ?', (collection, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def aget(self, key: str, collection: str = DEFAULT_COLLECTION) -> Optional[dict]:
+        return self.get(key, collection)
+
+    def get_all(self, collection: str = DEFAULT_COLLECTION) -> Dict[str, dict]:
+        with self._lock:
+            rows = self._conn.execute('SELECT key, value FROM kv WHERE collection = ?', (collection,)).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    async def aget_all(self, collection: str = DEFAULT_COLLECTION) -> Dict[str, dict]:
+        return self.get_all(collection)
+
+    def delete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute('DELETE FROM kv WHERE collection = ? AND key = ?', (collection, key))
+        return cursor.rowcount > 0
+
+    async def adelete(self, key: str, collection: str = DEFAULT_COLLECTION) -> bool:
+        return self.delete(key, collection)
+
+    def count(self, collection: str = DEFAULT_COLLECTION) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM kv WHERE collection = ?', (collection,)).fetchone()[0]
+
+    def clear(self):
+        """刪除所有資料"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM kv')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class NodeStore:
+    """以報告 ID 管理的分層節點儲存器"""
+
+    def __init__(self, db_path: str, namespace: str = 'fact_check'):
+        """
+        初始化節點儲存器
+
+        Args:
+            db_path: SQLite 資料庫路徑（放在向量資料庫目錄中）
+            namespace: 文檔儲存器的命名空間
+        """
+        self.db_path = db_path
+        self.kvstore = SQLiteKVStore(db_path)
+        self.docstore = KVDocumentStore(self.kvstore, namespace=namespace)
+        self._node_collection = f"{namespace}/data"
+
+    def add_nodes(self, nodes: List[BaseNode]):
+        """寫入一批分層節點，並記錄每篇報告的節點 ID"""
+        if not nodes:
+            return
+        self.docstore.add_documents(nodes, allow_update=True)
+
+        report_nodes = {}
+        for node in nodes:
+            report_nodes.setdefault(node.metadata.get('id', ''), []).append(node.node_id)
+        self.kvstore.put_all(
+            [(report_id, {'node_ids': node_ids}) for report_id, node_ids in report_nodes.items()],
+            collection=REPORT_COLLECTION
+        )
+
+    def delete_reports(self, report_ids: List[str]) -> int:
+        """
+        刪除報告的所有節點（報告更新或移除時，與 Chroma 中的向量同步刪除）
+
+        Returns:
+            刪除的節點數量
+        """
+        deleted = 0
+        for report_id in report_ids:
+            entry = self.kvstore.get(report_id, collection=REPORT_COLLECTION)
+            if not entry:
+                continue
+            for node_id in entry['node_ids']:
+                self.docstore.delete_document(node_id, raise_error=False)
+                deleted += 1
+            self.kvstore.delete(report_id, collection=REPORT_COLLECTION)
+        return deleted
+
+    def count(self) -> int:
+        """節點數量"""
+        return self.kvstore.count(self._node_collection)
+
+    @property
+    def complete(self) -> bool:
+        """
+        節點儲存器是否涵蓋向量資料庫中的所有報告
+
+        節點儲存器與空的向量資料庫一起建立（或一起清空）後，之後的每次寫入與刪除都會同步，
+        才是完整的；在此之前就已存在的索引缺少父節點，AutoMerging 無法合併。
+        """
+        status = self.kvstore.get('status', collection=META_COLLECTION)
+        return bool(status and status.get('complete'))
+
+    def reset(self):
+        """清空所有節點並標記為完整（向量資料庫為空或重建索引時使用）"""
+        self.kvstore.clear()
+        self.kvstore.put('status', {'complete': True}, collection=META_COLLECTION)
+        logger.info(f"已清空分層節點儲存: {self.db_path}")
@@ -10,6 +10,7 @@ from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.llms.gemini import Gemini
 from llama_index.core import PromptTemplate
 from .retriever import FactCheckRetriever
+from .node_parser import duplicate_reports_from_metadata
 
 # 載入環境變數
 load_dotenv()
@@ -195,7 +196,9 @@ class FactCheckQueryEngine:
                             'check_result': metadata.get('check_result', ''),
                             'categories': metadata.get('categories', []),
                             'publish_date': metadata.get('publish_date', ''),
-                            'content_url': metadata.get('content_url', '')
+                            'content_url': metadata.get('content_url', ''),
+                            'duplicate_urls': [url for url in metadata.get('duplicate_urls', '').split(',') if url],
+                            'duplicate_reports': duplicate_reports_from_metadata(metadata)
                         })
                     
                     sources.append(source)
@@ -5,10 +5,9 @@
 import logging
 from typing import List, Dict, Any, Optional
 from llama_index.core.retrievers import AutoMergingRetriever
-from llama_index.core.storage.docstore import SimpleDocumentStore
 from llama_index.core import StorageContext
-from llama_index.core.node_parser import get_leaf_nodes
 from .vector_index import FactCheckVectorStore
+from .node_parser import duplicate_reports_from_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +30,7 @@ class FactCheckRetriever:
             raise ValueError("向量索引尚未建立，請先執行 vector_store.build_index()")
         
         self.index = self.vector_store.index
-        self.nodes = self.vector_store.nodes
+        self.docstore = self.vector_store.docstore
         
         # 初始化檢索器
         self._setup_retrievers()
@@ -41,19 +40,12 @@ class FactCheckRetriever:
     def _setup_retrievers(self):
         """設置檢索器"""
         try:
-            # 創建文檔儲存器
-            docstore = SimpleDocumentStore()
-            
-            # 將所有節點添加到文檔儲存器
-            if self.nodes:
-                docstore.add_documents(self.nodes)
-                logger.info(f"添加了 {len(self.nodes)} 個節點到文檔儲存器")
+            # 分層節點儲存在向量資料庫目錄中，檢索時才按需讀取父節點
+            node_count = self.vector_store.node_store.count()
+            logger.info(f"文檔儲存器中有 {node_count} 個分層節點")
             
             # 創建儲存上下文
-            storage_context = StorageContext.from_defaults(docstore=docstore)
-            
-            # 獲取葉子節點
-            leaf_nodes = get_leaf_nodes(self.nodes) if self.nodes else []
+            storage_context = StorageContext.from_defaults(docstore=self.docstore)
             
             # 創建基礎檢索器
             self.base_retriever = self.index.as_retriever(
@@ -61,7 +53,7 @@ class FactCheckRetriever:
             )
             
             # 創建 AutoMerging 檢索器
-            if leaf_nodes and storage_context:
+            if self.vector_store.supports_auto_merging:
                 self.auto_merging_retriever = AutoMergingRetriever(
                     base_retriever=self.base_retriever,
                     storage_context=storage_context,
@@ -69,7 +61,10 @@ class FactCheckRetriever:
                 )
                 logger.info("成功創建 AutoMerging 檢索器")
             else:
-                logger.warning("無法創建 AutoMerging 檢索器，將使用基礎檢索器")
+                logger.warning(
+                    "分層節點儲存為空或不完整，無法創建 AutoMerging 檢索器，將使用基礎檢索器"
+                    "（執行 --force-rebuild 重建索引即可恢復）"
+                )
                 self.auto_merging_retriever = self.base_retriever
             
         except Exception as e:
@@ -122,6 +117,8 @@ class FactCheckRetriever:
                     result['categories'] = metadata.get('categories', [])
                     result['publish_date'] = metadata.get('publish_date', '')
                     result['content_url'] = metadata.get('content_url', '')
+                    result['duplicate_urls'] = [url for url in metadata.get('duplicate_urls', '').split(',') if url]
+                    result['duplicate_reports'] = duplicate_reports_from_metadata(metadata)
                 
                 results.append(result)
             
@@ -239,7 +236,7 @@ class FactCheckRetriever:
             info = {
                 'similarity_top_k': self.similarity_top_k,
                 'has_auto_merging': hasattr(self, 'auto_merging_retriever'),
-                'node_count': len(self.nodes) if self.nodes else 0,
+                'node_count': self.vector_store.node_store.count(),
                 'index_type': type(self.index).__name__ if self.index else None
             }
             
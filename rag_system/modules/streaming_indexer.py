@@ -0,0 +1,138 @@
+"""
+串流索引模組
+爬蟲每產生一筆報告就送入有界佇列，由背景 worker 批次清理、嵌入並 upsert 到 Chroma 集合，
+新報告在爬取後數分鐘內即可被檢索，不必等待整個爬取結束再重建索引
+
+串流寫入的報告沒有經過近似重複合併與樣板段落移除，因此不記入變更清單：
+下次執行 main.py 時會被視為新增並重新處理，代表報告以移除樣板後的內容重新 upsert，
+群成員則從索引中刪除（內容未變的 chunk 由嵌入快取取得，不會重新呼叫嵌入 API）。
+"""
+import queue
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional
+from .data_processor import TFCDataProcessor
+from .vector_index import FactCheckVectorStore
+
+logger = logging.getLogger(__name__)
+
+# 通知 worker 結束的標記
+_STOP = object()
+
+class StreamingIndexer:
+    """以有界佇列串接爬蟲與向量索引的背景 worker"""
+
+    def __init__(self,
+                 vector_store: FactCheckVectorStore,
+                 processor: Optional[TFCDataProcessor] = None,
+                 queue_size: int = 200,
+                 batch_size: int = 20,
+                 flush_interval: float = 10.0):
+        """
+        初始化串流索引器
+
+        Args:
+            vector_store: 向量儲存器實例
+            processor: 資料處理器（負責清理單筆報告）
+            queue_size: 佇列上限，佇列滿時 put() 會阻塞，讓記憶體用量維持固定
+            batch_size: 每批嵌入的報告數量
+            flush_interval: 批次未滿時最多等待的秒數
+        """
+        self.vector_store = vector_store
+        self.processor = processor or TFCDataProcessor()
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # 統計資訊
+        self.indexed_count = 0
+        self.skipped_count = 0
+        self.failed_count = 0
+        self.node_count = 0
+
+        # 跨批次遞增的報告序號（沒有報告編號與網址時用於產生 ID）
+        self._record_index = 0
+        self._worker = None
+
+    def start(self) -> 'StreamingIndexer':
+        """啟動背景 worker"""
+        self._worker = threading.Thread(target=self._run, name='streaming-indexer', daemon=True)
+        self._worker.start()
+        logger.info(f"串流索引 worker 已啟動（佇列上限 {self.queue.maxsize}，每批 {self.batch_size} 篇）")
+        return self
+
+    def put(self, record: Dict[str, Any], timeout: Optional[float] = None):
+        """送入一筆原始報告，佇列已滿時阻塞直到 worker 消化"""
+        self.queue.put(record, timeout=timeout)
+
+    def try_put(self, record: Dict[str, Any]) -> bool:
+        """不阻塞地送入一筆原始報告，佇列已滿時回傳 False"""
+        try:
+            self.queue.put_nowait(record)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self, timeout: Optional[float] = None):
+        """送出結束標記並等待佇列中的報告全部寫入"""
+        if self._worker is None:
+            return
+        self.queue.put(_STOP)
+        self._worker.join(timeout)
+        self._worker = None
+        logger.info(
+            f"串流索引結束：寫入 {self.indexed_count} 篇（{self.node_count} 個葉子節點），"
+            f"跳過 {self.skipped_count} 篇，失敗 {self.failed_count} 篇"
+        )
+
+    def _run(self):
+        """worker 主迴圈：湊滿一批或等待逾時後寫入"""
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+
+            if record is _STOP:
+                self._index_batch(batch)
+                return
+
+            if record is not None:
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self._index_batch(batch)
+                batch = []
+                deadline = None
+
+    def _index_batch(self, records):
+        """清理一批報告後 upsert 到向量資料庫"""
+        if not records:
+            return
+
+        documents = []
+        for record in records:
+            self._record_index += 1
+            try:
+                document = self.processor.process_record(record, self._record_index)
+            except Exception as e:
+                logger.error(f"處理報告 {record.get('content_url', '')} 時發生錯誤: {e}")
+                document = None
+            if document is None:
+                self.skipped_count += 1
+            else:
+                documents.append(document)
+
+        try:
+            self.node_count += self.vector_store.upsert_documents(documents)
+            self.indexed_count += len(documents)
+        except Exception as e:
+            # 單一批次失敗（例如嵌入 API 暫時不可用）不中斷爬取，下次重建索引時會補上
+            self.failed_count += len(documents)
+            logger.error(f"寫入 {len(documents)} 篇報告到向量資料庫失敗: {e}")
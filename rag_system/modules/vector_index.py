@@ -3,18 +3,21 @@
 使用 ChromaDB 建立本地向量資料庫並進行索引
 """
 import os
-import json
 import logging
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Optional, Iterable
 from pathlib import Path
 import chromadb
 from chromadb.config import Settings
-from llama_index.core import Document, StorageContext, VectorStoreIndex
+from llama_index.core import VectorStoreIndex
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.core.schema import TextNode
-from llama_index.core.node_parser import HierarchicalNodeParser, SentenceSplitter
 from llama_index.core.node_parser import get_leaf_nodes
 from .embedding import FactCheckEmbedding
+from .data_processor import iter_json_records
+from .change_manifest import ChangeSet
+from .node_parser import ParallelNodeParser
+from .node_store import NodeStore
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +27,8 @@ class FactCheckVectorStore:
     def __init__(self, 
                  persist_path: str = "vector_store_db",
                  collection_name: str = "fact_check_collection",
-                 embedding_dim: int = 768):
+                 embedding_dim: int = 768,
+                 parse_workers: int = 1):
         """
         初始化向量儲存器
         
@@ -32,10 +36,12 @@ class FactCheckVectorStore:
             persist_path: 持久化儲存路徑
             collection_name: 集合名稱
             embedding_dim: 嵌入維度
+            parse_workers: 切分分層節點的 worker 數量（1 表示在目前的程序中切分）
         """
         self.persist_path = persist_path
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        self.node_parser = ParallelNodeParser(workers=parse_workers)
         
         # 確保儲存目錄存在
         Path(persist_path).mkdir(parents=True, exist_ok=True)
@@ -51,9 +57,14 @@ class FactCheckVectorStore:
         # 初始化 ChromaDB 客戶端
         self._init_chroma_client()
         
+        # 分層節點存放在向量資料庫目錄中的 SQLite，不保留在記憶體中
+        self.node_store = NodeStore(os.path.join(persist_path, 'node_store.db'))
+        if self.chroma_collection.count() == 0:
+            # 空的向量資料庫：節點儲存器從頭與之同步
+            self.node_store.reset()
+        
         # 初始化向量索引
         self.index = None
-        self.nodes = []
         
     def _init_chroma_client(self):
         """初始化 ChromaDB 客戶端"""
@@ -91,41 +102,8 @@ class FactCheckVectorStore:
             節點列表
         """
         try:
-            # 將字典轉換為 Document 對象
-            doc_objects = []
-            
-            for doc in documents:
-                # 組合文檔內容（標題 + 處理後內容）
-                content = f"標題: {doc['title']}\n\n內容: {doc['processed_content']}"
-                
-                # 處理 categories - ChromaDB 不支援列表，轉換為 string
-                categories_list = doc.get('categories', [])
-                categories_str = ', '.join(categories_list) if isinstance(categories_list, list) else str(categories_list)
-                
-                # 創建文檔對象
-                document = Document(
-                    text=content,
-                    metadata={
-                        'id': doc['id'],
-                        'title': doc['title'],
-                        'check_result': doc['check_result'],
-                        'categories': categories_str,  
-                        'publish_date': doc.get('publish_date', ''),
-                        'content_url': doc.get('content_url', ''),
-                        'source': doc.get('source', 'TFC')
-                    }
-                )
-                
-                doc_objects.append(document)
-            
-            # 創建分層節點解析器
-            node_parser = HierarchicalNodeParser.from_defaults(
-                chunk_sizes=[2048, 512, 256],  # 三層分層結構，調整為更合理的大小
-                chunk_overlap=30
-            )
-            
-            # 解析節點
-            nodes = node_parser.get_nodes_from_documents(doc_objects)
+            # 轉換為 Document 對象並解析節點（parse_workers > 1 時分片平行切分）
+            nodes = self.node_parser.parse(documents)
             
             logger.info(f"創建了 {len(nodes)} 個分層節點")
             
@@ -133,20 +111,120 @@ class FactCheckVectorStore:
             leaf_nodes = get_leaf_nodes(nodes)
             logger.info(f"其中 {len(leaf_nodes)} 個葉子節點")
             
-            self.nodes = nodes
             return nodes
             
         except Exception as e:
             logger.error(f"創建分層節點失敗: {e}")
             raise
     
-    def build_index(self, documents: List[Dict[str, Any]], force_rebuild: bool = False):
+    def upsert_documents(self, documents: List[Dict[str, Any]]) -> int:
+        """
+        增量新增或更新文檔（不重建整個索引）
+        
+        先刪除同一報告 ID 的舊向量，再切分、嵌入並寫入新的葉子節點。
+        分層節點不保留在記憶體中，長時間串流寫入時記憶體用量維持固定。
+        
+        Args:
+            documents: 處理後的文檔列表
+            
+        Returns:
+            寫入的葉子節點數量
+        """
+        if not documents:
+            return 0
+        
+        # 移除舊版本的向量與分層節點
+        doc_ids = [doc['id'] for doc in documents]
+        self.chroma_collection.delete(where={'id': {'$in': doc_ids}})
+        self.node_store.delete_reports(doc_ids)
+        
+        nodes = self._insert_documents(documents)
+        leaf_count = len(get_leaf_nodes(nodes))
+        
+        logger.info(f"增量寫入 {len(documents)} 篇文檔，共 {leaf_count} 個葉子節點")
+        return leaf_count
+    
+    def delete_documents(self, doc_ids: List[str], batch_size: int = 500) -> int:
+        """
+        依報告 ID 刪除文檔的所有向量
+        
+        Returns:
+            刪除的文檔數量
+        """
+        for start in range(0, len(doc_ids), batch_size):
+            self.chroma_collection.delete(where={'id': {'$in': doc_ids[start:start + batch_size]}})
+        self.node_store.delete_reports(doc_ids)
+        
+        if doc_ids:
+            logger.info(f"已刪除 {len(doc_ids)} 篇文檔的向量")
+        return len(doc_ids)
+        
+    def apply_changes(self, changes: ChangeSet, batch_size: int = 100) -> int:
+        """
+        套用資料處理產生的差異：刪除已移除的文檔，重新嵌入新增與變更的文檔
+        
+        Args:
+            changes: 變更偵測的差異
+            batch_size: 每批嵌入的文檔數量
+        
+        Returns:
+            寫入的葉子節點數量
+        """
+        logger.info(f"套用資料變更：{changes.summary()}")
+        self.delete_documents(changes.removed)
+        
+        upserts = changes.upserts
+        leaf_count = 0
+        try:
+            for start in range(0, len(upserts), batch_size):
+                leaf_count += self.upsert_documents(upserts[start:start + batch_size])
+        finally:
+            self.node_parser.close()
+        
+        if self.index is None:
+            self._load_existing_index()
+        
+        logger.info(f"向量資料庫中現有 {self.chroma_collection.count()} 個向量")
+        self.embedder.log_cache_statistics()
+        return leaf_count
+    
+    def _insert_documents(self, documents: List[Dict[str, Any]], show_progress: bool = False) -> List[TextNode]:
+        """切分一批文檔並將葉子節點嵌入後寫入 Chroma，回傳該批的所有分層節點"""
+        nodes = self.node_parser.parse(documents)
+        
+        if self.index is None:
+            vector_store = ChromaVectorStore(chroma_collection=self.chroma_collection)
+            self.index = VectorStoreIndex.from_vector_store(
+                vector_store=vector_store,
+                embed_model=self.embedder.embed_model,
+                show_progress=show_progress
+            )
+        
+        # insert_nodes 會以 embed_model 批次嵌入後寫入 Chroma
+        self.index.insert_nodes(get_leaf_nodes(nodes))
+        
+        # 所有分層節點寫入磁碟上的文檔儲存器，供 AutoMerging 取回父節點
+        self.node_store.add_nodes(nodes)
+        return nodes
+    
+    def build_index(self,
+                    documents: Iterable[Dict[str, Any]],
+                    force_rebuild: bool = False,
+                    batch_size: int = 100) -> bool:
         """
         建立向量索引
         
+        文檔逐批切分、嵌入並寫入，可直接傳入 iter_json_records 等 generator，
+        不需要先把所有文檔載入記憶體。分層節點逐批寫入磁碟上的節點儲存器，
+        記憶體用量只取決於 batch_size。
+        
         Args:
-            documents: 文檔列表
+            documents: 文檔列表或 generator
             force_rebuild: 是否強制重建索引
+            batch_size: 每批切分與嵌入的文檔數量
+            
+        Returns:
+            是否實際建立了索引（選擇沿用現有索引時為 False，documents 不會被讀取）
         """
         try:
             # 檢查是否需要重建
@@ -160,7 +238,7 @@ class FactCheckVectorStore:
                     elif response == 'N':
                         logger.info("載入現有索引...")
                         self._load_existing_index()
-                        return
+                        return False
                     else:
                         print("輸入無效！請輸入 Y 或 N")
 
@@ -174,45 +252,48 @@ class FactCheckVectorStore:
                     name=self.collection_name,
                     metadata={"description": "事實查核報告向量資料庫"}
                 )
+                self.node_store.reset()
             
-            # 創建分層節點
-            nodes = self.create_hierarchical_nodes(documents)
-            
-            # 獲取葉子節點用於索引
-            leaf_nodes = get_leaf_nodes(nodes)
-            
-            # 設置 ChromaVectorStore
-            vector_store = ChromaVectorStore(chroma_collection=self.chroma_collection)
-            storage_context = StorageContext.from_defaults(vector_store=vector_store)
-            
-            # 創建向量索引 
-            batch_size = 50  # 每批處理的節點數量
-            total_batches = (len(leaf_nodes) + batch_size - 1) // batch_size
-            
-            logger.info(f"將分 {total_batches} 批處理 {len(leaf_nodes)} 個節點，每批 {batch_size} 個")
+            # 逐批切分並寫入，每批的文檔與節點用完即釋放
+            self.index = None
+            document_iter = iter(documents)
+            document_count = 0
+            leaf_count = 0
+            logger.info(f"每批處理 {batch_size} 篇文檔")
             
             try:
-                # 創建向量索引
-                self.index = VectorStoreIndex(
-                    leaf_nodes,
-                    storage_context=storage_context,
-                    embed_model=self.embedder.embed_model,
-                    show_progress=True
-                )
+                while True:
+                    batch = list(islice(document_iter, batch_size))
+                    if not batch:
+                        break
+                    
+                    nodes = self._insert_documents(batch, show_progress=True)
+                    document_count += len(batch)
+                    leaf_count += len(get_leaf_nodes(nodes))
+                    logger.info(f"已索引 {document_count} 篇文檔，共 {leaf_count} 個葉子節點")
             except Exception as e:
                 if "503" in str(e) or "UNAVAILABLE" in str(e):
                     logger.warning(f"\nAPI 服務暫時不可用，請稍後重試: {e}")
                     logger.info("建議: 等待幾分鐘後重新執行，或使用較小的資料集進行測試")
                 raise
             
-            logger.info(f"成功建立向量索引，索引了 {len(leaf_nodes)} 個葉子節點")
+            if self.index is None:
+                # 沒有任何文檔時仍建立空索引，讓檢索器可以初始化
+                self._load_existing_index()
+                return True
+            
+            logger.info(f"成功建立向量索引，索引了 {document_count} 篇文檔、{leaf_count} 個葉子節點")
             logger.info(f"向量資料庫中現有 {self.chroma_collection.count()} 個向量")
+            self.embedder.log_cache_statistics()
             
             self._show_index_statistics()
+            return True
             
         except Exception as e:
             logger.error(f"建立向量索引失敗: {e}")
             raise
+        finally:
+            self.node_parser.close()
     
     def _load_existing_index(self):
         """載入現有索引"""
@@ -225,6 +306,11 @@ class FactCheckVectorStore:
             )
             
             logger.info("成功載入現有向量索引")
+            if self.chroma_collection.count() > 0 and not self.supports_auto_merging:
+                logger.warning(
+                    "分層節點儲存不完整（向量索引建立於節點儲存之前），AutoMerging 檢索器將改用基礎檢索；"
+                    "執行 --force-rebuild 重建索引即可恢復"
+                )
             self._show_index_statistics()
             
         except Exception as e:
@@ -257,6 +343,16 @@ class FactCheckVectorStore:
         """獲取向量索引"""
         return self.index
     
+    @property
+    def docstore(self):
+        """分層節點的文檔儲存器（AutoMergingRetriever 使用）"""
+        return self.node_store.docstore
+    
+    @property
+    def supports_auto_merging(self) -> bool:
+        """節點儲存器涵蓋所有已索引的報告，AutoMerging 可以取回每個葉子節點的父節點"""
+        return self.node_store.complete and self.node_store.count() > 0
+    
     def search_similar(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         搜索相似文檔
@@ -303,6 +399,7 @@ class FactCheckVectorStore:
                 'collection_name': self.collection_name,
                 'document_count': count,
                 'embedding_dimension': self.embedding_dim,
+                'hierarchical_node_count': self.node_store.count(),
                 'persist_path': self.persist_path
             }
         except Exception as e:
@@ -317,16 +414,14 @@ def main():
             print("請先執行 data_processor.py 來處理資料")
             return
         
-        with open(data_file, 'r', encoding='utf-8') as f:
-            documents = json.load(f)
-        
-        print(f"載入了 {len(documents)} 個文檔")
+        # 逐筆讀取處理後的資料
+        documents = iter_json_records(data_file)
         
         # 初始化向量儲存器
         vector_store = FactCheckVectorStore()
         
         # 建立索引
-        vector_store.build_index(documents[:100])  # 先測試 100 個文檔
+        vector_store.build_index(islice(documents, 100))  # 先測試 100 個文檔
         
         # 測試搜索
         test_query = "阿米斯音樂節詐騙"
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 與 main.py 相同，以 rag_system 目錄下的 modules 套件匯入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,51 @@
+from modules.boilerplate import BoilerplateStripper
+
+FOOTER = "本報告由台灣事實查核中心查核，歡迎分享轉載並註明出處。"
+
+
+def make_stripper(**kwargs):
+    kwargs.setdefault('min_documents', 2)
+    return BoilerplateStripper(tokenizer=list, chunk_counter=lambda document: 1, **kwargs)
+
+
+def make_reports():
+    return [
+        {'title': f"報告{i}", 'processed_content': f"第{i}篇報告指出，網傳COVID-19疫苗接種後會產生磁性的說法並不正確。\n\n{FOOTER}"}
+        for i in range(10)
+    ]
+
+
+def test_strips_paragraph_shared_by_most_reports():
+    reports = make_reports()
+    stripper = make_stripper().fit(reports)
+
+    stripped = stripper.strip(reports[0])
+
+    assert stripped['processed_content'] == "第0篇報告指出，網傳COVID-19疫苗接種後會產生磁性的說法並不正確。"
+    assert stripper.stats['stripped_documents'] == 1
+    assert stripper.stats['removed_paragraphs'] == 1
+
+
+def test_keeps_shared_phrases_inside_sentences():
+    reports = make_reports()
+    stripper = make_stripper().fit(reports)
+
+    for report in reports:
+        content = stripper.strip(report)['processed_content']
+        assert "網傳COVID-19疫苗接種後會產生磁性的說法並不正確" in content
+
+
+def test_keeps_paragraph_below_document_share():
+    reports = make_reports()
+    reports[0]['processed_content'] += "\n\n相關查核：疫苗謠言整理請見本中心專題頁面。"
+    reports[1]['processed_content'] += "\n\n相關查核：疫苗謠言整理請見本中心專題頁面。"
+    stripper = make_stripper().fit(reports)
+
+    assert "相關查核" in stripper.strip(reports[0])['processed_content']
+
+
+def test_keeps_document_made_only_of_boilerplate():
+    reports = make_reports() + [{'title': "頁尾", 'processed_content': FOOTER}]
+    stripper = make_stripper().fit(reports)
+
+    assert stripper.strip(reports[-1])['processed_content'] == FOOTER
@@ -0,0 +1,63 @@
+from modules.change_manifest import ChangeSet, ProcessingManifest
+
+
+def report(report_id, content="內容"):
+    return {'id': report_id, 'title': f"標題 {report_id}", 'processed_content': content}
+
+
+def track(manifest, records):
+    return list(manifest.track(records))
+
+
+def test_first_run_adds_every_record(tmp_path):
+    manifest = ProcessingManifest(str(tmp_path / 'manifest.json'))
+
+    track(manifest, [report('tfc_1'), report('tfc_2')])
+
+    assert not manifest.exists
+    assert [record['id'] for record in manifest.changes.added] == ['tfc_1', 'tfc_2']
+    assert manifest.changes.changed == [] and manifest.changes.removed == []
+
+
+def test_detects_added_changed_and_removed_records(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    manifest = ProcessingManifest(path)
+    track(manifest, [report('tfc_1'), report('tfc_2'), report('tfc_3')])
+    manifest.commit()
+
+    manifest = ProcessingManifest(path)
+    track(manifest, [report('tfc_1'), report('tfc_2', "更新後的內容"), report('tfc_4')])
+    changes = manifest.changes
+
+    assert [record['id'] for record in changes.added] == ['tfc_4']
+    assert [record['id'] for record in changes.changed] == ['tfc_2']
+    assert changes.removed == ['tfc_3']
+    assert changes.unchanged_count == 1
+    assert [record['id'] for record in changes.upserts] == ['tfc_4', 'tfc_2']
+
+
+def test_uncommitted_changes_are_detected_again(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    manifest = ProcessingManifest(path)
+    track(manifest, [report('tfc_1')])
+    manifest.commit()
+
+    track(manifest, [report('tfc_1', "更新後的內容")])
+    manifest = ProcessingManifest(path)
+    track(manifest, [report('tfc_1', "更新後的內容")])
+
+    assert [record['id'] for record in manifest.changes.changed] == ['tfc_1']
+
+
+def test_track_yields_every_record_but_tracks_first_duplicate(tmp_path):
+    manifest = ProcessingManifest(str(tmp_path / 'manifest.json'))
+
+    records = track(manifest, [report('mygopen_1', "第一篇"), report('mygopen_1', "第二篇")])
+
+    assert len(records) == 2
+    assert [record['processed_content'] for record in manifest.changes.added] == ["第一篇"]
+
+
+def test_change_set_is_empty():
+    assert ChangeSet().is_empty()
+    assert not ChangeSet(removed=['tfc_1']).is_empty()
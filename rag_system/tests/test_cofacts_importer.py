@@ -0,0 +1,61 @@
+import hashlib
+from pathlib import Path
+
+from modules.cofacts_importer import CofactsImporter
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures' / 'cofacts'
+
+PROCESSED_FIELDS = {'id', 'title', 'processed_content', 'check_result', 'categories',
+                    'publish_date', 'content_url', 'source'}
+
+
+def import_fixture(tmp_path):
+    importer = CofactsImporter(str(FIXTURE_DIR), index_dir=str(tmp_path))
+    records = {record['content_url'].rsplit('/', 1)[-1]: record for record in importer.iter_records()}
+    return importer, records
+
+
+def test_skips_not_article_and_blocked_articles(tmp_path):
+    importer, records = import_fixture(tmp_path)
+
+    # a2 只有 NOT_ARTICLE 回應，a3 的文章狀態不是 NORMAL
+    assert sorted(records) == ['a1', 'a4', 'a5']
+    assert importer.article_count == 5
+    assert importer.imported_count == 3
+
+
+def test_maps_best_reply_to_check_result(tmp_path):
+    _, records = import_fixture(tmp_path)
+
+    # a1：評價最高的 RUMOR 回應
+    assert records['a1']['check_result'] == '錯誤'
+    assert "查核回應：熱水無法殺死體內的病毒。" in records['a1']['processed_content']
+    assert "參考資料：https://www.cdc.gov.tw/" in records['a1']['processed_content']
+    # a4：同分時取最早的回應
+    assert records['a4']['check_result'] == '事實釐清'
+    assert "尚未定案" in records['a4']['processed_content']
+    # a5：略過 NOT_ARTICLE 與已刪除的回應；replyType 為空時以 replies.type 代替
+    assert records['a5']['check_result'] == '錯誤'
+
+
+def test_record_schema(tmp_path):
+    _, records = import_fixture(tmp_path)
+    record = records['a1']
+
+    assert set(record) == PROCESSED_FIELDS
+    assert record['id'] == 'cofacts_' + hashlib.sha1(b'https://cofacts.tw/article/a1').hexdigest()[:16]
+    assert record['source'] == 'Cofacts'
+    assert record['title'] == '喝熱水可以殺死新冠病毒'
+    assert record['publish_date'] == '2023-01-05'
+    # 負評多於正評與已刪除的分類不匯入
+    assert record['categories'] == ['COVID-19 疫情']
+    assert records['a4']['categories'] == ['政治與政策']
+
+
+def test_removes_only_its_own_index(tmp_path):
+    other = tmp_path / 'other.db'
+    other.write_bytes(b'keep')
+
+    import_fixture(tmp_path)
+
+    assert [path.name for path in tmp_path.iterdir()] == ['other.db']
@@ -0,0 +1,86 @@
+import gzip
+import json
+
+import pytest
+
+from modules.data_processor import TFCDataProcessor, _crawler_module, iter_json_records
+
+RECORDS = [
+    {'id': 'tfc_2', 'title': "報告二", 'categories': ["國際", "健康"], 'score': 2},
+    {'id': 'tfc_1', 'title': "含有 ] 與 , 的標題", 'categories': [], 'score': 10},
+    {'id': 'mygopen_1', 'title': "沒有編號", 'categories': None, 'score': 1.5},
+]
+
+
+@pytest.mark.parametrize('chunk_size', [3, 64, 1 << 16])
+@pytest.mark.parametrize('dump', [
+    lambda records: json.dumps(records, ensure_ascii=False),
+    lambda records: json.dumps(records, ensure_ascii=False, indent=4),
+    lambda records: '[\n' + ',\n'.join(json.dumps(r, ensure_ascii=False) for r in records) + '\n]\n',
+    lambda records: ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records),
+], ids=['array', 'indented-array', 'array-per-line', 'jsonl'])
+def test_reads_json_arrays_and_jsonl(tmp_path, dump, chunk_size):
+    path = tmp_path / 'records.json'
+    path.write_text(dump(RECORDS), encoding='utf-8')
+
+    assert list(iter_json_records(str(path), chunk_size=chunk_size)) == RECORDS
+
+
+def test_reads_empty_array_and_byte_order_mark(tmp_path):
+    empty = tmp_path / 'empty.json'
+    empty.write_text('[ ]', encoding='utf-8')
+    bom = tmp_path / 'bom.jsonl'
+    bom.write_text('﻿' + json.dumps(RECORDS[0], ensure_ascii=False) + '\n', encoding='utf-8')
+
+    assert list(iter_json_records(str(empty))) == []
+    assert list(iter_json_records(str(bom))) == [RECORDS[0]]
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / 'truncated.json'
+    path.write_text(json.dumps(RECORDS, ensure_ascii=False)[:-20], encoding='utf-8')
+
+    with pytest.raises(ValueError):
+        list(iter_json_records(str(path), chunk_size=16))
+
+
+def write_corpus(corpus_dir, records):
+    return _crawler_module('corpus').write_corpus(records, str(corpus_dir), shard_size=2)
+
+
+def test_reads_corpus_through_crawler_reader(tmp_path):
+    reports = [
+        {'report_number': str(n), 'source': 'TFC', 'title': f"報告{n}", 'content': f"原文{n}",
+         'processed_content': f"內容{n}", 'publish_date': f"2024-01-0{n}"}
+        for n in (5, 4, 3, 2, 1)
+    ]
+    write_corpus(tmp_path / 'corpus', reports)
+
+    records = list(TFCDataProcessor().iter_raw_data(str(tmp_path / 'corpus'), limit=3, include_content=True))
+
+    assert [(r['report_number'], r['content']) for r in records] == [('5', "原文5"), ('4', "原文4"), ('3', "原文3")]
+
+
+def test_misaligned_corpus_sidecar_raises(tmp_path):
+    write_corpus(tmp_path / 'corpus', [{'report_number': '2', 'title': "二"}, {'report_number': '1', 'title': "一"}])
+    with gzip.open(tmp_path / 'corpus' / 'content-00000.jsonl.gz', 'wt', encoding='utf-8') as f:
+        f.write('{"report_key": "1", "content": ""}\n{"report_key": "2", "content": ""}\n')
+
+    with pytest.raises(ValueError):
+        list(TFCDataProcessor().iter_raw_data(str(tmp_path / 'corpus'), include_content=True))
+
+
+def test_reads_sqlite_through_report_store_filtered_by_source(tmp_path):
+    db_path = str(tmp_path / 'reports.db')
+    store = _crawler_module('storage').ReportStore(db_path)
+    store.upsert({'report_number': '12', 'source': 'TFC', 'title': "舊", 'publish_date': '2024-01-01',
+                  'categories': ["健康"]})
+    store.upsert({'report_number': '13', 'source': 'TFC', 'title': "新", 'publish_date': '2024-01-03'})
+    store.upsert({'content_url': 'https://www.mygopen.com/a', 'source': 'MyGoPen', 'title': "謠言",
+                  'publish_date': '2024-01-02'})
+    store.close()
+
+    records = list(TFCDataProcessor().iter_raw_data(db_path, source='TFC'))
+
+    assert [(r['report_number'], r['title']) for r in records] == [('13', "新"), ('12', "舊")]
+    assert records[1]['categories'] == ["健康"]
@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from modules.change_manifest import ChangeSet
+from modules.near_duplicate import NearDuplicateDetector
+
+RUMOR = ("網傳影片聲稱喝熱薑茶可以預防新冠肺炎，並且每天三杯就能清除體內病毒。"
+         "經查證，衛福部表示目前沒有任何研究證實薑茶能預防或治療新冠肺炎，民眾應接種疫苗並勤洗手。")
+OTHER = ("網傳訊息指出某銀行即將倒閉，要求民眾儘速提領存款。金管會表示該銀行財務狀況正常，"
+         "資本適足率符合規定，呼籲民眾不要轉傳未經證實的訊息。")
+
+
+def report(report_id, content, check_result='錯誤'):
+    return {
+        'id': report_id, 'title': "查核報告", 'processed_content': content, 'check_result': check_result,
+        'content_url': f"https://tfc-taiwan.org.tw/articles/{report_id}", 'publish_date': '', 'categories': [],
+    }
+
+
+@pytest.fixture
+def clusters_path(tmp_path):
+    return str(tmp_path / 'clusters.json')
+
+
+def committed_detector(clusters_path, documents):
+    detector = NearDuplicateDetector(clusters_path=clusters_path).fit(documents)
+    detector.commit()
+    return NearDuplicateDetector(clusters_path=clusters_path)
+
+
+def test_new_representative_replaces_previous_one(clusters_path):
+    previous = [report('tfc_2', RUMOR + "（更新）"), report('tfc_1', RUMOR), report('tfc_9', OTHER)]
+    detector = committed_detector(clusters_path, previous)
+
+    # 較新的 tfc_3 成為代表報告，原本的代表 tfc_2 併入同一群
+    current = [report('tfc_3', RUMOR + "（再更新）")] + previous
+    detector.fit(current)
+    plan = detector.plan_changes(ChangeSet(added=[current[0]]), current)
+
+    assert [document['id'] for document in plan.added] == ['tfc_3']
+    assert plan.added[0]['duplicate_ids'] == ['tfc_2', 'tfc_1']
+    assert plan.removed == ['tfc_2']
+
+
+def test_changed_member_updates_representative_and_leaves_index(clusters_path):
+    documents = [report('tfc_2', RUMOR), report('tfc_1', RUMOR + "。"), report('tfc_9', OTHER)]
+    detector = committed_detector(clusters_path, documents)
+
+    detector.fit(documents)
+    plan = detector.plan_changes(ChangeSet(changed=[documents[1]]), documents)
+
+    assert [document['id'] for document in plan.added] == ['tfc_2']
+    assert plan.removed == ['tfc_1']
+
+
+def test_unchanged_clusters_produce_no_changes(clusters_path):
+    documents = [report('tfc_2', RUMOR), report('tfc_1', RUMOR), report('tfc_9', OTHER)]
+    detector = committed_detector(clusters_path, documents)
+
+    detector.fit(documents)
+    plan = detector.plan_changes(ChangeSet(unchanged_count=3), documents)
+
+    assert plan.is_empty()
+
+
+def test_different_check_results_are_not_clustered(clusters_path):
+    documents = [report('tfc_2', RUMOR), report('tfc_1', RUMOR, check_result='正確')]
+
+    detector = NearDuplicateDetector().fit(documents)
+
+    assert detector.clusters == {'tfc_2': [], 'tfc_1': []}